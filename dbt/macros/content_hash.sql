@@ -0,0 +1,3 @@
+{% macro content_hash(document, metadata) %}
+    ENCODE(SHA256(CONVERT_TO({{ document }} || E'\n' || {{ metadata }}::TEXT, 'UTF8')), 'hex')
+{% endmacro %}
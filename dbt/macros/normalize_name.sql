@@ -0,0 +1,13 @@
+{#
+    Substance or class name as matched by the agent, step for step like
+    normalize_name() in pipeline/io/matrix_interactions.py: NFKD, non-ASCII
+    characters dropped (accents, but also ’, ø, œ), lowercase, runs of ASCII
+    whitespace collapsed, trimmed. The normalize_name__cases test checks it on
+    the shared seeds/normalize_name_cases.csv.
+#}
+{% macro normalize_name(text) %}
+    TRIM(REGEXP_REPLACE(
+        LOWER(REGEXP_REPLACE(NORMALIZE({{ text }}, NFKD), '[^\x01-\x7F]', '', 'g')),
+        '[ \t\n\r\f\v]+', ' ', 'g'
+    ))
+{% endmacro %}
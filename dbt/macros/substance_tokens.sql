@@ -0,0 +1,13 @@
+{#
+    Distinct search tokens of a substance or class name, sorted — the same as
+    _substance_tokens() in the check_interactions agent tool: normalize_name, split
+    on anything but [a-z0-9], tokens shorter than min_length characters dropped.
+#}
+{% macro substance_tokens(text, min_length=3) %}
+    ARRAY(
+        SELECT DISTINCT token
+        FROM UNNEST(REGEXP_SPLIT_TO_ARRAY({{ normalize_name(text) }}, '[^a-z0-9]+')) AS token
+        WHERE LENGTH(token) >= {{ min_length }}
+        ORDER BY token
+    )
+{% endmacro %}
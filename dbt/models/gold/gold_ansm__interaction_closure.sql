@@ -0,0 +1,100 @@
+{{ config(
+    materialized='table',
+    indexes=[{'columns': ['substance_a', 'substance_b'], 'unique': True}]
+) }}
+
+-- Strongest ANSM interaction for every pair of BDPM active substances, so that
+-- check_interactions answers a pair with one unique-index lookup instead of
+-- resolving classes and matching name combinations at query time.
+-- A substance matches a Thésaurus entry when every token of the entry is a token
+-- of its name (AMIODARONE matches CHLORHYDRATE D'AMIODARONE), either directly or
+-- through one of its ANSM classes. Tokens keep short words (VITAMINE A must not
+-- match VITAMINE D3). Names are stored with normalize_name, each pair once with
+-- substance_a < substance_b; interaction_a / interaction_b are the matched entries.
+WITH substances AS (
+    SELECT DISTINCT
+        {{ normalize_name('denomination_substance') }} AS substance
+    FROM {{ ref('silver_bdpm__composition') }}
+    WHERE nature_composant = 'SA'
+      AND denomination_substance IS NOT NULL
+),
+
+substance_tokens AS (
+    SELECT
+        substance,
+        {{ substance_tokens('substance', min_length=1) }} AS tokens
+    FROM substances
+),
+
+entries AS (
+    SELECT
+        entry,
+        {{ substance_tokens('entry', min_length=1) }} AS tokens
+    FROM (
+        SELECT substance_a AS entry FROM {{ ref('silver_ansm__interaction') }}
+        UNION
+        SELECT substance_b FROM {{ ref('silver_ansm__interaction') }}
+    ) AS entry_names
+),
+
+classes AS (
+    SELECT
+        {{ normalize_name('classe_ansm') }} AS classe,
+        {{ substance_tokens('substance_dci', min_length=1) }} AS tokens
+    FROM {{ ref('silver_ansm__substance_class') }}
+),
+
+-- Thésaurus entries of each substance: its own name, then its classes
+substance_entries AS (
+    SELECT
+        s.substance,
+        e.entry
+    FROM substance_tokens AS s
+    INNER JOIN entries AS e ON s.tokens @> e.tokens
+    WHERE CARDINALITY(e.tokens) > 0
+
+    UNION
+
+    SELECT
+        s.substance,
+        e.entry
+    FROM substance_tokens AS s
+    INNER JOIN classes AS c ON s.tokens @> c.tokens AND CARDINALITY(c.tokens) > 0
+    INNER JOIN entries AS e ON c.classe = {{ normalize_name('e.entry') }}
+),
+
+pairs AS (
+    SELECT
+        i.substance_a AS interaction_a,
+        i.substance_b AS interaction_b,
+        i.niveau_contrainte,
+        i.nature_risque,
+        i.conduite_a_tenir,
+        LEAST(sa.substance, sb.substance) AS substance_a,
+        GREATEST(sa.substance, sb.substance) AS substance_b
+    FROM {{ ref('silver_ansm__interaction') }} AS i
+    INNER JOIN substance_entries AS sa ON i.substance_a = sa.entry
+    INNER JOIN substance_entries AS sb ON i.substance_b = sb.entry
+    WHERE sa.substance <> sb.substance
+)
+
+SELECT DISTINCT ON (substance_a, substance_b)
+    substance_a,
+    substance_b,
+    interaction_a,
+    interaction_b,
+    niveau_contrainte,
+    nature_risque,
+    conduite_a_tenir
+FROM pairs
+ORDER BY
+    substance_a,
+    substance_b,
+    CASE niveau_contrainte
+        WHEN 'Contre-indication' THEN 1
+        WHEN 'Association déconseillée' THEN 2
+        WHEN 'Précaution d''emploi' THEN 3
+        ELSE 4
+    END,
+    interaction_a,
+    interaction_b
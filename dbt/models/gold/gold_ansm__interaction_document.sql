@@ -0,0 +1,39 @@
+{{ config(materialized='table') }}
+
+-- One retrieval document per ANSM interaction pair for idx_ansm_interaction_v1.
+-- doc_id is the MD5 of 'substance_a|substance_b', the id used since the first index.
+-- doc_metadata.tokens lists the search tokens of both substances, for the where-prefiltered
+-- vector search of check_interactions (ChromaDB rejects empty lists: omitted then).
+WITH interactions AS (
+    SELECT
+        *,
+        {{ substance_tokens("substance_a || ' ' || substance_b") }} AS tokens
+    FROM {{ ref('silver_ansm__interaction') }}
+),
+
+documents AS (
+    SELECT
+        MD5(substance_a || '|' || substance_b) AS doc_id,
+        CONCAT_WS('. ',
+            'Interaction: ' || substance_a || ' + ' || substance_b,
+            'Niveau de contrainte: ' || niveau_contrainte,
+            'Nature du risque: ' || nature_risque,
+            'Conduite à tenir: ' || conduite_a_tenir
+        ) AS doc_text,
+        JSONB_BUILD_OBJECT(
+            'substance_a', substance_a,
+            'substance_b', substance_b,
+            'niveau_contrainte', niveau_contrainte
+        ) || CASE
+            WHEN CARDINALITY(tokens) > 0 THEN JSONB_BUILD_OBJECT('tokens', TO_JSONB(tokens))
+            ELSE '{}'::JSONB
+        END AS doc_metadata
+    FROM interactions
+)
+
+SELECT
+    doc_id,
+    doc_text,
+    doc_metadata,
+    {{ content_hash('doc_text', 'doc_metadata') }} AS content_hash
+FROM documents
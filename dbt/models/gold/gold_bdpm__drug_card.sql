@@ -0,0 +1,125 @@
+{{ config(
+    materialized='table',
+    indexes=[{'columns': ['cis'], 'unique': True}]
+) }}
+
+-- One compact JSONB card per CIS, read by the get_drug_card tool in a single keyed
+-- lookup: specialty, active substances, presentations with prices, generic groups
+-- with their members, delivery conditions and important-info rows.
+-- JSONB_STRIP_NULLS drops absent fields at every level; empty sections are omitted.
+WITH substances AS (
+    SELECT
+        cis,
+        JSONB_AGG(
+            JSONB_BUILD_OBJECT(
+                'denomination', denomination_substance,
+                'dosage', dosage,
+                'reference_dosage', reference_dosage
+            )
+            ORDER BY denomination_substance
+        ) AS substances
+    FROM {{ ref('silver_bdpm__composition') }}
+    WHERE nature_composant = 'SA' AND denomination_substance IS NOT NULL
+    GROUP BY cis
+),
+
+presentations AS (
+    SELECT
+        cis,
+        JSONB_AGG(
+            JSONB_BUILD_OBJECT(
+                'cip13', cip13,
+                'libelle', libelle_presentation,
+                'etat_commercialisation', etat_commercialisation,
+                'taux_remboursement', taux_remboursement,
+                'prix', prix_medicament
+            )
+            ORDER BY cip13
+        ) AS presentations
+    FROM {{ ref('silver_bdpm__presentation') }}
+    GROUP BY cis
+),
+
+group_members AS (
+    SELECT
+        g.id_groupe,
+        JSONB_AGG(
+            JSONB_BUILD_OBJECT(
+                'cis', g.cis,
+                'denomination', m.denomination,
+                'type_generique', g.type_generique,
+                'etat_commercialisation', m.etat_commercialisation
+            )
+            ORDER BY g.type_generique, m.denomination
+        ) AS membres
+    FROM {{ ref('silver_bdpm__generique') }} AS g
+    INNER JOIN {{ ref('silver_bdpm__medicament') }} AS m ON g.cis = m.cis
+    GROUP BY g.id_groupe
+),
+
+generic_groups AS (
+    SELECT
+        g.cis,
+        JSONB_AGG(
+            JSONB_BUILD_OBJECT(
+                'id_groupe', g.id_groupe,
+                'libelle', gg.libelle_groupe,
+                'type_generique', g.type_generique,
+                'membres', gm.membres
+            )
+            ORDER BY g.id_groupe
+        ) AS groupes_generiques
+    FROM {{ ref('silver_bdpm__generique') }} AS g
+    LEFT JOIN {{ ref('silver_bdpm__groupe_generique') }} AS gg ON g.id_groupe = gg.id_groupe
+    LEFT JOIN group_members AS gm ON g.id_groupe = gm.id_groupe
+    GROUP BY g.cis
+),
+
+conditions AS (
+    SELECT
+        cis,
+        JSONB_AGG(condition_prescription_delivrance ORDER BY condition_prescription_delivrance)
+            AS conditions_delivrance
+    FROM {{ ref('silver_bdpm__condition_delivrance') }}
+    WHERE condition_prescription_delivrance <> ''
+    GROUP BY cis
+),
+
+important_info AS (
+    SELECT
+        cis,
+        JSONB_AGG(
+            JSONB_BUILD_OBJECT(
+                'date_debut', date_debut,
+                'date_fin', date_fin,
+                'texte', texte_info_importante
+            )
+            ORDER BY date_debut DESC NULLS LAST
+        ) AS infos_importantes
+    FROM {{ ref('silver_bdpm__info_importante') }}
+    GROUP BY cis
+)
+
+SELECT
+    m.cis,
+    JSONB_STRIP_NULLS(JSONB_BUILD_OBJECT(
+        'cis', m.cis,
+        'denomination', m.denomination,
+        'forme_pharma', m.forme_pharma,
+        'voies_admin', m.voies_admin,
+        'statut_amm', m.statut_amm,
+        'etat_commercialisation', m.etat_commercialisation,
+        'titulaire', m.titulaire,
+        'surveillance_renforcee', m.surveillance_renforcee,
+        'substances', s.substances,
+        'presentations', p.presentations,
+        'groupes_generiques', gg.groupes_generiques,
+        'conditions_delivrance', c.conditions_delivrance,
+        'infos_importantes', i.infos_importantes
+    )) AS card
+FROM {{ ref('silver_bdpm__medicament') }} AS m
+LEFT JOIN substances AS s ON m.cis = s.cis
+LEFT JOIN presentations AS p ON m.cis = p.cis
+LEFT JOIN generic_groups AS gg ON m.cis = gg.cis
+LEFT JOIN conditions AS c ON m.cis = c.cis
+LEFT JOIN important_info AS i ON m.cis = i.cis
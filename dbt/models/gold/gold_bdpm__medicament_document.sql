@@ -0,0 +1,40 @@
+{{ config(materialized='table') }}
+
+-- One retrieval document per CIS for idx_bdpm_medicament_v1.
+-- NULL parts are dropped by CONCAT_WS, so absent fields leave no empty label.
+WITH substances AS (
+    SELECT
+        cis,
+        STRING_AGG(
+            denomination_substance
+            || CASE WHEN dosage IS NOT NULL THEN ' ' || dosage ELSE '' END,
+            '; ' ORDER BY denomination_substance
+        ) AS substances
+    FROM {{ ref('silver_bdpm__composition') }}
+    WHERE nature_composant = 'SA'
+    GROUP BY cis
+),
+
+documents AS (
+    SELECT
+        m.cis::TEXT AS doc_id,
+        CONCAT_WS('. ',
+            m.denomination || ' (' || CONCAT_WS(', ', m.forme_pharma, m.voies_admin) || ')',
+            'Substances actives: ' || s.substances,
+            'Statut: ' || m.etat_commercialisation,
+            'Titulaire: ' || m.titulaire
+        ) AS doc_text,
+        JSONB_BUILD_OBJECT(
+            'cis', m.cis,
+            'etat_commercialisation', COALESCE(m.etat_commercialisation, '')
+        ) AS doc_metadata
+    FROM {{ ref('silver_bdpm__medicament') }} AS m
+    LEFT JOIN substances AS s ON m.cis = s.cis
+)
+
+SELECT
+    doc_id,
+    doc_text,
+    doc_metadata,
+    {{ content_hash('doc_text', 'doc_metadata') }} AS content_hash
+FROM documents
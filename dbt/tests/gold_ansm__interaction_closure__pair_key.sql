@@ -0,0 +1,6 @@
+-- (substance_a, substance_b) is the lookup key of check_interactions: each pair is
+-- stored once, ordered, and never pairs a substance with itself.
+SELECT substance_a, substance_b
+FROM {{ ref('gold_ansm__interaction_closure') }}
+GROUP BY substance_a, substance_b
+HAVING COUNT(*) > 1 OR substance_a >= substance_b
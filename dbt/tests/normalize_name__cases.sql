@@ -0,0 +1,5 @@
+-- The normalize_name macro gives the expected key for every shared case; the
+-- Python normalize_name() is tested on the same seed.
+SELECT name, expected, {{ normalize_name('name') }} AS normalized
+FROM {{ ref('normalize_name_cases') }}
+WHERE {{ normalize_name('name') }} IS DISTINCT FROM expected
@@ -0,0 +1,91 @@
+"""
+Nephila — embedding backends on CPU: throughput, query latency and parity with PyTorch.
+
+For each backend (torch, onnx, onnx-int8), embeds a sample of gold medicament
+documents in batches (docs/sec) and then embeds single queries one at a time
+(p50 / p95 latency). Parity is the cosine similarity of every document vector
+with the PyTorch vector of the same text (mean and minimum). No cache is used.
+
+Usage:
+    uv run python scripts/bench_embedding_backends.py [--docs 2000] [--queries 100]
+        [--threads 4] [--backends torch onnx onnx-int8]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.builder_documents import build_medicament_documents
+from nephila.pipeline.io.embedder_local import BACKENDS, get_embedding_function, open_encoder
+
+QUERIES = [
+    "paracétamol 1000 mg comprimé",
+    "anticoagulant oral",
+    "ibuprofène enfant sirop",
+    "amoxicilline acide clavulanique",
+    "traitement de l'hypertension artérielle",
+]
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.asarray(np.einsum("ij,ij->i", a, b))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    engine = create_engine(settings.postgres_dsn)
+    documents: list[str] = []
+    for _, batch, _ in build_medicament_documents(engine, batch_size=args.docs):
+        documents = batch
+        break
+    print(f"{settings.embedding_model}: {len(documents)} documents, {args.queries} queries")
+
+    reference: np.ndarray | None = None
+    for backend in ["torch", *[b for b in args.backends if b != "torch"]]:
+        start = time.perf_counter()
+        ef = get_embedding_function(settings.embedding_model, backend, args.threads)
+        load = time.perf_counter() - start
+
+        with open_encoder(
+            settings.embedding_model, args.batch_size, backend=backend, threads=args.threads
+        ) as encode:
+            start = time.perf_counter()
+            vectors = np.asarray(encode(documents), dtype=np.float32)
+            docs_per_sec = len(documents) / (time.perf_counter() - start)
+
+        ef([QUERIES[0]])  # warm-up
+        timings = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            ef([QUERIES[i % len(QUERIES)]])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        if reference is None:
+            reference = vectors
+        parity = _cosine(reference, vectors)
+        if backend not in args.backends:
+            continue  # torch only computed as the parity reference
+        print(
+            f"  {backend:<10} load {load:6.1f} s   {docs_per_sec:8.1f} docs/s   "
+            f"query p50 {statistics.median(timings):6.1f} ms   "
+            f"p95 {statistics.quantiles(timings, n=20)[-1]:6.1f} ms   "
+            f"cosine vs torch mean {parity.mean():.4f} min {parity.min():.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Nephila — recall@k and memory of reduced embeddings (float16, PCA, truncation).
+
+Reads the full-precision vectors of the live version of an alias (built without
+EMBEDDING_REDUCTION), then for each storage setting runs exact cosine search for
+a sample of the collection's own vectors as queries (the query itself excluded)
+and compares the top k with float32 search over the full vectors. The query goes
+through the same projection as the documents, as in the agent tools. Memory is
+the size of the stored vectors: ChromaDB keeps float32 in its HNSW segment (plus
+the graph links, unchanged by the dimension), the local index float16 on disk.
+
+Usage:
+    uv run python scripts/bench_embedding_reduction.py [--alias idx_bdpm_medicament_v1]
+        [--queries 500] [--top-k 5] [--dims 128 256 384] [--fit-sample 2000]
+"""
+
+import argparse
+
+import chromadb
+import numpy as np
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import resolve_collection
+from nephila.pipeline.io.indexer_chroma import PAGE_SIZE
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY, Projection, fit_pca, truncation
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(vectors: np.ndarray, queries: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    scores[np.arange(len(rows)), rows] = -np.inf  # a document is not its own neighbour
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alias", default="idx_bdpm_medicament_v1")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 256, 384])
+    parser.add_argument("--fit-sample", type=int, default=2000, help="vectors the PCA is fit on")
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
+    collection = client.get_collection(resolve_collection(client, args.alias))
+    if (collection.metadata or {}).get(PROJECTION_KEY):
+        raise SystemExit(
+            f"{collection.name} stores projected vectors: rebuild it without reduction"
+        )
+
+    pages = []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings"], limit=PAGE_SIZE, offset=offset)
+        if len(page["ids"]):
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if len(page["ids"]) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    full = _unit(np.concatenate(pages))
+    n, dim = full.shape
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(n, size=min(args.queries, n), replace=False)
+    truth = _top_k(full, full[rows], rows, args.top_k)
+    fit = full[rng.choice(n, size=min(args.fit_sample, n), replace=False)]
+
+    settings_to_test: list[tuple[str, Projection | None]] = [("full", None)]
+    for d in args.dims:
+        if d < dim:
+            settings_to_test += [(f"pca {d}", fit_pca(fit, d)), (f"truncate {d}", truncation(d))]
+
+    print(f"{collection.name}: {n} vectors x {dim}, {len(rows)} queries, recall@{args.top_k}")
+    print(f"  {'setting':<14} {'dtype':<8} {'recall':>7} {'MB':>8} {'saved':>7}")
+    full_bytes = n * dim * 4
+    for label, projection in settings_to_test:
+        stored = projection.apply(full) if projection is not None else full
+        for dtype in (np.float32, np.float16):
+            vectors = stored.astype(dtype).astype(np.float32)
+            found = _top_k(vectors, vectors[rows], rows, args.top_k)
+            size = n * stored.shape[1] * np.dtype(dtype).itemsize
+            print(
+                f"  {label:<14} {np.dtype(dtype).name:<8} {_recall(found, truth):7.3f} "
+                f"{size / (1 << 20):8.1f} {1 - size / full_bytes:7.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Nephila — agent query embedding in-process vs through the shared embedding service.
+
+Each of N concurrent sessions (threads) embeds single queries one after another.
+In-process, the sessions share the model and call it directly; through the
+service, they send their queries to an EmbeddingService started here on a
+temporary Unix socket, which micro-batches them. Reports requests/sec, p50 / p95
+latency and, for the service, the mean number of texts per forward pass.
+
+Usage:
+    uv run python scripts/bench_embedding_service.py [--sessions 1 10 100]
+        [--requests 20] [--window-ms 2] [--max-batch 64]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.embedder_local import get_embedding_function
+from nephila.pipeline.io.service_embeddings import (
+    BatchStats,
+    EmbeddingService,
+    EmbeddingServiceClient,
+)
+
+QUERIES = [
+    "paracétamol 1000 mg comprimé",
+    "anticoagulant oral",
+    "ibuprofène enfant sirop",
+    "amoxicilline acide clavulanique",
+    "traitement de l'hypertension artérielle",
+]
+
+
+def _run(
+    embed: Callable[[list[str]], object], sessions: int, requests: int
+) -> tuple[float, list[float]]:
+    def session(index: int) -> list[float]:
+        timings = []
+        for i in range(requests):
+            start = time.perf_counter()
+            embed([f"{QUERIES[(index + i) % len(QUERIES)]} {index}"])
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        timings = [t for result in pool.map(session, range(sessions)) for t in result]
+    return len(timings) / (time.perf_counter() - start), timings
+
+
+def _summary(rate: float, timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    return f"{rate:8.1f} req/s   p50 {statistics.median(timings):7.1f} ms   p95 {p95:7.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=20, help="queries per session")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    ef = get_embedding_function(
+        settings.embedding_model, settings.embedding_backend, settings.embedding_threads
+    )
+    model = ef._model
+
+    def encode(texts: list[str]) -> object:
+        return model.encode(texts, convert_to_numpy=True, normalize_embeddings=False)
+
+    encode(QUERIES)  # warm-up
+    print(
+        f"{settings.embedding_model} ({settings.embedding_backend}), "
+        f"{args.requests} queries/session"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = f"unix:{Path(tmp) / 'embeddings.sock'}"
+        with EmbeddingService(address, encode, args.window_ms, args.max_batch) as service:
+            client = EmbeddingServiceClient(address)
+            for sessions in args.sessions:
+                assert service.batcher is not None
+                service.batcher.stats = BatchStats()
+                direct = _run(encode, sessions, args.requests)
+                served = _run(client.embed, sessions, args.requests)
+                print(f"  {sessions:>3} sessions")
+                print(f"    in-process  {_summary(*direct)}")
+                print(
+                    f"    service     {_summary(*served)}   "
+                    f"mean batch {service.batcher.stats.mean_batch_size:5.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
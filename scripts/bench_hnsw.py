@@ -0,0 +1,220 @@
+"""
+Nephila — HNSW settings sweep: recall@k against query latency for both collections.
+
+Reads the stored vectors of the live version of each alias and holds out a
+sample of them as queries. For every (max_neighbors, ef_construction, ef_search)
+setting the rest is indexed in a scratch ChromaDB (embedded, in a temporary
+directory — the server is only read), then queried one vector at a time.
+Ground truth is exact brute-force search over the same vectors and distance
+space. Prints one row per setting, writes them as CSV, and plots recall against
+p50 latency per alias when matplotlib is installed (uv sync --extra bench).
+Pick values, then set them per alias in COLLECTION_HNSW.
+
+Usage:
+    uv run python scripts/bench_hnsw.py [--queries 200] [--top-k 5] [--space cosine]
+        [--m 8 16 32] [--ef-construction 100 200] [--ef-search 10 20 40 80 160]
+        [--csv data/bench/hnsw.csv] [--plot data/bench/hnsw.png]
+"""
+
+import argparse
+import csv
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import resolve_collection
+from nephila.pipeline.io.indexer_chroma import PAGE_SIZE, SPACES, HnswSettings
+
+ALIASES = ["idx_bdpm_medicament_v1", "idx_ansm_interaction_v1"]
+
+
+@dataclass(frozen=True)
+class SweepRow:
+    alias: str
+    space: str
+    max_neighbors: int
+    ef_construction: int
+    ef_search: int
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    build_seconds: float
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, space: str, k: int) -> np.ndarray:
+    """Brute-force neighbours with ChromaDB's distance definitions."""
+    if space == "cosine":
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ vectors.T
+    if space == "l2":
+        scores = scores - 0.5 * np.einsum("ij,ij->i", vectors, vectors)[None, :]
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def sweep(
+    client: chromadb.ClientAPI,
+    alias: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    space: str,
+    m_values: list[int],
+    ef_construction_values: list[int],
+    ef_search_values: list[int],
+    top_k: int,
+) -> list[SweepRow]:
+    truth = exact_top_k(vectors, queries, space, top_k)
+    ids = [str(i) for i in range(len(vectors))]
+    batch = client.get_max_batch_size()
+    rows = []
+    for m in m_values:
+        for ef_construction in ef_construction_values:
+            # ef_search is fixed once a collection's index is loaded: one build per value
+            for ef_search in ef_search_values:
+                hnsw = HnswSettings(space, ef_construction, m, ef_search)
+                name = f"bench_hnsw_{m}_{ef_construction}_{ef_search}"
+                collection = client.create_collection(
+                    name, configuration=hnsw.configuration(), embedding_function=None
+                )
+                start = time.perf_counter()
+                for i in range(0, len(ids), batch):
+                    collection.add(ids=ids[i : i + batch], embeddings=vectors[i : i + batch])
+                build_seconds = time.perf_counter() - start
+
+                collection.query(query_embeddings=queries[:1], n_results=top_k, include=[])
+                timings, hits = [], 0
+                for query, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    found = collection.query(
+                        query_embeddings=query[None, :], n_results=top_k, include=[]
+                    )["ids"][0]
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits += len({int(i) for i in found} & set(expected.tolist()))
+                rows.append(
+                    SweepRow(
+                        alias=alias,
+                        space=space,
+                        max_neighbors=m,
+                        ef_construction=ef_construction,
+                        ef_search=ef_search,
+                        recall=hits / (len(queries) * top_k),
+                        p50_ms=statistics.median(timings),
+                        p95_ms=statistics.quantiles(timings, n=20)[-1],
+                        build_seconds=build_seconds,
+                    )
+                )
+                client.delete_collection(name)
+    return rows
+
+
+def plot(rows: list[SweepRow], path: Path, top_k: int) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    aliases = list(dict.fromkeys(r.alias for r in rows))
+    fig, axes = plt.subplots(1, len(aliases), figsize=(6 * len(aliases), 4.5), squeeze=False)
+    for ax, alias in zip(axes[0], aliases):
+        curves: dict[tuple[int, int], list[SweepRow]] = {}
+        for r in rows:
+            if r.alias == alias:
+                curves.setdefault((r.max_neighbors, r.ef_construction), []).append(r)
+        for (m, ef_construction), curve in curves.items():
+            ax.plot(
+                [r.p50_ms for r in curve],
+                [r.recall for r in curve],
+                marker="o",
+                label=f"M={m} ef_construction={ef_construction}",
+            )
+            for r in curve:
+                ax.annotate(str(r.ef_search), (r.p50_ms, r.recall), fontsize=7)
+        ax.set_title(alias)
+        ax.set_xlabel("p50 query latency (ms)")
+        ax.set_ylabel(f"recall@{top_k}")
+        ax.grid(alpha=0.3)
+        ax.legend(fontsize=8)
+    fig.tight_layout()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(path, dpi=120)
+
+
+def _read_vectors(collection: chromadb.Collection) -> np.ndarray:
+    pages, offset = [], 0
+    while True:
+        page = collection.get(include=["embeddings"], limit=PAGE_SIZE, offset=offset)
+        if len(page["ids"]):
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if len(page["ids"]) < PAGE_SIZE:
+            return np.concatenate(pages)
+        offset += PAGE_SIZE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--space", choices=SPACES, help="default: the live collection's")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--csv", type=Path, default=Path("data/bench/hnsw.csv"))
+    parser.add_argument("--plot", type=Path, default=Path("data/bench/hnsw.png"))
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    server = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
+    rng = np.random.default_rng(0)
+    rows: list[SweepRow] = []
+    with tempfile.TemporaryDirectory() as scratch:
+        client = chromadb.PersistentClient(path=scratch)
+        for alias in ALIASES:
+            live = server.get_collection(resolve_collection(server, alias))
+            space = args.space or (live.configuration_json.get("hnsw") or {}).get("space", "l2")
+            vectors = _read_vectors(live)
+            held_out = rng.choice(
+                len(vectors), size=min(args.queries, len(vectors) // 10), replace=False
+            )
+            mask = np.ones(len(vectors), dtype=bool)
+            mask[held_out] = False
+            print(f"{alias}: {mask.sum()} vectors, {len(held_out)} queries, {space}")
+            for row in sweep(
+                client,
+                alias,
+                vectors[mask],
+                vectors[held_out],
+                space,
+                args.m,
+                args.ef_construction,
+                args.ef_search,
+                args.top_k,
+            ):
+                rows.append(row)
+                print(
+                    f"  M={row.max_neighbors:<3} ef_construction={row.ef_construction:<4} "
+                    f"ef_search={row.ef_search:<4} recall@{args.top_k} {row.recall:.3f}   "
+                    f"p50 {row.p50_ms:6.2f} ms   p95 {row.p95_ms:6.2f} ms   "
+                    f"build {row.build_seconds:5.1f} s"
+                )
+
+    args.csv.parent.mkdir(parents=True, exist_ok=True)
+    with args.csv.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(asdict(rows[0])))
+        writer.writeheader()
+        writer.writerows(asdict(r) for r in rows)
+    print(f"Wrote {args.csv}")
+    try:
+        plot(rows, args.plot, args.top_k)
+        print(f"Wrote {args.plot}")
+    except ImportError:
+        print("matplotlib not installed (uv sync --extra bench): no plot")
+
+
+if __name__ == "__main__":
+    main()
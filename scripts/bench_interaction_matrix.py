@@ -0,0 +1,103 @@
+"""
+Nephila — prescription screening: vectorized interaction matrix against per-pair lookups.
+
+Draws random prescriptions of 10–20 substances from the exported matrix
+(INTERACTION_MATRIX_PATH, or a synthetic one with --synthetic) and screens them
+three ways: InteractionMatrix.screen() over the whole batch, a Python loop over
+every pair against an in-memory dict (the floor of any per-pair approach), and,
+for --sql prescriptions, queries.find_interactions per pair as the agent tool
+does (needs Postgres). Reports prescriptions/sec and checks the max severities agree.
+
+Usage:
+    uv run python scripts/bench_interaction_matrix.py [--prescriptions 10000] [--sql 0]
+        [--synthetic 5000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.matrix_interactions import (
+    SEVERITY,
+    SEVERITY_LEVELS,
+    InteractionMatrix,
+    load_interaction_matrix,
+)
+
+
+def synthetic_matrix(n: int, rng: np.random.Generator) -> InteractionMatrix:
+    """n substances, each interacting with about 30 others."""
+    a = rng.integers(0, n, size=n * 15)
+    b = rng.integers(0, n, size=n * 15)
+    levels = rng.choice(list(SEVERITY), size=len(a))
+    return InteractionMatrix.from_pairs(
+        (f"substance {x}", f"substance {y}", str(level))
+        for x, y, level in zip(a, b, levels)
+        if x != y
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prescriptions", type=int, default=10_000)
+    parser.add_argument("--sql", type=int, default=0, help="prescriptions checked pair by pair")
+    parser.add_argument("--synthetic", type=int, default=0, help="substances, instead of the file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        matrix = synthetic_matrix(args.synthetic, rng)
+    else:
+        matrix = load_interaction_matrix(PipelineSettings().interaction_matrix_path)
+    names = matrix.substances.tolist()
+    sets = [
+        [names[i] for i in rng.choice(len(names), size=rng.integers(10, 21), replace=False)]
+        for _ in range(args.prescriptions)
+    ]
+    pairs = sum(len(s) * (len(s) - 1) // 2 for s in sets)
+    print(f"{len(matrix)} substances, {matrix.pair_count} interacting pairs")
+    print(f"{len(sets)} prescriptions, {pairs} substance pairs")
+
+    start = time.perf_counter()
+    screening = matrix.screen(sets)
+    vectorized = time.perf_counter() - start
+
+    rows, cols = matrix.severity.nonzero()
+    lookup = {(names[r], names[c]): int(v) for r, c, v in zip(rows, cols, matrix.severity.data)}
+    start = time.perf_counter()
+    looped = []
+    for substances in sets:
+        unique = sorted(set(substances))
+        looped.append(
+            max(
+                (lookup.get((a, b), 0) for i, a in enumerate(unique) for b in unique[i + 1 :]),
+                default=0,
+            )
+        )
+    per_pair = time.perf_counter() - start
+    assert screening.max_severity.tolist() == looped
+
+    print(f"  matrix screen()     {len(sets) / vectorized:12,.0f} prescriptions/s")
+    print(f"  per-pair dict loop  {len(sets) / per_pair:12,.0f} prescriptions/s")
+    print(f"  speedup             {per_pair / vectorized:12.1f}x")
+
+    if args.sql:
+        from nephila.agent.queries import find_interactions
+
+        start = time.perf_counter()
+        for substances in sets[: args.sql]:
+            for i, a in enumerate(substances):
+                for b in substances[i + 1 :]:
+                    find_interactions(a, b)
+        elapsed = time.perf_counter() - start
+        print(f"  find_interactions   {args.sql / elapsed:12,.2f} prescriptions/s")
+
+    counts = np.bincount(screening.max_severity, minlength=len(SEVERITY_LEVELS))
+    for code, level in enumerate(SEVERITY_LEVELS):
+        print(f"  {level or 'no interaction':<26} {counts[code]:>8}")
+
+
+if __name__ == "__main__":
+    main()
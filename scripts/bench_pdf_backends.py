@@ -0,0 +1,52 @@
+"""
+Nephila — throughput of the Thésaurus text-extraction backends, in pages/sec.
+
+Every registered backend extracts the full PDF (no cache) `--rounds` times; the
+best round is reported, along with whether its interaction and class records
+match the pdfplumber reference.
+
+Usage:
+    uv run python scripts/bench_pdf_backends.py [path/to/thesaurus.pdf] [--rounds 3]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from nephila.pipeline.io.extractor_pdf import (
+    DEFAULT_BACKEND,
+    available_text_backends,
+    extract_page_texts,
+)
+from nephila.pipeline.io.parser_ansm import parse_thesaurus_classes, parse_thesaurus_pdf
+
+DEFAULT_PDF = Path("data/bronze/ansm/thesaurus.pdf")
+
+
+def main(pdf_path: Path, rounds: int) -> None:
+    reference = (parse_thesaurus_pdf(pdf_path), parse_thesaurus_classes(pdf_path))
+
+    print(f"PDF: {pdf_path}")
+    print(f"{'backend':<12} {'pages':>6} {'best (s)':>9} {'pages/sec':>10}  parity")
+    for backend in available_text_backends():
+        best = float("inf")
+        n_pages = 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            n_pages = len(extract_page_texts(pdf_path, backend=backend))
+            best = min(best, time.perf_counter() - start)
+
+        records = (
+            parse_thesaurus_pdf(pdf_path, backend=backend),
+            parse_thesaurus_classes(pdf_path, backend=backend),
+        )
+        parity = "reference" if backend == DEFAULT_BACKEND else str(records == reference)
+        print(f"{backend:<12} {n_pages:>6} {best:>9.2f} {n_pages / best:>10.1f}  {parity}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pdf", nargs="?", type=Path, default=DEFAULT_PDF)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.pdf, args.rounds)
@@ -0,0 +1,45 @@
+"""
+Nephila — cold vs warm timing of the ANSM Thésaurus parsers with the page-text cache.
+
+Cold: empty cache directory, pdfplumber extracts every page and writes the cache.
+Warm: same cache directory, page texts are read back from the compressed JSONL.
+
+Usage:
+    uv run python scripts/bench_pdf_cache.py [path/to/thesaurus.pdf]
+"""
+
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from nephila.pipeline.io.parser_ansm import parse_thesaurus_classes, parse_thesaurus_pdf
+
+DEFAULT_PDF = Path("data/bronze/ansm/thesaurus.pdf")
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(pdf_path: Path) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        cold = _timed(lambda: parse_thesaurus_pdf(pdf_path, cache_dir))
+        warm_pdf = _timed(lambda: parse_thesaurus_pdf(pdf_path, cache_dir))
+        warm_classes = _timed(lambda: parse_thesaurus_classes(pdf_path, cache_dir))
+        cache_kb = sum(p.stat().st_size for p in cache_dir.iterdir()) / 1024
+
+    print(f"PDF: {pdf_path} ({pdf_path.stat().st_size / 1024:.0f} KB)")
+    print(f"  cold  parse_thesaurus_pdf      {cold:8.2f} s")
+    print(f"  warm  parse_thesaurus_pdf      {warm_pdf:8.2f} s  (x{cold / warm_pdf:.0f})")
+    print(f"  warm  parse_thesaurus_classes  {warm_classes:8.2f} s  (x{cold / warm_classes:.0f})")
+    print(f"  cache size                     {cache_kb:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PDF)
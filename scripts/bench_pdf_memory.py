@@ -0,0 +1,68 @@
+"""
+Nephila — peak memory of Thésaurus text extraction, retained vs streamed pages.
+
+retained: iterate `pdf.pages` and call `extract_text()` without releasing anything
+          (the pre-streaming behaviour) — pdfplumber keeps every page's layout alive.
+streamed: `iter_page_texts` — one page at a time, caches released after each page.
+
+Each mode runs in a fresh process over the first 25%, 50% and 100% of the pages,
+reporting the Python heap peak (tracemalloc) and the process max RSS.
+A flat streamed column means memory no longer grows with the publication size.
+
+Usage:
+    uv run python scripts/bench_pdf_memory.py [path/to/thesaurus.pdf]
+"""
+
+import multiprocessing as mp
+import resource
+import sys
+import tracemalloc
+from itertools import islice
+from pathlib import Path
+
+import pdfplumber
+
+from nephila.pipeline.io.extractor_pdf import iter_page_texts
+
+DEFAULT_PDF = Path("data/bronze/ansm/thesaurus.pdf")
+
+
+def _measure(mode: str, pdf_path: Path, n_pages: int) -> tuple[float, float]:
+    tracemalloc.start()
+    if mode == "retained":
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[:n_pages]:
+                page.extract_text()
+            _, peak = tracemalloc.get_traced_memory()
+    else:
+        for _ in islice(iter_page_texts(pdf_path), n_pages):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak / 1024**2, rss_mb
+
+
+def _run(mode: str, pdf_path: Path, n_pages: int) -> tuple[float, float]:
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(_measure, (mode, pdf_path, n_pages))
+
+
+def main(pdf_path: Path) -> None:
+    with pdfplumber.open(pdf_path) as pdf:
+        total = len(pdf.pages)
+
+    print(f"PDF: {pdf_path} ({total} pages)")
+    print(f"{'pages':>6} | {'retained heap':>13} {'rss':>8} | {'streamed heap':>13} {'rss':>8}")
+    for n_pages in sorted({max(1, total // 4), max(1, total // 2), total}):
+        r_heap, r_rss = _run("retained", pdf_path, n_pages)
+        s_heap, s_rss = _run("streamed", pdf_path, n_pages)
+        print(
+            f"{n_pages:>6} | {r_heap:>10.1f} MB {r_rss:>5.0f} MB |"
+            f" {s_heap:>10.1f} MB {s_rss:>5.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PDF)
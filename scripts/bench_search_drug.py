@@ -0,0 +1,93 @@
+"""
+Nephila — search_drug latency: N single-query calls against one batched call.
+
+For each question size N, the first N drug names are searched as the tool did
+before (one embedding forward pass and one collection query per drug) and as it
+does now (one forward pass over the N names, one query with N embeddings). The
+embedding cache is bypassed, so every round pays for the forward pass; the
+collection comes from VECTOR_BACKEND like in the agent. Reports p50 / p95 per
+call pattern and the speedup of the batched call.
+
+Usage:
+    uv run python scripts/bench_search_drug.py [--rounds 30] [--sizes 1 2 4 8]
+        [--names warfarine paracétamol ...]
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable, Sequence
+
+from nephila.agent.vectors import get_search_collection
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.embedder_local import embed_queries
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY, load_projection
+
+NAMES = [
+    "warfarine",
+    "paracétamol",
+    "amiodarone",
+    "simvastatine",
+    "ibuprofène",
+    "metformine",
+    "amoxicilline",
+    "oméprazole",
+]
+
+
+def _timings_ms(call: Callable[[], object], rounds: int) -> list[float]:
+    call()  # warm-up: model load, connection, page cache
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--names", nargs="+", default=NAMES)
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    collection = get_search_collection("idx_bdpm_medicament_v1")
+    projection_id = (collection.metadata or {}).get(PROJECTION_KEY)
+    projection = (
+        load_projection(settings.projection_dir, str(projection_id)) if projection_id else None
+    )
+
+    def embed(texts: list[str]) -> Sequence[Sequence[float]]:
+        embeddings = embed_queries(
+            settings.embedding_model,
+            texts,
+            backend=settings.embedding_backend,
+            threads=settings.embedding_threads,
+            service=settings.embedding_service,
+        )
+        return projection.apply(embeddings).tolist() if projection else embeddings
+
+    def search(texts: list[str]) -> None:
+        collection.query(
+            query_embeddings=embed(texts), n_results=5, include=["documents", "metadatas"]
+        )
+
+    print(f"{collection.name} ({settings.vector_backend}), {args.rounds} rounds")
+    for size in args.sizes:
+        names = (args.names * size)[:size]
+        single = _timings_ms(lambda: [search([name]) for name in names], args.rounds)
+        batched = _timings_ms(lambda: search(names), args.rounds)
+        speedup = statistics.median(single) / statistics.median(batched)
+        for label, timings in (("single x N", single), ("batched", batched)):
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(
+                f"  N={size:<3} {label:<11} p50 {statistics.median(timings):8.2f} ms"
+                f"   p95 {p95:8.2f} ms"
+            )
+        print(f"  N={size:<3} speedup     {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
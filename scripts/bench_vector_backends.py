@@ -0,0 +1,85 @@
+"""
+Nephila — query latency of the Chroma HTTP server vs the local embedded index.
+
+Each query embedding is the stored vector of a sample document (no model is
+loaded), sent to the live version of each alias through chromadb.HttpClient and
+through the local index exported by gold (VECTOR_BACKEND=local). Reports p50 /
+p95 latency, the mean overlap of the top-k ids (the local search is exact,
+Chroma's HNSW approximate) and the RAM held by the local float32 matrix.
+
+Usage:
+    uv run python scripts/bench_vector_backends.py [--queries 200] [--top-k 5]
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+import chromadb
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import resolve_collection
+from nephila.pipeline.io.index_local import open_local_collection
+
+ALIASES = ["idx_bdpm_medicament_v1", "idx_ansm_interaction_v1"]
+
+
+def _latencies_ms(query: Callable[[Any], Any], embeddings: list[Any]) -> list[float]:
+    query(embeddings[0])  # warm-up: connection, page cache, lazy loading
+    timings = []
+    for embedding in embeddings:
+        start = time.perf_counter()
+        query(embedding)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    return f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
+
+    for alias in ALIASES:
+        remote = client.get_collection(resolve_collection(client, alias), embedding_function=None)
+        local = open_local_collection(settings.local_index_dir, alias)
+        sample = remote.get(include=["embeddings"], limit=args.queries)
+        embeddings = list(sample["embeddings"])  # type: ignore[arg-type]
+
+        def query_remote(embedding: Any) -> Any:
+            return remote.query(
+                query_embeddings=[embedding],
+                n_results=args.top_k,
+                include=["documents", "metadatas"],
+            )
+
+        def query_local(embedding: Any) -> Any:
+            return local.query(
+                query_embeddings=[embedding],
+                n_results=args.top_k,
+                include=["documents", "metadatas"],
+            )
+
+        overlap = statistics.mean(
+            len(set(query_remote(e)["ids"][0]) & set(query_local(e)["ids"][0])) / args.top_k
+            for e in embeddings
+        )
+        print(f"{alias} ({remote.count()} vectors, {len(embeddings)} queries, top {args.top_k})")
+        print(f"  chroma http  {_summary(_latencies_ms(query_remote, embeddings))}")
+        print(f"  local index  {_summary(_latencies_ms(query_local, embeddings))}")
+        print(f"  top-{args.top_k} overlap     {overlap:.0%}")
+        print(f"  local RAM    {local.resident_bytes / 2**20:7.1f} MiB (float32 matrix)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Nephila — inspect, roll back and garbage-collect the versioned gold collections.
+
+Usage:
+    uv run python scripts/manage_collections.py list
+    uv run python scripts/manage_collections.py rollback idx_ansm_interaction_v1
+    uv run python scripts/manage_collections.py gc [--grace-hours 24] [--keep 1]
+"""
+
+import argparse
+from datetime import timedelta
+
+import chromadb
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import (
+    gc_versions,
+    list_versions,
+    resolve_collection,
+    rollback_alias,
+)
+
+ALIASES = ["idx_bdpm_medicament_v1", "idx_ansm_interaction_v1"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("alias", choices=ALIASES)
+    gc = sub.add_parser("gc")
+    gc.add_argument("--grace-hours", type=float, default=None)
+    gc.add_argument("--keep", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = PipelineSettings()
+    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
+
+    if args.command == "list":
+        for alias in ALIASES:
+            current = resolve_collection(client, alias)
+            print(alias)
+            for name in list_versions(client, alias):
+                marker = "*" if name == current else " "
+                print(f"  {marker} {name} ({client.get_collection(name).count()} documents)")
+    elif args.command == "rollback":
+        print(f"{args.alias} → {rollback_alias(client, args.alias)}")
+    else:
+        grace = (
+            args.grace_hours if args.grace_hours is not None else settings.collection_gc_grace_hours
+        )
+        keep = args.keep if args.keep is not None else settings.collection_keep_versions
+        for alias in ALIASES:
+            deleted = gc_versions(client, alias, grace=timedelta(hours=grace), keep=keep)
+            print(f"{alias}: deleted {len(deleted)} version(s) {deleted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,10 @@ def _sync_dataset(client: Client, cases: list[dict]) -> None:
                     "expect_warn": case.get("expect_warn", False),
                     "expect_in": case.get("expect_in", []),
                     "expect_not": case.get("expect_not", []),
+                    "expect_tools": case.get("expect_tools", []),
+                    "expect_not_tools": case.get("expect_not_tools", []),
+                    "max_calls": case.get("max_calls", {}),
+                    "search_queries": case.get("search_queries", []),
                 },
                 "metadata": {"id": case["id"]},
             }
@@ -132,6 +136,40 @@ def _strip_accents(s: str) -> str:
     return nfkd.encode("ascii", "ignore").decode("ascii").lower()
 
 
+def _tool_calls(messages: list) -> list[dict]:
+    """Every tool call the agent made, in order: {"name": ..., "args": {...}}."""
+    return [call for m in messages for call in (getattr(m, "tool_calls", None) or [])]
+
+
+def _check_tool_calls(messages: list, reference_outputs: dict) -> list[str]:
+    """Errors for missing, unwanted or too frequent tool calls and unbatched search_drug queries."""
+    calls = _tool_calls(messages)
+    names = [call["name"] for call in calls]
+    errors = [
+        f"tool not called: {t}" for t in reference_outputs.get("expect_tools", []) if t not in names
+    ]
+    errors += [
+        f"tool called: {t}" for t in reference_outputs.get("expect_not_tools", []) if t in names
+    ]
+
+    for tool_name, limit in (reference_outputs.get("max_calls") or {}).items():
+        if names.count(tool_name) > limit:
+            errors.append(f"{tool_name} called {names.count(tool_name)} times (max {limit})")
+
+    searched: list[str] = []
+    for call in calls:
+        if call["name"] == "search_drug":
+            queries = call["args"].get("queries")
+            if not isinstance(queries, list):
+                errors.append(f"search_drug called without a queries list: {call['args']}")
+                continue
+            searched.extend(_strip_accents(str(q)) for q in queries)
+    for term in reference_outputs.get("search_queries", []):
+        if not any(_strip_accents(term) in q for q in searched):
+            errors.append(f"not searched: '{term}'")
+    return errors
+
+
 def interaction_evaluator(
     inputs: dict,  # noqa: ARG001
     outputs: dict,
@@ -164,6 +202,8 @@ def interaction_evaluator(
         if found:
             errors.append(f"unexpected: '{term}'")
 
+    errors.extend(_check_tool_calls(messages, reference_outputs))
+
     has_warn = "⚠️" in response
     if reference_outputs.get("expect_warn") and not has_warn:
         errors.append("missing warn notice")
@@ -0,0 +1,348 @@
+"""
+Batch interaction screening of prescription exports, without the LLM.
+
+Each input row is one prescription: an id column and a column of CIS codes,
+separated by any non-digit character ("60234100;61266250"). CIS codes are
+resolved to their BDPM active substances (queries.get_substances_by_cis) and
+screened against the interaction matrix exported by the gold_interaction_matrix
+asset. CSV or Parquet files are read in chunks, screened across a process pool,
+and each chunk is written to its own CSV part in the output directory.
+_manifest.json records the finished chunks, so an interrupted run resumes at
+the first unfinished one when started again with the same arguments.
+
+Usage:
+    uv run python -m nephila.agent.cli_screen prescriptions.csv results/ [--workers 8]
+        [--chunk-size 50000] [--id-column prescription_id] [--cis-column cis] [--fresh]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from nephila.agent.queries import get_substances_by_cis
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.matrix_interactions import (
+    SEVERITY_LEVELS,
+    InteractionMatrix,
+    load_interaction_matrix,
+)
+
+logger = logging.getLogger(__name__)
+
+CIS_PATTERN = re.compile(r"\d+")
+MANIFEST = "_manifest.json"
+OUTPUT_COLUMNS = [
+    "prescription_id",
+    "cis_count",
+    "unknown_cis",
+    "niveau_contrainte",
+    "interaction_count",
+    "interactions",
+]
+
+
+@dataclass(frozen=True)
+class CisIndex:
+    """Matrix substance ids of every CIS code, in CSR layout over the sorted codes."""
+
+    cis: np.ndarray  # sorted CIS codes
+    indptr: np.ndarray  # substances of cis[i]: ids[indptr[i] : indptr[i + 1]]
+    ids: np.ndarray  # only substances that have an interaction
+
+    @classmethod
+    def build(cls, substances: dict[int, list[str]], matrix: InteractionMatrix) -> "CisIndex":
+        cis = sorted(substances)
+        ids = matrix.ids(name for code in cis for name in substances[code])
+        lengths = np.fromiter((len(substances[code]) for code in cis), dtype=np.int64)
+        owner = np.repeat(np.arange(len(cis)), lengths)[ids >= 0]
+        counts = np.bincount(owner, minlength=len(cis))
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        return cls(np.asarray(cis, dtype=np.int64), indptr, ids[ids >= 0])
+
+    def resolve(
+        self, set_index: np.ndarray, codes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(set, substance id) arrays of the given (set, CIS) arrays, and which CIS are known."""
+        if not len(self.cis):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.zeros(len(codes), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.cis, codes), len(self.cis) - 1)
+        found = self.cis[pos] == codes
+        starts = self.indptr[pos[found]]
+        lengths = self.indptr[pos[found] + 1] - starts
+        # Position of each substance in ids: its CIS start plus its rank within the CIS
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        offsets += np.arange(int(lengths.sum()))
+        return np.repeat(set_index[found], lengths), self.ids[offsets], found
+
+
+def screen_chunk(
+    matrix: InteractionMatrix,
+    index: CisIndex,
+    prescription_ids: list[str],
+    cis_values: list[str],
+) -> pd.DataFrame:
+    """One result row per prescription: its strongest constraint level and every interaction."""
+    n = len(prescription_ids)
+    codes_per_row = [CIS_PATTERN.findall(value) for value in cis_values]
+    sizes = np.fromiter(map(len, codes_per_row), dtype=np.int64, count=n)
+    codes = np.fromiter(
+        (int(code) for row in codes_per_row for code in row), dtype=np.int64, count=int(sizes.sum())
+    )
+    code_sets = np.repeat(np.arange(n), sizes)
+    set_index, ids, found = index.resolve(code_sets, codes)
+    screening = matrix.screen_ids(set_index, ids, n)
+
+    unknown: list[list[str]] = [[] for _ in range(n)]
+    for row, code in zip(code_sets[~found].tolist(), codes[~found].tolist()):
+        unknown[row].append(str(code))
+
+    names = matrix.substances.tolist()
+    interactions: list[list[str]] = [[] for _ in range(n)]
+    # Per prescription, strongest interactions first
+    order = np.lexsort((-screening.severity.astype(np.int16), screening.set_index))
+    for row, a, b, code in zip(
+        screening.set_index[order].tolist(),
+        screening.substance_a[order].tolist(),
+        screening.substance_b[order].tolist(),
+        screening.severity[order].tolist(),
+    ):
+        interactions[row].append(f"{names[a]} + {names[b]} ({SEVERITY_LEVELS[code]})")
+
+    return pd.DataFrame(
+        {
+            "prescription_id": prescription_ids,
+            "cis_count": sizes,
+            "unknown_cis": [";".join(codes) for codes in unknown],
+            "niveau_contrainte": screening.levels(),
+            "interaction_count": [len(pairs) for pairs in interactions],
+            "interactions": [" | ".join(pairs) for pairs in interactions],
+        },
+        columns=OUTPUT_COLUMNS,
+    )
+
+
+def read_chunks(
+    path: Path, chunk_size: int, id_column: str, cis_column: str
+) -> Iterator[tuple[list[str], list[str]]]:
+    """(prescription ids, CIS values) of each chunk of a CSV or Parquet file, in file order."""
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=[id_column, cis_column]
+        )
+        for batch in batches:
+            yield (
+                ["" if v is None else str(v) for v in batch.column(id_column).to_pylist()],
+                ["" if v is None else str(v) for v in batch.column(cis_column).to_pylist()],
+            )
+        return
+
+    frames = pd.read_csv(
+        path,
+        usecols=[id_column, cis_column],
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunk_size,
+    )
+    for frame in frames:
+        yield frame[id_column].tolist(), frame[cis_column].tolist()
+
+
+def part_path(output: Path, number: int) -> Path:
+    return output / f"part-{number:05d}.csv"
+
+
+@dataclass(frozen=True)
+class _Worker:
+    matrix: InteractionMatrix
+    index: CisIndex
+    output: Path
+
+
+_worker: _Worker | None = None  # set in each pool process by _init_worker
+
+
+def _init_worker(matrix_path: Path, index: CisIndex, output: Path) -> None:
+    global _worker
+    _worker = _Worker(load_interaction_matrix(matrix_path), index, output)
+
+
+def _run_chunk(number: int, prescription_ids: list[str], cis_values: list[str]) -> tuple[int, int]:
+    """Screen one chunk and write its part atomically; returns (chunk number, rows)."""
+    assert _worker is not None, "_init_worker was not called in this process"
+    frame = screen_chunk(_worker.matrix, _worker.index, prescription_ids, cis_values)
+    path = part_path(_worker.output, number)
+    tmp = path.with_name(f".{path.name}.tmp")
+    frame.to_csv(tmp, index=False)
+    tmp.replace(path)
+    return number, len(frame)
+
+
+def _signature(
+    input_path: Path, matrix_path: Path, chunk_size: int, id_column: str, cis_column: str
+) -> dict[str, Any]:
+    """What the finished parts depend on: a run resumes only when all of it is unchanged."""
+    source, matrix = input_path.stat(), matrix_path.stat()
+    return {
+        "input": str(input_path.resolve()),
+        "input_size": source.st_size,
+        "input_mtime_ns": source.st_mtime_ns,
+        "matrix": str(matrix_path.resolve()),
+        "matrix_size": matrix.st_size,
+        "matrix_mtime_ns": matrix.st_mtime_ns,
+        "chunk_size": chunk_size,
+        "id_column": id_column,
+        "cis_column": cis_column,
+    }
+
+
+def _write_manifest(output: Path, signature: dict[str, Any], chunks: dict[str, int]) -> None:
+    tmp = output / f".{MANIFEST}.tmp"
+    tmp.write_text(json.dumps({"signature": signature, "chunks": chunks}, indent=2))
+    tmp.replace(output / MANIFEST)
+
+
+def _finished_chunks(output: Path, signature: dict[str, Any], fresh: bool) -> dict[str, int]:
+    """Rows of each chunk finished by a previous run into output, {} to start over."""
+    manifest = output / MANIFEST
+    if fresh:
+        for part in output.glob("part-*.csv"):
+            part.unlink()
+        manifest.unlink(missing_ok=True)
+        return {}
+    if not manifest.exists():
+        return {}
+    previous = json.loads(manifest.read_text())
+    if previous["signature"] != signature:
+        raise ValueError(
+            f"{output} holds a run with another input, matrix or chunking: "
+            "use --fresh or another output directory"
+        )
+    chunks: dict[str, int] = previous["chunks"]
+    return {
+        number: rows for number, rows in chunks.items() if part_path(output, int(number)).exists()
+    }
+
+
+@dataclass(frozen=True)
+class ScreeningRun:
+    rows: int  # screened by this run
+    chunks: int
+    resumed_rows: int  # already screened by a previous run
+    resumed_chunks: int
+    elapsed_s: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def screen_file(
+    input_path: Path,
+    output: Path,
+    matrix_path: Path,
+    substances: dict[int, list[str]],
+    workers: int = 1,
+    chunk_size: int = 50_000,
+    id_column: str = "prescription_id",
+    cis_column: str = "cis",
+    fresh: bool = False,
+) -> ScreeningRun:
+    """Screen every prescription of input_path into part files under output, resuming if possible.
+
+    workers <= 1 screens in this process; otherwise at most 2 × workers chunks are
+    read ahead of the pool, so memory stays bounded whatever the file size.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    signature = _signature(input_path, matrix_path, chunk_size, id_column, cis_column)
+    done = _finished_chunks(output, signature, fresh)
+    _write_manifest(output, signature, done)
+    resumed_rows, resumed_chunks = sum(done.values()), len(done)
+    index = CisIndex.build(substances, load_interaction_matrix(matrix_path))
+
+    start = time.perf_counter()
+    rows = chunks = 0
+
+    def record(number: int, chunk_rows: int) -> None:
+        nonlocal rows, chunks
+        done[str(number)] = chunk_rows
+        _write_manifest(output, signature, done)
+        rows, chunks = rows + chunk_rows, chunks + 1
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "chunk %d: %s rows screened, %s rows/s", number, f"{rows:,}", f"{rows / elapsed:,.0f}"
+        )
+
+    read = read_chunks(input_path, chunk_size, id_column, cis_column)
+    todo = ((n, chunk) for n, chunk in enumerate(read) if str(n) not in done)
+    if workers <= 1:
+        _init_worker(matrix_path, index, output)
+        for number, (prescription_ids, cis_values) in todo:
+            record(*_run_chunk(number, prescription_ids, cis_values))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(matrix_path, index, output)
+        ) as pool:
+            pending: set[Future[tuple[int, int]]] = set()
+            for number, (prescription_ids, cis_values) in todo:
+                pending.add(pool.submit(_run_chunk, number, prescription_ids, cis_values))
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(*future.result())
+            for future in wait(pending).done:
+                record(*future.result())
+
+    return ScreeningRun(rows, chunks, resumed_rows, resumed_chunks, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", type=Path, help="CSV or .parquet file, one prescription per row")
+    parser.add_argument("output", type=Path, help="directory of result parts and the manifest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--id-column", default="prescription_id")
+    parser.add_argument("--cis-column", default="cis")
+    parser.add_argument("--matrix", type=Path, default=PipelineSettings().interaction_matrix_path)
+    parser.add_argument("--fresh", action="store_true", help="discard a previous run in output")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    substances = get_substances_by_cis()
+    if not substances:
+        raise SystemExit("No BDPM composition rows: run the pipeline before screening")
+    run = screen_file(
+        args.input,
+        args.output,
+        args.matrix,
+        substances,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        id_column=args.id_column,
+        cis_column=args.cis_column,
+        fresh=args.fresh,
+    )
+    if run.resumed_chunks:
+        print(f"Resumed: {run.resumed_rows:,} rows in {run.resumed_chunks} chunks already done")
+    print(
+        f"Screened {run.rows:,} rows in {run.chunks} chunks, {run.elapsed_s:.1f}s "
+        f"({run.rows_per_s:,.0f} rows/s) → {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,12 @@ from nephila.agent.nodes.node_response import response_node
 from nephila.agent.nodes.node_warn import warn_node
 from nephila.agent.tools.tool_check_interactions import check_interactions
 from nephila.agent.tools.tool_find_generics import find_generics
+from nephila.agent.tools.tool_get_drug_card import get_drug_card
 from nephila.agent.tools.tool_get_rcp import get_rcp
 from nephila.agent.tools.tool_search_drug import search_drug
 from nephila.pipeline.config_pipeline import PipelineSettings
 
-TOOLS = [search_drug, find_generics, check_interactions, get_rcp]
+TOOLS = [search_drug, get_drug_card, find_generics, check_interactions, get_rcp]
 RECURSION_LIMIT = 25
 
 SYSTEM_PROMPT = """\
@@ -36,6 +37,13 @@ RÈGLES OBLIGATOIRES :
 4. Rapporter chaque interaction trouvée avec son niveau de contrainte ANSM.
 5. Si check_interactions ne trouve pas d'interaction, le signaler tel quel \
 — ne jamais compléter avec des connaissances pharmacologiques hors outil.
+6. Appeler search_drug une seule fois avec tous les médicaments de la question, \
+une requête par médicament : queries=["doliprane", "advil"]. Enchaîner ensuite \
+find_generics ou get_rcp sur les codes CIS trouvés.
+7. Question d'ensemble sur un seul médicament (présentation, statut, prix, \
+remboursement, conditions de délivrance) : appeler get_drug_card sur son code CIS \
+plutôt qu'enchaîner find_generics et get_rcp. Réserver find_generics à la seule \
+liste des génériques et get_rcp aux questions portant sur le RCP.
 
 FORMAT DE RÉPONSE — STRICT :
 - Direct et concis. 3 à 5 phrases maximum.
@@ -3,12 +3,15 @@
 import logging
 import threading
 import unicodedata
+from typing import cast
 
+from pydantic import ValidationError
 from sqlalchemy import Engine, create_engine, text
 
 from nephila.models.model_ansm import InteractionRow
-from nephila.models.model_queries import GeneriqueResult, RcpRow
+from nephila.models.model_queries import DrugCard, GeneriqueResult, RcpRow
 from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.matrix_interactions import normalize_name
 
 logger = logging.getLogger(__name__)
 
@@ -56,16 +59,67 @@ def resolve_ansm_classes(substance: str) -> list[str]:
     return [substance]
 
 
-def find_interactions(substance_a: str, substance_b: str) -> list[InteractionRow]:
+def closure_key(name: str) -> str:
+    """A substance name as stored in gold_ansm__interaction_closure (dbt normalize_name)."""
+    return normalize_name(name)
+
+
+def lookup_interaction(substance_a: str, substance_b: str) -> InteractionRow | None:
+    """Strongest precomputed interaction between two BDPM active substances.
+
+    One unique-index read of gold_ansm__interaction_closure, where classes are
+    already expanded. Returns None when the pair has no row — either no interaction
+    or a name that is not a BDPM substance — or when the table cannot be read.
+    """
+    key_a, key_b = sorted((closure_key(substance_a), closure_key(substance_b)))
+    if key_a == key_b:
+        return None
+    engine = _get_engine()
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text("""
+                    SELECT interaction_a, interaction_b, niveau_contrainte,
+                           nature_risque, conduite_a_tenir
+                    FROM gold.gold_ansm__interaction_closure
+                    WHERE substance_a = :a AND substance_b = :b
+                """),
+                {"a": key_a, "b": key_b},
+            ).fetchone()
+    except Exception:
+        logger.warning(
+            "Failed to read the interaction closure for '%s' + '%s'",
+            substance_a,
+            substance_b,
+            exc_info=True,
+        )
+        return None
+    if row is None:
+        return None
+    return InteractionRow(
+        substance_a=row[0],
+        substance_b=row[1],
+        niveau_contrainte=row[2],
+        nature_risque=row[3],
+        conduite_a_tenir=row[4],
+    )
+
+
+def find_interactions(
+    substance_a: str,
+    substance_b: str,
+    classes_a: list[str] | None = None,
+    classes_b: list[str] | None = None,
+) -> list[InteractionRow]:
     """Find ANSM interactions between two substances using ILIKE search.
 
-    Resolves substance names internally and searches all combinations
-    of original + normalized forms to handle accent mismatches.
+    Resolves substance names internally (unless their classes are passed in) and
+    searches all combinations of original + normalized forms to handle accent mismatches.
     """
     engine = _get_engine()
 
-    names_a = resolve_ansm_classes(substance_a)
-    names_b = resolve_ansm_classes(substance_b)
+    names_a = classes_a if classes_a is not None else resolve_ansm_classes(substance_a)
+    names_b = classes_b if classes_b is not None else resolve_ansm_classes(substance_b)
 
     all_names_a = list({substance_a, *names_a})
     all_names_b = list({substance_b, *names_b})
@@ -166,3 +220,40 @@ def get_rcp_info(cis: int) -> list[RcpRow]:
         )
         for row in rows
     ]
+
+
+def get_drug_card(cis: int) -> DrugCard | None:
+    """Fetch the denormalized drug card of a CIS code — one indexed read of the gold table."""
+    engine = _get_engine()
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT card FROM gold.gold_bdpm__drug_card WHERE cis = :cis"),
+            {"cis": cis},
+        ).fetchone()
+
+    if row is None:
+        return None
+    try:
+        return DrugCard.model_validate(row[0])
+    except ValidationError:
+        logger.warning("Invalid drug card for CIS %s", cis, exc_info=True)
+        return None
+
+
+def get_substances_by_cis() -> dict[int, list[str]]:
+    """Active substances (SA) of every CIS code, for batch screening — one scan of the table."""
+    engine = _get_engine()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT cis, denomination_substance
+                FROM silver.silver_bdpm__composition
+                WHERE nature_composant = 'SA' AND denomination_substance IS NOT NULL
+                ORDER BY cis, denomination_substance
+            """)
+        ).fetchall()
+
+    substances: dict[int, list[str]] = {}
+    for cis, substance in rows:
+        substances.setdefault(cast(int, cis), []).append(cast(str, substance))
+    return substances
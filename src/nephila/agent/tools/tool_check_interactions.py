@@ -1,14 +1,52 @@
-"""ANSM Thésaurus interaction lookup — dual SQL ILIKE + ChromaDB vector search."""
-
+"""
+ANSM Thésaurus interaction lookup — dual SQL ILIKE + ChromaDB vector search.
+
+The closure lookup, class resolution and both stages start together on a
+shared pool. A pair of BDPM active substances has a row in the precomputed
+closure (gold_ansm__interaction_closure, classes already expanded): one indexed
+read returns the strongest interaction. It comes first and the SQL rows are
+merged after it, since the closure only matches whole-token Thésaurus entries
+and ILIKE may find more. SQL hits are exact Thésaurus pairs: when there are any,
+or a closure row, the vector stage is cancelled (or its result dropped if
+already running). Both stages wait for the resolved classes, so resolution
+counts against their budgets. Each stage has a budget counted from the tool call
+(INTERACTION_SQL_TIMEOUT_S, INTERACTION_VECTOR_TIMEOUT_S; the closure lookup
+shares the SQL one); a stage that times out or fails is left out and the answer
+says so, the other stage's results are still returned. With no hit and a stage
+left out, the answer is an incomplete check, not an absence of interaction.
+"""
+
+import logging
 import re
+import time
 import unicodedata
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
 
-import chromadb
 from langchain_core.tools import tool
 
-from nephila.agent.queries import find_interactions
+from nephila.agent.queries import find_interactions, lookup_interaction, resolve_ansm_classes
+from nephila.agent.vectors import embed_search_query, get_search_collection
+from nephila.models.model_ansm import InteractionRow
 from nephila.pipeline.config_pipeline import PipelineSettings
-from nephila.pipeline.io.embedder_local import get_embedding_function
+from nephila.pipeline.io.index_local import LocalCollection
+
+logger = logging.getLogger(__name__)
+
+MIN_TOKEN_LENGTH = 3  # same as the substance_tokens dbt macro
+VECTOR_TOP_K = 10  # over the prefiltered candidates on the local index
+
+# Shared by all calls: a timed-out stage keeps its thread until the query returns
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="check-interactions")
+
+Hit = tuple[frozenset[str], str]  # substance pair, formatted interaction
+Classes = tuple[list[str], list[str]]  # ANSM classes of substance_a, substance_b
+_STAGE_LABELS = {
+    "closure": "recherche précalculée",
+    "sql": "recherche SQL",
+    "vector": "recherche vectorielle",
+}
 
 
 def _normalize(name: str) -> str:
@@ -17,16 +55,117 @@ def _normalize(name: str) -> str:
     return nfkd.encode("ascii", "ignore").decode("ascii").lower()
 
 
-def _substance_matches_query(substance: str, query_a: str, query_b: str) -> bool:
-    """Return True if substance shares at least one word token with query_a or query_b."""
+def _substance_matches_query(substance: str, *queries: str) -> bool:
+    """Return True if substance shares at least one word token with any query name."""
     s_tokens = set(re.split(r"[\s\-\+]+", _normalize(substance)))
-    for q in (query_a, query_b):
+    for q in queries:
         q_tokens = set(re.split(r"[\s\-\+]+", _normalize(q)))
         if s_tokens & q_tokens:
             return True
     return False
 
 
+def _substance_tokens(names: Iterable[str]) -> list[str]:
+    """
+    Search tokens of substance or class names, as stored in the interaction
+    metadata by the gold substance_tokens macro.
+    """
+    tokens = {
+        token
+        for name in names
+        for token in re.split(r"[^a-z0-9]+", _normalize(name))
+        if len(token) >= MIN_TOKEN_LENGTH
+    }
+    return sorted(tokens)
+
+
+def _token_filter(tokens: list[str]) -> dict[str, Any] | None:
+    """where clause keeping interactions whose metadata tokens contain any of tokens."""
+    clauses = [{"tokens": {"$contains": token}} for token in tokens]
+    if len(clauses) > 1:
+        return {"$or": clauses}
+    return clauses[0] if clauses else None
+
+
+def _format_row(row: InteractionRow) -> Hit:
+    parts = [
+        f"Interaction: {row.substance_a} + {row.substance_b}",
+        f"Niveau de contrainte: {row.niveau_contrainte}",
+    ]
+    if row.nature_risque:
+        parts.append(f"Nature du risque: {row.nature_risque}")
+    if row.conduite_a_tenir:
+        parts.append(f"Conduite à tenir: {row.conduite_a_tenir}")
+    return (
+        frozenset([row.substance_a, row.substance_b]),
+        f"[{row.niveau_contrainte}] {row.substance_a} + {row.substance_b}\n{'. '.join(parts)}",
+    )
+
+
+def _closure_stage(substance_a: str, substance_b: str) -> list[Hit]:
+    """The strongest precomputed interaction, when both are BDPM active substances."""
+    row = lookup_interaction(substance_a, substance_b)
+    return [_format_row(row)] if row is not None else []
+
+
+def _resolve_classes(substance_a: str, substance_b: str) -> Classes:
+    return resolve_ansm_classes(substance_a), resolve_ansm_classes(substance_b)
+
+
+def _sql_stage(substance_a: str, substance_b: str, classes: "Future[Classes]") -> list[Hit]:
+    """Exact Thésaurus pairs, by ILIKE on substances and their ANSM classes."""
+    classes_a, classes_b = classes.result()
+    return [
+        _format_row(row)
+        for row in find_interactions(substance_a, substance_b, classes_a, classes_b)
+    ]
+
+
+def _vector_stage(substance_a: str, substance_b: str, classes: "Future[Classes]") -> list[Hit]:
+    """
+    Semantic fallback when class names are unknown. On the local index the search
+    is restricted to interactions sharing a token with either substance or its
+    classes. The query is embedded while the classes are resolved.
+    """
+    collection = get_search_collection("idx_ansm_interaction_v1")
+    embedding = embed_search_query(f"{substance_a} {substance_b}", collection)
+    classes_a, classes_b = classes.result()
+    names = [substance_a, substance_b, *classes_a, *classes_b]
+    # The local index reads the candidates from postings. ChromaDB scans metadata
+    # for $contains (12-20 ms a query), so there the lexical check below filters alone.
+    local = isinstance(collection, LocalCollection)
+    results = collection.query(
+        query_embeddings=[embedding],
+        n_results=VECTOR_TOP_K,
+        where=_token_filter(_substance_tokens(names)) if local else None,
+        include=["documents", "metadatas"],
+    )
+    hits: list[Hit] = []
+    docs = (results["documents"] or [[]])[0]
+    metas = (results["metadatas"] or [[]])[0]
+    for doc, meta in zip(docs, metas):
+        sa, sb = str(meta["substance_a"]), str(meta["substance_b"])
+        if _substance_matches_query(sa, *names) and _substance_matches_query(sb, *names):
+            hits.append((frozenset([sa, sb]), f"[{meta['niveau_contrainte']}] {sa} + {sb}\n{doc}"))
+    return hits
+
+
+def _await_stage(
+    future: "Future[list[Hit]]", deadline: float, stage: str, notes: list[str]
+) -> list[Hit] | None:
+    """The stage's hits, or None with a note when it timed out or failed."""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except TimeoutError:
+        future.cancel()
+        logger.warning(f"check_interactions: {stage} stage timed out")
+        notes.append(f"Note : {_STAGE_LABELS[stage]} interrompue (délai dépassé).")
+    except Exception:
+        logger.exception(f"check_interactions: {stage} stage failed")
+        notes.append(f"Note : {_STAGE_LABELS[stage]} indisponible (erreur).")
+    return None
+
+
 @tool
 def check_interactions(substance_a: str, substance_b: str) -> str:
     """
@@ -40,65 +179,54 @@ def check_interactions(substance_a: str, substance_b: str) -> str:
     Constraint levels: Contre-indication > Association déconseillée
     > Précaution d'emploi > A prendre en compte
     """
-    # Step 1: SQL ILIKE via queries module (resolves ANSM classes internally)
-    interaction_rows = find_interactions(substance_a, substance_b)
+    settings = PipelineSettings()
+    start = time.monotonic()
+    sql_deadline = start + settings.interaction_sql_timeout_s
+    closure = _executor.submit(_closure_stage, substance_a, substance_b)
+    # Submitted before the stages, so it never waits behind the stages that wait for it
+    classes = _executor.submit(_resolve_classes, substance_a, substance_b)
+    sql = _executor.submit(_sql_stage, substance_a, substance_b, classes)
+    vector = _executor.submit(_vector_stage, substance_a, substance_b, classes)
+
+    notes: list[str] = []
+    # The SQL stage covers the closure's pairs: a missed lookup leaves the check complete
+    hits = _await_stage(closure, sql_deadline, "closure", notes) or []
+    sql_hits = _await_stage(sql, sql_deadline, "sql", notes)
+    complete = sql_hits is not None
+    hits += sql_hits or []
+    if hits:
+        vector.cancel()
+        notes.append("Note : recherche vectorielle non utilisée (interactions exactes trouvées).")
+    else:
+        deadline = start + settings.interaction_vector_timeout_s
+        vector_hits = _await_stage(vector, deadline, "vector", notes)
+        complete = complete and vector_hits is not None
+        hits = vector_hits or []
 
     seen: set[frozenset[str]] = set()
-    sql_lines: list[str] = []
-
-    for row in interaction_rows:
-        pair = frozenset([row.substance_a, row.substance_b])
+    results: list[str] = []
+    for pair, text in hits:
         if pair not in seen:
             seen.add(pair)
-            parts = [
-                f"Interaction: {row.substance_a} + {row.substance_b}",
-                f"Niveau de contrainte: {row.niveau_contrainte}",
+            results.append(text)
+    if results:
+        return "\n\n".join(results + notes)
+
+    if not complete:
+        return "\n\n".join(
+            [
+                f"Vérification incomplète entre '{substance_a}' et '{substance_b}' : aucune "
+                "interaction trouvée, mais une recherche n'a pas abouti. "
+                "Répondre uniquement : vérification des interactions incomplète, "
+                "ne pas conclure à l'absence d'interaction.",
+                *notes,
             ]
-            if row.nature_risque:
-                parts.append(f"Nature du risque: {row.nature_risque}")
-            if row.conduite_a_tenir:
-                parts.append(f"Conduite à tenir: {row.conduite_a_tenir}")
-            sql_lines.append(
-                f"[{row.niveau_contrainte}] {row.substance_a} + {row.substance_b}\n"
-                f"{'. '.join(parts)}"
-            )
-
-    # Step 2: vector search — semantic fallback when class names are unknown
-    settings = PipelineSettings()
-    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
-    ef = get_embedding_function(settings.embedding_model)
-    collection = client.get_collection(
-        "idx_ansm_interaction_v1",
-        embedding_function=ef,  # type: ignore[arg-type]
-    )
-
-    vector_results = collection.query(
-        query_texts=[f"{substance_a} {substance_b}"],
-        n_results=3,
-        include=["documents", "metadatas"],
-    )
-
-    vector_lines: list[str] = []
-    docs = (vector_results["documents"] or [[]])[0]
-    metas = (vector_results["metadatas"] or [[]])[0]
-    for doc, meta in zip(docs, metas):
-        sa, sb = str(meta["substance_a"]), str(meta["substance_b"])
-        if not (
-            _substance_matches_query(sa, substance_a, substance_b)
-            and _substance_matches_query(sb, substance_a, substance_b)
-        ):
-            continue
-        pair = frozenset([sa, sb])
-        if pair not in seen:
-            seen.add(pair)
-            vector_lines.append(f"[{meta['niveau_contrainte']}] {sa} + {sb}\n{doc}")
-
-    all_results = sql_lines + vector_lines
-    if all_results:
-        return "\n\n".join(all_results)
-
-    return (
-        f"Aucune interaction trouvée dans le thésaurus ANSM entre '{substance_a}' "
-        f"et '{substance_b}'. "
-        "Répondre uniquement : données ANSM insuffisantes pour conclure."
+        )
+    return "\n\n".join(
+        [
+            f"Aucune interaction trouvée dans le thésaurus ANSM entre '{substance_a}' "
+            f"et '{substance_b}'. "
+            "Répondre uniquement : données ANSM insuffisantes pour conclure.",
+            *notes,
+        ]
     )
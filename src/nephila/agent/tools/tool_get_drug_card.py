@@ -0,0 +1,77 @@
+"""Drug card by CIS code — one keyed read of the gold_bdpm__drug_card table."""
+
+from langchain_core.tools import tool
+
+from nephila.agent.queries import get_drug_card as fetch_drug_card
+from nephila.agent.tools.tool_find_generics import TYPE_LABELS
+from nephila.models.model_queries import DrugCard
+
+MAX_GROUP_MEMBERS = 15  # per generic group, the card itself keeps them all
+
+
+def format_card(card: DrugCard) -> str:
+    """Compact text of a drug card, one section per line group."""
+    details = ", ".join(filter(None, [card.forme_pharma, card.voies_admin]))
+    lines = [f"CIS {card.cis}: {card.denomination}" + (f" — {details}" if details else "")]
+    status = ", ".join(filter(None, [card.statut_amm, card.etat_commercialisation]))
+    if status:
+        lines.append(f"Statut: {status}")
+    if card.titulaire:
+        lines.append(f"Titulaire: {card.titulaire}")
+    if card.surveillance_renforcee:
+        lines.append("Surveillance renforcée")
+    if card.substances:
+        substances = "; ".join(
+            " ".join(filter(None, [s.denomination, s.dosage]))
+            + (f" ({s.reference_dosage})" if s.reference_dosage else "")
+            for s in card.substances
+        )
+        lines.append(f"Substances actives: {substances}")
+    if card.conditions_delivrance:
+        lines.append(f"Conditions de délivrance: {'; '.join(card.conditions_delivrance)}")
+
+    if card.presentations:
+        lines.append("Présentations:")
+        for p in card.presentations:
+            parts = [p.libelle or "", f"{p.prix} €" if p.prix else ""]
+            if p.taux_remboursement:
+                parts.append(f"remboursé {p.taux_remboursement}")
+            parts.append(p.etat_commercialisation or "")
+            lines.append(f"  CIP13 {p.cip13 or 'N/A'}: {' — '.join(filter(None, parts))}")
+
+    for group in card.groupes_generiques:
+        role = TYPE_LABELS.get(group.type_generique, group.type_generique)
+        lines.append(f"Groupe générique {group.id_groupe} ({group.libelle or 'N/A'}): {role}")
+        others = [m for m in group.membres if m.cis != card.cis]
+        for m in others[:MAX_GROUP_MEMBERS]:
+            label = TYPE_LABELS.get(m.type_generique, m.type_generique)
+            lines.append(
+                f"  CIS {m.cis} ({label}): {m.denomination} — {m.etat_commercialisation or 'N/A'}"
+            )
+        if len(others) > MAX_GROUP_MEMBERS:
+            lines.append(f"  … {len(others) - MAX_GROUP_MEMBERS} more")
+
+    if card.infos_importantes:
+        lines.append("RCP / Important information:")
+        for info in card.infos_importantes:
+            date = f"(from {info.date_debut}) " if info.date_debut else ""
+            lines.append(f"  {date}{info.texte or '(see BDPM for RCP link)'}")
+    return "\n".join(lines)
+
+
+@tool
+def get_drug_card(cis: str) -> str:
+    """
+    Get everything known about one drug by CIS code in a single call: denomination,
+    form, status, active substances, presentations with prices and reimbursement,
+    delivery conditions, generic group members and RCP important information.
+    Prefer it to find_generics + get_rcp when the question is about one drug.
+    """
+    cis = cis.strip()
+    if not cis.isdigit():
+        return f"Invalid CIS code '{cis}'. Use search_drug to find the CIS code first."
+
+    card = fetch_drug_card(int(cis))
+    if card is None:
+        return f"No drug card found for CIS {cis}. Use search_drug to find the CIS code first."
+    return format_card(card)
@@ -1,36 +1,45 @@
-"""Semantic drug search in ChromaDB idx_bdpm_medicament_v1."""
+"""Semantic drug search in ChromaDB idx_bdpm_medicament_v1 (resolved through its alias)."""
 
-import chromadb
 from langchain_core.tools import tool
 
-from nephila.pipeline.config_pipeline import PipelineSettings
-from nephila.pipeline.io.embedder_local import get_embedding_function
+from nephila.agent.vectors import embed_search_queries, get_search_collection
+
+MAX_QUERIES = 10  # per call: one embedding batch and one collection query
 
 
 @tool
-def search_drug(query: str) -> str:
+def search_drug(queries: list[str]) -> str:
     """
     Search for drug information by name, active substance, or description.
-    Returns up to 5 relevant drugs with their CIS code, denomination, and key metadata.
+    Pass every drug of the question in one call, one query per drug,
+    e.g. ["warfarine", "paracétamol"].
+    Returns up to 5 relevant drugs per query with their CIS code, denomination,
+    and key metadata, grouped by query. At most 10 queries are searched per call.
     """
-    settings = PipelineSettings()
-    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
-    ef = get_embedding_function(settings.embedding_model)
+    unique = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+    unique, skipped = unique[:MAX_QUERIES], unique[MAX_QUERIES:]
+    if not unique:
+        return "No query given: pass at least one drug name."
 
-    collection = client.get_collection("idx_bdpm_medicament_v1", embedding_function=ef)  # type: ignore[arg-type]
+    collection = get_search_collection("idx_bdpm_medicament_v1")
     results = collection.query(
-        query_texts=[query],
+        query_embeddings=embed_search_queries(unique, collection),
         n_results=5,
         include=["documents", "metadatas"],
     )
 
-    docs = (results["documents"] or [[]])[0]
-    metas = (results["metadatas"] or [[]])[0]
-
-    if not docs:
-        return f"No drugs found for query: {query!r}"
-
-    lines = []
-    for doc, meta in zip(docs, metas):
-        lines.append(f"CIS {meta['cis']}: {doc}")
-    return "\n\n".join(lines)
+    documents = results["documents"] or [[] for _ in unique]
+    metadatas = results["metadatas"] or [[] for _ in unique]
+    groups = []
+    for query, docs, metas in zip(unique, documents, metadatas):
+        if not docs:
+            text = f"No drugs found for query: {query!r}"
+        else:
+            text = "\n\n".join(f"CIS {meta['cis']}: {doc}" for doc, meta in zip(docs, metas))
+        groups.append(text if len(unique) == 1 else f"## {query}\n\n{text}")
+    if skipped:
+        groups.append(
+            f"Note: only the first {MAX_QUERIES} queries were searched. Not searched: "
+            f"{', '.join(repr(q) for q in skipped)}. Search them in another call."
+        )
+    return "\n\n".join(groups)
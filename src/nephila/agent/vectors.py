@@ -0,0 +1,56 @@
+"""Vector search for agent tools — ChromaDB server or local embedded index (VECTOR_BACKEND)."""
+
+from collections.abc import Sequence
+
+import chromadb
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import get_aliased_collection
+from nephila.pipeline.io.cache_embeddings import get_embedding_cache
+from nephila.pipeline.io.embedder_local import embed_queries, get_embedding_function
+from nephila.pipeline.io.index_local import SearchCollection, open_local_collection
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY, load_projection
+
+
+def get_search_collection(alias: str) -> SearchCollection:
+    """The live version of alias, from the backend selected by VECTOR_BACKEND."""
+    settings = PipelineSettings()
+    if settings.vector_backend == "local":
+        return open_local_collection(settings.local_index_dir, alias)
+    client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
+    ef = get_embedding_function(
+        settings.embedding_model,
+        settings.embedding_backend,
+        settings.embedding_threads,
+        settings.embedding_service,
+    )
+    return get_aliased_collection(client, alias, ef)
+
+
+def embed_search_query(text: str, collection: SearchCollection) -> Sequence[float]:
+    """
+    Embed a tool query through the on-disk embedding cache, projected like the
+    collection's documents when it was built with a projection; pass as query_embeddings.
+    """
+    return embed_search_queries([text], collection)[0]
+
+
+def embed_search_queries(texts: list[str], collection: SearchCollection) -> list[Sequence[float]]:
+    """embed_search_query for several queries, encoded as one batch."""
+    settings = PipelineSettings()
+    cache = get_embedding_cache(
+        settings.embedding_cache_path, settings.embedding_cache_max_mb << 20
+    )
+    embeddings = embed_queries(
+        settings.embedding_model,
+        texts,
+        cache,
+        backend=settings.embedding_backend,
+        threads=settings.embedding_threads,
+        service=settings.embedding_service,
+    )
+    projection_id = (collection.metadata or {}).get(PROJECTION_KEY)
+    if not projection_id or not embeddings:
+        return embeddings
+    projection = load_projection(settings.projection_dir, str(projection_id))
+    return [[float(x) for x in row] for row in projection.apply(embeddings)]
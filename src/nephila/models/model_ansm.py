@@ -1,4 +1,4 @@
-"""Pydantic model for ANSM Thésaurus drug interaction records."""
+"""Pydantic models for ANSM Thésaurus drug interaction records and release deltas."""
 
 from pydantic import BaseModel, ConfigDict
 
@@ -21,3 +21,20 @@ class InteractionRow(BaseModel):
     niveau_contrainte: str
     nature_risque: str | None = None
     conduite_a_tenir: str | None = None
+
+
+class InteractionChange(BaseModel):
+    before: InteractionRow
+    after: InteractionRow
+
+
+class InteractionDelta(BaseModel):
+    """Interaction changes between two Thésaurus releases, keyed by (substance_a, substance_b)."""
+
+    added: list[InteractionRow] = []
+    removed: list[InteractionRow] = []
+    changed: list[InteractionChange] = []
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
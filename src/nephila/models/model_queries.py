@@ -20,3 +20,67 @@ class RcpRow(BaseModel):
     texte_info_importante: str | None = None
     date_debut: date | None = None
     date_fin: date | None = None
+
+
+class CardSubstance(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    denomination: str | None = None
+    dosage: str | None = None
+    reference_dosage: str | None = None
+
+
+class CardPresentation(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    cip13: str | None = None
+    libelle: str | None = None
+    etat_commercialisation: str | None = None
+    taux_remboursement: str | None = None
+    prix: str | None = None
+
+
+class CardGenericMember(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    cis: int
+    denomination: str
+    type_generique: str
+    etat_commercialisation: str | None = None
+
+
+class CardGenericGroup(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    id_groupe: str
+    libelle: str | None = None
+    type_generique: str
+    membres: list[CardGenericMember] = []
+
+
+class CardImportantInfo(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    texte: str | None = None
+    date_debut: date | None = None
+    date_fin: date | None = None
+
+
+class DrugCard(BaseModel):
+    """One row of gold_bdpm__drug_card — the JSONB card, sections default to empty."""
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    cis: int
+    denomination: str
+    forme_pharma: str | None = None
+    voies_admin: str | None = None
+    statut_amm: str | None = None
+    etat_commercialisation: str | None = None
+    titulaire: str | None = None
+    surveillance_renforcee: bool = False
+    substances: list[CardSubstance] = []
+    presentations: list[CardPresentation] = []
+    groupes_generiques: list[CardGenericGroup] = []
+    conditions_delivrance: list[str] = []
+    infos_importantes: list[CardImportantInfo] = []
@@ -1,38 +1,56 @@
 """
 Bronze layer — Raw ingestion of official data sources.
 No transformation: files are stored as-is.
+
+Each source keeps a download manifest (ETag, Last-Modified, size, SHA-256) so
+unchanged upstream files are neither re-downloaded nor rewritten. Each asset
+publishes its file SHA-256 as data version, so downstream work can be skipped.
 """
 
 from pathlib import Path
 
-from dagster import AssetExecutionContext, asset
+from dagster import MaterializeResult, asset
 
 from nephila.pipeline.config_pipeline import PipelineSettings
 from nephila.pipeline.io.downloader_bdpm import download_bdpm, download_file, find_ansm_pdf_url
 from nephila.pipeline.io.downloader_open_medic import download_open_medic_cip13
+from nephila.pipeline.io.manifest_bronze import load_manifest, manifest_path, save_manifest
+from nephila.pipeline.versioning_pipeline import content_version
 
 
 @asset(group_name="bronze")
-def bdpm_raw(context: AssetExecutionContext) -> None:
+def bdpm_raw() -> MaterializeResult:  # type: ignore[type-arg]
     """
     Download BDPM files from base-donnees-publique.medicaments.gouv.fr.
     Source encoding: ISO-8859-1, separator: tab.
     Output: data/bronze/bdpm/
     """
     settings = PipelineSettings()
-    files = download_bdpm(settings.bdpm_base_url, settings.bronze_dir)
+    manifest_file = manifest_path(settings.bronze_dir, "bdpm")
+    manifest = load_manifest(manifest_file)
+    results = download_bdpm(
+        settings.bdpm_base_url,
+        settings.bronze_dir,
+        max_concurrency=settings.download_max_concurrency,
+        manifest=manifest,
+    )
+    save_manifest(manifest, manifest_file)
 
-    context.add_output_metadata(
-        {
-            "files": [f.name for f in files],
-            "count": len(files),
+    return MaterializeResult(
+        data_version=content_version(*(r.entry.sha256 for r in results)),
+        metadata={
+            "files": [r.path.name for r in results],
+            "count": len(results),
+            "unchanged": all(r.unchanged for r in results),
+            "changed_files": [r.path.name for r in results if not r.unchanged],
             "dest_dir": str(settings.bronze_dir / "bdpm"),
-        }
+            "kb_per_sec": {r.path.name: round(r.bytes_per_sec / 1024, 1) for r in results},
+        },
     )
 
 
 @asset(group_name="bronze")
-def ansm_thesaurus_raw(context: AssetExecutionContext) -> None:
+def ansm_thesaurus_raw() -> MaterializeResult:  # type: ignore[type-arg]
     """
     Download the ANSM drug interaction Thésaurus PDF.
     The PDF URL is scraped from the official ANSM page (changes with each release).
@@ -41,36 +59,56 @@ def ansm_thesaurus_raw(context: AssetExecutionContext) -> None:
     settings = PipelineSettings()
     dest: Path = settings.bronze_dir / "ansm" / "thesaurus.pdf"
 
+    manifest_file = manifest_path(settings.bronze_dir, "ansm")
+    manifest = load_manifest(manifest_file)
+
     pdf_url = find_ansm_pdf_url(settings.ansm_thesaurus_page_url)
-    path = download_file(pdf_url, dest)
+    result = download_file(pdf_url, dest, previous=manifest.files.get(dest.name))
+    manifest.files[dest.name] = result.entry
+    save_manifest(manifest, manifest_file)
 
-    context.add_output_metadata(
-        {
+    return MaterializeResult(
+        data_version=content_version(result.entry.sha256),
+        metadata={
             "source_url": pdf_url,
-            "dest": str(path),
-            "size_kb": round(path.stat().st_size / 1024, 1),
-        }
+            "unchanged": result.unchanged,
+            "sha256": result.entry.sha256,
+            "dest": str(result.path),
+            "size_kb": round(result.size_bytes / 1024, 1),
+            "kb_per_sec": round(result.bytes_per_sec / 1024, 1),
+        },
     )
 
 
 @asset(group_name="bronze")
-def open_medic_raw(context: AssetExecutionContext) -> None:
+def open_medic_raw() -> MaterializeResult:  # type: ignore[type-arg]
     """
     Download the Open Medic CIP13 annual CSV from ameli.fr (CNAM).
     Data: drug reimbursements aggregated by CIP13 code with ATC classification.
     Output: data/bronze/open_medic/open_medic_cip13_{year}.csv
     """
     settings = PipelineSettings()
-    path = download_open_medic_cip13(
+    manifest_file = manifest_path(settings.bronze_dir, "open_medic")
+    manifest = load_manifest(manifest_file)
+    filename = f"NB_{settings.open_medic_year}_cip13.CSV.gz"
+
+    result = download_open_medic_cip13(
         settings.open_medic_base_url,
         settings.open_medic_year,
         settings.bronze_dir,
+        previous=manifest.files.get(filename),
     )
+    manifest.files[result.path.name] = result.entry
+    save_manifest(manifest, manifest_file)
 
-    context.add_output_metadata(
-        {
+    return MaterializeResult(
+        data_version=content_version(result.entry.sha256),
+        metadata={
             "year": settings.open_medic_year,
-            "dest": str(path),
-            "size_kb": round(path.stat().st_size / 1024, 1),
-        }
+            "unchanged": result.unchanged,
+            "sha256": result.entry.sha256,
+            "dest": str(result.path),
+            "size_kb": round(result.size_bytes / 1024, 1),
+            "kb_per_sec": round(result.bytes_per_sec / 1024, 1),
+        },
     )
@@ -1,95 +1,245 @@
 """
-Gold layer — Vector embeddings stored in ChromaDB.
+Gold layer — retrieval documents built by dbt, vector embeddings stored in ChromaDB.
+The gold dbt models assemble document text, metadata and content hash in Postgres;
+gold_embeddings only streams the finished rows into the index.
 Index naming: idx_<source>_<content>_<model_version>
 Metadata filtering by CIS (drug specialty) and CIP13 (presentation/box).
+Each refresh builds a new versioned collection (only new or changed documents are
+embedded), validates it, then flips the collection alias the agent tools resolve.
+Embeddings go through the on-disk cache, so unchanged texts are never re-encoded.
+With VECTOR_BACKEND=local, each published version is also exported to the
+in-process index the agent tools then query (pipeline/io/index_local.py).
+With EMBEDDING_REDUCTION set, embeddings are projected to fewer dimensions before
+they are stored (pipeline/io/projector_embeddings.py).
+gold_interaction_matrix exports the interaction closure as the sparse matrix of
+offline prescription screening (pipeline/io/matrix_interactions.py).
+Skipped (previous data version re-published) when their upstream tables and their
+code version are unchanged; the code versions below include the settings each
+output depends on, so changing one of them rebuilds on the next run.
 """
 
+import itertools
+from collections.abc import Iterator
+from datetime import timedelta
+from typing import Any
+
 import chromadb
 from chromadb.api import ClientAPI
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-from dagster import AssetExecutionContext, AssetKey, asset
+from chromadb.errors import NotFoundError
+from dagster import AssetExecutionContext, AssetKey, MaterializeResult, asset, get_dagster_logger
+from dagster_dbt import DbtCliResource, dbt_assets
 from sqlalchemy import create_engine
 
+from nephila.pipeline.assets.asset_silver import DBT_MANIFEST
 from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.alias_chroma import resolve_collection
 from nephila.pipeline.io.builder_documents import (
+    DocumentBatch,
     build_interaction_documents,
     build_medicament_documents,
 )
-from nephila.pipeline.io.embedder_local import get_embedding_function
+from nephila.pipeline.io.cache_embeddings import cached_encoder, get_embedding_cache
+from nephila.pipeline.io.embedder_local import (
+    embedding_model_id,
+    get_embedding_function,
+    open_encoder,
+)
+from nephila.pipeline.io.index_local import export_collection
+from nephila.pipeline.io.indexer_chroma import MODEL_KEY, HnswSettings, publish_collection
+from nephila.pipeline.io.matrix_interactions import export_interaction_matrix
+from nephila.pipeline.io.producer_embeddings import Encoder
+from nephila.pipeline.io.projector_embeddings import (
+    PROJECTION_KEY,
+    Projection,
+    load_projection,
+    make_projection,
+    save_projection,
+)
+from nephila.pipeline.versioning_pipeline import (
+    settings_code_version,
+    settings_values,
+    unchanged_results,
+    upstream_unchanged,
+)
 
-BATCH_SIZE = 100
+# Settings that change what gold_embeddings / gold_interaction_matrix produce
+EMBEDDING_SETTINGS = (
+    "embedding_model",
+    "embedding_backend",
+    "embedding_reduction",
+    "embedding_reduced_dim",
+    "collection_hnsw",
+    "vector_backend",
+    "local_index_dir",
+)
+MATRIX_SETTINGS = ("interaction_matrix_path",)
+
+
+@dbt_assets(manifest=DBT_MANIFEST, select="gold")
+def gold_dbt_assets(context: AssetExecutionContext, dbt: DbtCliResource) -> None:  # type: ignore[misc]
+    """Run and test the dbt gold document models (one table per ChromaDB collection)."""
+    if upstream_unchanged(context):
+        yield from unchanged_results(context)
+        return
+    yield from dbt.cli(["build"], context=context).stream()
 
 
 @asset(
     group_name="gold",
     deps=[
-        AssetKey(["silver", "silver_bdpm__medicament"]),
-        AssetKey(["silver", "silver_bdpm__composition"]),
-        AssetKey(["silver", "silver_ansm__interaction"]),
+        AssetKey(["gold", "gold_bdpm__medicament_document"]),
+        AssetKey(["gold", "gold_ansm__interaction_document"]),
     ],
+    code_version=settings_code_version("1", settings_values(EMBEDDING_SETTINGS)),
 )
-def gold_embeddings(context: AssetExecutionContext) -> None:
+def gold_embeddings(context: AssetExecutionContext) -> MaterializeResult:  # type: ignore[type-arg]
     """
-    Build and upsert ChromaDB collections from Silver tables.
-    Collections: idx_bdpm_medicament_v1, idx_ansm_interaction_v1
+    Publish new versions of the ChromaDB collections built from the gold document models.
+    Aliases: idx_bdpm_medicament_v1, idx_ansm_interaction_v1
     """
+    if upstream_unchanged(context):
+        return unchanged_results(context)[0]
+
     settings = PipelineSettings()
     engine = create_engine(settings.postgres_dsn)
 
-    ef = get_embedding_function(settings.embedding_model)
+    backend, threads = settings.embedding_backend, settings.embedding_threads
+    ef = get_embedding_function(settings.embedding_model, backend, threads)
+    model_id = embedding_model_id(settings.embedding_model, backend)
 
     client = chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
 
-    med_count = _upsert_collection(
-        client=client,
-        ef=ef,
-        name="idx_bdpm_medicament_v1",
-        builder=lambda: build_medicament_documents(engine),
-        context=context,
+    grace = timedelta(hours=settings.collection_gc_grace_hours)
+    cache = get_embedding_cache(
+        settings.embedding_cache_path, settings.embedding_cache_max_mb << 20
     )
+    cache_before = cache.stats()
+
+    metadata: dict[str, Any] = {}
+    batch_size = settings.document_batch_size
+    # Generators: each query only runs once its collection is being built
+    builders: list[tuple[str, Iterator[DocumentBatch]]] = [
+        ("idx_bdpm_medicament_v1", build_medicament_documents(engine, batch_size)),
+        ("idx_ansm_interaction_v1", build_interaction_documents(engine, batch_size)),
+    ]
+    with open_encoder(
+        settings.embedding_model,
+        batch_size=settings.embedding_batch_size,
+        workers=settings.embedding_workers,
+        backend=backend,
+        threads=threads,
+    ) as model_encoder:
+        encoder = cached_encoder(model_encoder, cache, model_id)
+        for alias, batches in builders:
+            projection, batches = _projection(settings, client, alias, model_id, batches, encoder)
+            hnsw = HnswSettings.from_mapping(settings.collection_hnsw.get(alias, {}))
+            stats = publish_collection(
+                client,
+                alias,
+                ef,
+                model_id,
+                batches,
+                grace=grace,
+                keep=settings.collection_keep_versions,
+                encoder=encoder,
+                embed_batch_size=settings.embedding_batch_size,
+                queue_size=settings.embedding_queue_size,
+                projection=projection,
+                hnsw=hnsw,
+            )
+            if settings.vector_backend == "local":
+                export_collection(
+                    client.get_collection(stats.version, embedding_function=ef),  # type: ignore[arg-type]
+                    settings.local_index_dir,
+                    alias,
+                    keep=settings.collection_keep_versions,
+                )
+            metadata[f"{alias}_version"] = stats.version
+            metadata[f"{alias}_projection"] = projection.id if projection else "none"
+            metadata[f"{alias}_hnsw"] = str(hnsw)
+            metadata[f"{alias}_embedded"] = stats.embedded
+            metadata[f"{alias}_skipped"] = stats.skipped
+            metadata[f"{alias}_deleted"] = stats.deleted
+            metadata[f"{alias}_embed_docs_per_sec"] = round(stats.embed_docs_per_sec, 1)
+            metadata[f"{alias}_upload_docs_per_sec"] = round(stats.upload_docs_per_sec, 1)
+
+    cache_after = cache.stats()
+    hits = cache_after.hits - cache_before.hits
+    lookups = hits + cache_after.misses - cache_before.misses
+    metadata["embedding_cache_hits"] = hits
+    metadata["embedding_cache_hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+    metadata["embedding_cache_mb"] = round(cache_after.size_bytes / (1 << 20), 1)
+    return MaterializeResult(metadata=metadata)
 
-    int_count = _upsert_collection(
-        client=client,
-        ef=ef,
-        name="idx_ansm_interaction_v1",
-        builder=lambda: build_interaction_documents(engine),
-        context=context,
-    )
 
-    context.add_output_metadata(
-        {
-            "idx_bdpm_medicament_v1": med_count,
-            "idx_ansm_interaction_v1": int_count,
+@asset(
+    group_name="gold",
+    deps=[AssetKey(["gold", "gold_ansm__interaction_closure"])],
+    code_version=settings_code_version("1", settings_values(MATRIX_SETTINGS)),
+)
+def gold_interaction_matrix(context: AssetExecutionContext) -> MaterializeResult:  # type: ignore[type-arg]
+    """Export gold_ansm__interaction_closure as a sparse substance × substance severity matrix."""
+    settings = PipelineSettings()
+    path = settings.interaction_matrix_path
+    if path.exists() and upstream_unchanged(context):
+        return unchanged_results(context)[0]
+
+    matrix = export_interaction_matrix(create_engine(settings.postgres_dsn), path)
+    return MaterializeResult(
+        metadata={
+            "path": str(path),
+            "substances": len(matrix),
+            "pairs": matrix.pair_count,
+            "size_kb": round(path.stat().st_size / 1024, 1),
         }
     )
 
 
-def _upsert_collection(
+def _projection(
+    settings: PipelineSettings,
     client: ClientAPI,
-    ef: SentenceTransformerEmbeddingFunction,
-    name: str,
-    builder: object,
-    context: AssetExecutionContext,
-) -> int:
-    """Recreate a ChromaDB collection from scratch and populate it in batches.
-
-    delete_collection + create_collection ensures stale entries are removed.
+    alias: str,
+    model_id: str,
+    batches: Iterator[DocumentBatch],
+    encoder: Encoder,
+) -> tuple[Projection | None, Iterator[DocumentBatch]]:
     """
-    try:
-        client.delete_collection(name=name)
-    except Exception:
-        pass  # Collection may not exist yet on first run
-    collection = client.create_collection(name=name, embedding_function=ef)  # type: ignore[arg-type]
-
-    ids, documents, metadatas = builder()  # type: ignore[operator]
-    total = len(ids)
-
-    for i in range(0, total, BATCH_SIZE):
-        collection.upsert(
-            ids=ids[i : i + BATCH_SIZE],
-            documents=documents[i : i + BATCH_SIZE],
-            metadatas=metadatas[i : i + BATCH_SIZE],
+    The projection of the next version of alias. The live version's PCA is kept
+    while the model and dimension are unchanged, so its embeddings stay reusable;
+    otherwise a PCA is fitted on the first document batch, put back in the stream.
+    """
+    method, dim = settings.embedding_reduction, settings.embedding_reduced_dim
+    if method != "pca":
+        return make_projection(method, dim), batches
+
+    live_id = _live_projection_id(client, alias, model_id)
+    if live_id is not None and live_id.startswith(f"pca{dim}-"):
+        try:
+            return load_projection(settings.projection_dir, live_id), batches
+        except FileNotFoundError:
+            pass  # refitted below: the collection is re-embedded once
+
+    first = next(batches, None)
+    if first is None:
+        return None, batches
+    if len(first[0]) < dim:
+        get_dagster_logger().warning(
+            f"[gold] {alias} — {len(first[0])} documents, too few to fit a PCA to {dim} "
+            "dimensions: storing full embeddings"
         )
-        context.log.info(f"[gold] {name} — upserted {min(i + BATCH_SIZE, total)}/{total}")
+        return None, itertools.chain([first], batches)
+    projection = make_projection(method, dim, encoder(first[1]))
+    assert projection is not None
+    save_projection(projection, settings.projection_dir)
+    return projection, itertools.chain([first], batches)
 
-    return total
+
+def _live_projection_id(client: ClientAPI, alias: str, model_id: str) -> str | None:
+    try:
+        live = client.get_collection(resolve_collection(client, alias))
+    except (NotFoundError, ValueError):
+        return None
+    metadata = live.metadata or {}
+    if metadata.get(MODEL_KEY) != model_id or not metadata.get(PROJECTION_KEY):
+        return None
+    return str(metadata[PROJECTION_KEY])
@@ -1,21 +1,55 @@
-"""Silver layer — Load Bronze files into PostgreSQL raw schema, then run dbt transformations."""
+"""
+Silver layer — Load Bronze files into PostgreSQL raw schema, then run dbt transformations.
 
-from pathlib import Path
+Raw tables publish the SHA-256 of their Bronze file as data version. Every asset
+here re-publishes its previous version without reloading or rebuilding when its
+upstream data versions are unchanged since its last materialization.
+"""
 
-from dagster import AssetExecutionContext, AssetKey, AssetSpec, asset, multi_asset
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from dagster import (
+    AssetExecutionContext,
+    AssetKey,
+    AssetSpec,
+    MaterializeResult,
+    asset,
+    multi_asset,
+)
 from dagster_dbt import DbtCliResource, dbt_assets
 from sqlalchemy import create_engine
 
 from nephila.pipeline.config_pipeline import PipelineSettings
+from nephila.pipeline.io.extractor_pdf import hash_file
 from nephila.pipeline.io.loader_bdpm import (
+    BDPM_FILE_COLUMNS,
     load_bdpm_files_to_raw,
     load_interactions_to_raw,
     load_substance_classes_to_raw,
 )
 from nephila.pipeline.io.loader_open_medic import load_open_medic_to_raw
-from nephila.pipeline.io.parser_ansm import parse_thesaurus_classes, parse_thesaurus_pdf
+from nephila.pipeline.io.manifest_bronze import load_manifest, manifest_path
+from nephila.pipeline.io.parser_ansm import parse_thesaurus_classes
+from nephila.pipeline.io.reparser_ansm import (
+    load_snapshot,
+    reparse_thesaurus_pdf,
+    save_snapshot,
+    write_delta,
+)
+from nephila.pipeline.versioning_pipeline import (
+    content_version,
+    settings_code_version,
+    settings_values,
+    unchanged_results,
+    upstream_unchanged,
+)
 
 DBT_MANIFEST = Path("dbt/target/manifest.json")
+ANSM_SNAPSHOT_FILE = "thesaurus_snapshot.json.gz"
+# Settings that change what the Thésaurus parsing assets produce
+PDF_SETTINGS = ("pdf_text_backend",)
 
 _BDPM_RAW_SPECS = [
     AssetSpec(AssetKey(["raw", "cis_bdpm"]), group_name="silver", deps=["bdpm_raw"]),
@@ -27,45 +61,109 @@ _BDPM_RAW_SPECS = [
 ]
 
 
+def _bronze_sha256(settings: PipelineSettings, source: str, path: Path) -> str:
+    """SHA-256 of a Bronze file — from the download manifest, hashed when not recorded."""
+    entry = load_manifest(manifest_path(settings.bronze_dir, source)).files.get(path.name)
+    if entry is not None and path.exists() and path.stat().st_size == entry.size_bytes:
+        return entry.sha256
+    return hash_file(path)
+
+
 @multi_asset(specs=_BDPM_RAW_SPECS)
-def bdpm_to_raw(context: AssetExecutionContext) -> None:
+def bdpm_to_raw(context: AssetExecutionContext) -> Iterator[MaterializeResult[Any]]:
     """Load all BDPM .txt files from Bronze into the PostgreSQL raw schema."""
+    if upstream_unchanged(context):
+        yield from unchanged_results(context)
+        return
+
     settings = PipelineSettings()
     engine = create_engine(settings.postgres_dsn)
     results = load_bdpm_files_to_raw(settings.bronze_dir, engine)
     context.log.info(f"Loaded {len(results)} tables, {sum(results.values())} total rows")
 
+    for filename in BDPM_FILE_COLUMNS:
+        table_name = filename.replace(".txt", "").lower()
+        sha = _bronze_sha256(settings, "bdpm", settings.bronze_dir / "bdpm" / filename)
+        yield MaterializeResult(
+            asset_key=AssetKey(["raw", table_name]),
+            data_version=content_version(sha),
+            metadata={"rows_loaded": results[table_name]},
+        )
+
 
 @asset(
     key=AssetKey(["raw", "ansm_interaction"]),
     group_name="silver",
     deps=["ansm_thesaurus_raw"],
+    code_version=settings_code_version("1", settings_values(PDF_SETTINGS)),
 )
-def ansm_to_raw(context: AssetExecutionContext) -> None:
-    """Parse the ANSM Thésaurus PDF and load interaction records into raw.ansm_interaction."""
+def ansm_to_raw(context: AssetExecutionContext) -> MaterializeResult:  # type: ignore[type-arg]
+    """
+    Parse the ANSM Thésaurus PDF and load interaction records into raw.ansm_interaction.
+    Only pages changed since the previous release are re-parsed; the interaction
+    delta is written to the changelog directory.
+    """
+    if upstream_unchanged(context):
+        return unchanged_results(context)[0]
+
     settings = PipelineSettings()
     pdf_path = settings.bronze_dir / "ansm" / "thesaurus.pdf"
-    records = parse_thesaurus_pdf(pdf_path)
+    snapshot_path = settings.pdf_text_cache_dir / ANSM_SNAPSHOT_FILE
+    result = reparse_thesaurus_pdf(
+        pdf_path,
+        load_snapshot(snapshot_path),
+        settings.pdf_text_cache_dir,
+        settings.pdf_text_backend,
+    )
 
     engine = create_engine(settings.postgres_dsn)
-    count = load_interactions_to_raw(records, engine)
-    context.add_output_metadata({"interactions_loaded": count})
+    count = load_interactions_to_raw(result.records, engine)
+    # Saved only once loaded — a failed load re-diffs against the same previous release
+    save_snapshot(result.snapshot, snapshot_path)
+
+    metadata: dict[str, Any] = {
+        "interactions_loaded": count,
+        "pages_reparsed": result.pages_reparsed,
+        "pages_total": result.pages_total,
+        "interactions_added": len(result.delta.added),
+        "interactions_removed": len(result.delta.removed),
+        "interactions_changed": len(result.delta.changed),
+    }
+    if not result.delta.is_empty:
+        changelog = write_delta(
+            result.delta, settings.ansm_changelog_dir, result.snapshot.pdf_sha256
+        )
+        metadata["changelog"] = str(changelog)
+    return MaterializeResult(
+        data_version=content_version(result.snapshot.pdf_sha256, settings.pdf_text_backend),
+        metadata=metadata,
+    )
 
 
 @asset(
     key=AssetKey(["raw", "ansm_substance_class"]),
     group_name="silver",
     deps=["ansm_thesaurus_raw"],
+    code_version=settings_code_version("1", settings_values(PDF_SETTINGS)),
 )
-def ansm_classes_to_raw(context: AssetExecutionContext) -> None:
+def ansm_classes_to_raw(context: AssetExecutionContext) -> MaterializeResult:  # type: ignore[type-arg]
     """Parse the ANSM Thésaurus PDF and load substance-class mappings."""
+    if upstream_unchanged(context):
+        return unchanged_results(context)[0]
+
     settings = PipelineSettings()
     pdf_path = settings.bronze_dir / "ansm" / "thesaurus.pdf"
-    records = parse_thesaurus_classes(pdf_path)
+    records = parse_thesaurus_classes(
+        pdf_path, settings.pdf_text_cache_dir, settings.pdf_text_backend
+    )
 
     engine = create_engine(settings.postgres_dsn)
     count = load_substance_classes_to_raw(records, engine)
-    context.add_output_metadata({"mappings_loaded": count})
+    sha = _bronze_sha256(settings, "ansm", pdf_path)
+    return MaterializeResult(
+        data_version=content_version(sha, settings.pdf_text_backend),
+        metadata={"mappings_loaded": count},
+    )
 
 
 @asset(
@@ -73,16 +171,25 @@ def ansm_classes_to_raw(context: AssetExecutionContext) -> None:
     group_name="silver",
     deps=["open_medic_raw"],
 )
-def open_medic_to_raw(context: AssetExecutionContext) -> None:
+def open_medic_to_raw(context: AssetExecutionContext) -> MaterializeResult:  # type: ignore[type-arg]
     """Load the Open Medic CIP13 CSV from Bronze into raw.open_medic."""
+    if upstream_unchanged(context):
+        return unchanged_results(context)[0]
+
     settings = PipelineSettings()
     csv_path = settings.bronze_dir / "open_medic" / f"NB_{settings.open_medic_year}_cip13.CSV.gz"
     engine = create_engine(settings.postgres_dsn)
     count = load_open_medic_to_raw(csv_path, engine)
-    context.add_output_metadata({"rows_loaded": count, "year": settings.open_medic_year})
+    return MaterializeResult(
+        data_version=content_version(_bronze_sha256(settings, "open_medic", csv_path)),
+        metadata={"rows_loaded": count, "year": settings.open_medic_year},
+    )
 
 
 @dbt_assets(manifest=DBT_MANIFEST, select="silver")
 def silver_dbt_assets(context: AssetExecutionContext, dbt: DbtCliResource) -> None:  # type: ignore[misc]
     """Run and test dbt silver models. Each model becomes a Dagster asset; each dbt test becomes an asset check."""  # noqa: E501
+    if upstream_unchanged(context):
+        yield from unchanged_results(context)
+        return
     yield from dbt.cli(["build"], context=context).stream()
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Any
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -25,9 +26,43 @@ class PipelineSettings(BaseSettings):
 
     # Embeddings (local HuggingFace model via sentence-transformers)
     embedding_model: str = "intfloat/multilingual-e5-base"  # ${EMBEDDING_MODEL}
+    embedding_backend: str = "torch"  # ${EMBEDDING_BACKEND} — "torch" | "onnx" | "onnx-int8"
+    embedding_threads: int = 0  # CPU threads per forward pass, 0 = runtime default
+    embedding_service: str = ""  # ${EMBEDDING_SERVICE} — "unix:<path>" | "<host>:<port>"
+    embedding_service_window_ms: float = 2.0  # micro-batching window of the service
+    embedding_service_max_batch: int = 64  # texts per forward pass in the service
+    embedding_batch_size: int = 256  # transformer batch size for gold embedding
+    embedding_workers: int = 1  # > 1: sentence-transformers process pool
+    embedding_queue_size: int = 4  # embedded batches buffered ahead of the upload
+    embedding_cache_path: Path = Path("data/cache/embeddings.sqlite")  # float16 vectors
+    embedding_cache_max_mb: int = 1024  # least recently used vectors evicted beyond this
+    embedding_reduction: str = "none"  # ${EMBEDDING_REDUCTION} — "none" | "pca" | "truncate"
+    embedding_reduced_dim: int = 256  # stored dimension when a reduction is set
+    projection_dir: Path = Path("data/gold/projections")  # fitted PCA projections
 
     # Local paths
     bronze_dir: Path = Path("data/bronze")
+    pdf_text_cache_dir: Path = Path("data/cache/ansm")  # extracted Thésaurus page text
+    pdf_text_backend: str = "pdfplumber"  # ${PDF_TEXT_BACKEND} — "pdfplumber" | "pdfium"
+    ansm_changelog_dir: Path = Path("data/changelog/ansm")  # interaction deltas per release
+
+    # Bronze downloads
+    download_max_concurrency: int = 4  # parallel BDPM file downloads
+
+    # Gold collections (blue/green versions behind an alias)
+    vector_backend: str = "chroma"  # ${VECTOR_BACKEND} — "chroma" | "local" (in-process index)
+    local_index_dir: Path = Path("data/gold/index")  # exported versions when backend is local
+    document_batch_size: int = 2000  # rows per server-side cursor fetch, streamed to ChromaDB
+    collection_gc_grace_hours: float = 24  # superseded versions kept at least this long
+    collection_keep_versions: int = 1  # older versions always kept for rollback
+    # ${COLLECTION_HNSW} — JSON per alias, keys space / ef_construction / max_neighbors /
+    # ef_search, e.g. {"idx_bdpm_medicament_v1": {"space": "cosine", "max_neighbors": 32}}
+    collection_hnsw: dict[str, dict[str, Any]] = {}
+
+    # Agent tools
+    interaction_sql_timeout_s: float = 2.0  # check_interactions SQL stage budget
+    interaction_vector_timeout_s: float = 1.5  # vector stage budget, both from the tool call
+    interaction_matrix_path: Path = Path("data/gold/interaction_matrix.npz")  # offline screening
 
     # Official data source URLs
     bdpm_base_url: str = "https://base-donnees-publique.medicaments.gouv.fr"
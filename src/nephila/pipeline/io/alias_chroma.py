@@ -0,0 +1,122 @@
+"""
+Collection aliases for blue/green publishing of the gold indexes.
+
+Gold builds each refresh into a new physical collection named
+{alias}__{UTC timestamp} and, once validated, flips the alias to it. Aliases
+live in the metadata of a small registry collection (nephila_aliases), so a
+flip or a rollback is a single metadata write and the agent tools, which
+resolve the alias on every call, never see a half-built index.
+
+A logical name without an alias record resolves to itself: collections
+created before versioning keep working and are treated as the oldest version.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from chromadb.api import ClientAPI
+from chromadb.api.models.Collection import Collection
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from dagster import get_dagster_logger
+
+ALIAS_COLLECTION = "nephila_aliases"
+VERSION_SEPARATOR = "__"
+VERSION_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+def version_name(alias: str, created_at: datetime | None = None) -> str:
+    """Physical collection name for a new version of alias."""
+    created_at = created_at or datetime.now(UTC)
+    return f"{alias}{VERSION_SEPARATOR}{created_at:{VERSION_FORMAT}}"
+
+
+def version_created_at(alias: str, name: str) -> datetime:
+    """Creation time encoded in a version name — the unversioned legacy name sorts first."""
+    if name == alias:
+        return datetime.min.replace(tzinfo=UTC)
+    stamp = name.removeprefix(alias + VERSION_SEPARATOR)
+    return datetime.strptime(stamp, VERSION_FORMAT).replace(tzinfo=UTC)
+
+
+def resolve_collection(client: ClientAPI, alias: str) -> str:
+    """Physical collection name the alias points to (the alias itself when unset)."""
+    target = (_registry(client).metadata or {}).get(alias)
+    return str(target) if target else alias
+
+
+def get_aliased_collection(
+    client: ClientAPI, alias: str, ef: SentenceTransformerEmbeddingFunction
+) -> Collection:
+    return client.get_collection(
+        resolve_collection(client, alias),
+        embedding_function=ef,  # type: ignore[arg-type]
+    )
+
+
+def set_alias(client: ClientAPI, alias: str, target: str) -> None:
+    """Point alias at target — a single metadata write on the registry collection."""
+    registry = _registry(client)
+    metadata = dict(registry.metadata or {})
+    previous = metadata.get(alias)
+    metadata[alias] = target
+    registry.modify(metadata=metadata)
+    get_dagster_logger().info(f"[gold] alias {alias}: {previous or alias} → {target}")
+
+
+def list_versions(client: ClientAPI, alias: str) -> list[str]:
+    """Physical collections of alias, oldest first."""
+    prefix = alias + VERSION_SEPARATOR
+    names = [c.name for c in client.list_collections()]
+    versions = [n for n in names if n == alias or n.startswith(prefix)]
+    return sorted(versions, key=lambda n: version_created_at(alias, n))
+
+
+def rollback_alias(client: ClientAPI, alias: str) -> str:
+    """Point alias back at the newest version older than the current one."""
+    current = resolve_collection(client, alias)
+    versions = list_versions(client, alias)
+    older = versions[: versions.index(current)] if current in versions else []
+    if not older:
+        raise ValueError(f"No older version of {alias!r} to roll back to (current: {current})")
+    set_alias(client, alias, older[-1])
+    return older[-1]
+
+
+def gc_versions(
+    client: ClientAPI,
+    alias: str,
+    grace: timedelta,
+    keep: int = 1,
+    now: datetime | None = None,
+) -> list[str]:
+    """
+    Delete versions of alias that are not current, not among the `keep` newest
+    older versions (rollback targets), and were superseded more than `grace` ago.
+    Returns the deleted names.
+    """
+    log = get_dagster_logger()
+    now = now or datetime.now(UTC)
+    current = resolve_collection(client, alias)
+    versions = list_versions(client, alias)
+    if current not in versions:
+        return []
+
+    older = versions[: versions.index(current)]
+    candidates = older[: max(0, len(older) - keep)]
+    deleted: list[str] = []
+    for name in candidates:
+        # A version was superseded when the next one was created
+        successor = versions[versions.index(name) + 1]
+        if now - version_created_at(alias, successor) >= grace:
+            client.delete_collection(name)
+            deleted.append(name)
+    if deleted:
+        log.info(f"[gold] alias {alias}: garbage-collected {deleted}")
+    return deleted
+
+
+def _registry(client: ClientAPI) -> Collection:
+    return client.get_or_create_collection(
+        ALIAS_COLLECTION,
+        embedding_function=None,
+        metadata={"description": "nephila collection aliases"},
+    )
@@ -1,108 +1,68 @@
 """
-Build ChromaDB documents (text + metadata) from Silver PostgreSQL tables.
-One document per CIS for medicaments, one per interaction row for ANSM.
+Stream ChromaDB documents (text + metadata) from the gold dbt models.
+One document per CIS for medicaments, one per interaction pair for ANSM.
+Text, metadata and content hash are assembled set-based in Postgres
+(dbt/models/gold); the content_hash lets the gold refresh re-embed only what
+changed. Rows come from a server-side cursor and are yielded in fixed-size
+batches, so gold memory stays flat whatever the table size.
 """
 
-import hashlib
+import json
+from collections.abc import Iterator
 from typing import Any
 
-import pandas as pd
-from sqlalchemy import Engine
+from sqlalchemy import Engine, Row, text
+
+# (ids, documents, metadatas) — one batch of a streamed collection
+DocumentBatch = tuple[list[str], list[str], list[dict[str, Any]]]
+
+BATCH_SIZE = 2000
+HASH_KEY = "content_hash"
 
 
 def build_medicament_documents(
-    engine: Engine,
-) -> tuple[list[str], list[str], list[dict[str, Any]]]:
+    engine: Engine, batch_size: int = BATCH_SIZE
+) -> Iterator[DocumentBatch]:
     """
-    Join silver_bdpm__medicament + silver_bdpm__composition into one document per CIS.
-    Returns (ids, documents, metadatas).
+    Stream gold.gold_bdpm__medicament_document, one document per CIS.
+    Yields batches of (ids, documents, metadatas).
     """
-    df = pd.read_sql(
-        """
-        SELECT
-            m.cis::TEXT                      AS cis,
-            m.denomination,
-            m.forme_pharma,
-            m.voies_admin,
-            m.etat_commercialisation,
-            m.titulaire,
-            STRING_AGG(
-                c.denomination_substance ||
-                CASE WHEN c.dosage IS NOT NULL THEN ' ' || c.dosage ELSE '' END,
-                '; ' ORDER BY c.denomination_substance
-            ) AS substances
-        FROM silver.silver_bdpm__medicament m
-        LEFT JOIN silver.silver_bdpm__composition c
-            ON m.cis = c.cis AND c.nature_composant = 'SA'
-        GROUP BY m.cis, m.denomination, m.forme_pharma, m.voies_admin,
-                 m.etat_commercialisation, m.titulaire
-        """,
-        engine,
-    )
-
-    ids: list[str] = []
-    documents: list[str] = []
-    metadatas: list[dict[str, Any]] = []
-
-    for row in df.itertuples():
-        ids.append(str(row.cis))
-        documents.append(_format_medicament(row))
-        metadatas.append(
-            {
-                "cis": int(str(row.cis)),
-                "etat_commercialisation": row.etat_commercialisation or "",
-            }
-        )
-
-    return ids, documents, metadatas
+    return _build_documents(engine, "gold_bdpm__medicament_document", batch_size)
 
 
 def build_interaction_documents(
-    engine: Engine,
-) -> tuple[list[str], list[str], list[dict[str, Any]]]:
+    engine: Engine, batch_size: int = BATCH_SIZE
+) -> Iterator[DocumentBatch]:
     """
-    Build one document per ANSM interaction row.
-    Returns (ids, documents, metadatas).
+    Stream gold.gold_ansm__interaction_document, one document per interaction pair.
+    Yields batches of (ids, documents, metadatas).
     """
-    df = pd.read_sql("SELECT * FROM silver.silver_ansm__interaction", engine)
+    return _build_documents(engine, "gold_ansm__interaction_document", batch_size)
 
-    ids: list[str] = []
-    documents: list[str] = []
-    metadatas: list[dict[str, Any]] = []
 
-    for row in df.itertuples():
-        key = f"{row.substance_a}|{row.substance_b}"
-        ids.append(hashlib.md5(key.encode()).hexdigest())
-        documents.append(_format_interaction(row))
-        metadatas.append(
-            {
-                "substance_a": row.substance_a,
-                "substance_b": row.substance_b,
-                "niveau_contrainte": row.niveau_contrainte,
-            }
+def _build_documents(engine: Engine, model: str, batch_size: int) -> Iterator[DocumentBatch]:
+    sql = f"SELECT doc_id, doc_text, doc_metadata, content_hash FROM gold.{model} ORDER BY doc_id"
+    for rows in _stream_rows(engine, sql, batch_size):
+        yield (
+            [row.doc_id for row in rows],
+            [row.doc_text for row in rows],
+            [{**_as_dict(row.doc_metadata), HASH_KEY: row.content_hash} for row in rows],
         )
 
-    return ids, documents, metadatas
-
 
-def _format_medicament(row) -> str:  # type: ignore[no-untyped-def]
-    parts = [f"{row.denomination} ({row.forme_pharma}, {row.voies_admin})"]
-    if row.substances:
-        parts.append(f"Substances actives: {row.substances}")
-    if row.etat_commercialisation:
-        parts.append(f"Statut: {row.etat_commercialisation}")
-    if row.titulaire:
-        parts.append(f"Titulaire: {row.titulaire}")
-    return ". ".join(parts)
+def _stream_rows(engine: Engine, sql: str, batch_size: int) -> Iterator[list[Row[Any]]]:
+    """
+    Run sql on a server-side cursor and yield its rows batch_size at a time, so
+    only one batch is held in memory and consumers start before the query ends.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+            text(sql)
+        )
+        for rows in result.partitions(batch_size):
+            yield list(rows)
 
 
-def _format_interaction(row) -> str:  # type: ignore[no-untyped-def]
-    parts = [
-        f"Interaction: {row.substance_a} + {row.substance_b}",
-        f"Niveau de contrainte: {row.niveau_contrainte}",
-    ]
-    if row.nature_risque:
-        parts.append(f"Nature du risque: {row.nature_risque}")
-    if row.conduite_a_tenir:
-        parts.append(f"Conduite à tenir: {row.conduite_a_tenir}")
-    return ". ".join(parts)
+def _as_dict(metadata: Any) -> dict[str, Any]:
+    # psycopg2 decodes JSONB to a dict; other drivers hand back the JSON text
+    return dict(metadata) if isinstance(metadata, dict) else dict(json.loads(metadata))
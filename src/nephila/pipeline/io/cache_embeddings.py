@@ -0,0 +1,216 @@
+"""
+Persistent, content-addressed embedding cache shared by gold runs and the agent.
+
+Vectors are stored in a local SQLite file keyed by (model name, sha256 of the
+text) as float16 blobs — half the size of float32, well within the precision
+cosine retrieval needs. Most gold document texts are identical from one run to
+the next, so a rebuilt collection (a new embedding model version aside) costs
+cache reads instead of transformer passes; agent queries repeat just as often.
+
+The file is bounded: once it grows past max_bytes the least recently used
+vectors are evicted. The total vector size is kept in a one-row counter table,
+maintained by triggers in the same transaction as every write, so checking the
+bound costs one row read rather than a scan. Hits and misses are counted per
+cache instance.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from nephila.pipeline.io.producer_embeddings import Encoder
+
+MAX_BYTES = 1 << 30
+EVICT_TO = 0.9  # eviction trims the cache to this fraction of max_bytes
+_SQLITE_MAX_VARIABLES = 900  # keys per IN (...) lookup, below SQLite's default limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model     TEXT NOT NULL,
+    text_hash BLOB NOT NULL,
+    dim       INTEGER NOT NULL,
+    vector    BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id    INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN
+    UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector) WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF vector ON embeddings BEGIN
+    UPDATE cache_size SET bytes = bytes + LENGTH(NEW.vector) - LENGTH(OLD.vector) WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN
+    UPDATE cache_size SET bytes = bytes - LENGTH(OLD.vector) WHERE id = 0;
+END;
+"""
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed float16 vector store keyed by (model, text hash).
+    Safe to share between threads; several processes may open the same file.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = MAX_BYTES) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # A file written before the counter existed is measured once
+        self._conn.execute("BEGIN IMMEDIATE")
+        if self._conn.execute("SELECT 1 FROM cache_size").fetchone() is None:
+            self._conn.execute(
+                "INSERT INTO cache_size (id, bytes) "
+                "SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            )
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> list[np.ndarray | None]:
+        """Cached float32 vector for each text, None where missing."""
+        keys = [text_hash(t) for t in texts]
+        found: dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQLITE_MAX_VARIABLES):
+                chunk = list(set(keys[start : start + _SQLITE_MAX_VARIABLES]))
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT text_hash, dim, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for key, dim, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16, count=dim).astype(np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+            vectors = [found.get(key) for key in keys]
+            hits = sum(v is not None for v in vectors)
+            self._hits += hits
+            self._misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store one vector per text, then evict if the cache outgrew max_bytes."""
+        now = time.time()
+        half = np.asarray(vectors, dtype=np.float16)
+        rows = [
+            (model, text_hash(t), int(v.shape[0]), v.tobytes(), now)
+            for t, v in zip(texts, half, strict=True)
+        ]
+        with self._lock:
+            # An upsert, not INSERT OR REPLACE: replaced rows must fire the size trigger
+            self._conn.executemany(
+                "INSERT INTO embeddings (model, text_hash, dim, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (model, text_hash) DO UPDATE SET "
+                "dim = excluded.dim, vector = excluded.vector, last_used = excluded.last_used",
+                rows,
+            )
+            self._conn.commit()
+            self._evict()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            size = self._size()
+            return CacheStats(
+                hits=self._hits, misses=self._misses, entries=entries, size_bytes=size
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _size(self) -> int:
+        (size,) = self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()
+        return int(size)
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Drops least recently used rows down to EVICT_TO * max_bytes
+        size = self._size()
+        if size <= self.max_bytes:
+            return
+        excess = size - int(self.max_bytes * EVICT_TO)
+        cursor = self._conn.execute(
+            "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        )
+        victims: list[tuple[str, bytes]] = []
+        for model, key, length in cursor:
+            if excess <= 0:
+                break
+            victims.append((model, key))
+            excess -= length
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", victims)
+        self._conn.commit()
+
+
+def cached_encoder(encoder: Encoder, cache: EmbeddingCache, model: str) -> Encoder:
+    """Wrap encoder so only texts missing from the cache are embedded (and then stored)."""
+
+    def encode(texts: list[str]) -> np.ndarray:
+        cached = cache.get_many(model, texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = np.asarray(encoder([texts[i] for i in missing]), dtype=np.float16)
+            cache.put_many(model, [texts[i] for i in missing], fresh)
+            # Rounded like the cached vectors, so results never depend on cache state
+            for i, vector in zip(missing, fresh.astype(np.float32)):
+                cached[i] = vector
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([np.asarray(v, dtype=np.float32) for v in cached])
+
+    return encode
+
+
+_caches: dict[Path, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Path, max_bytes: int = MAX_BYTES) -> EmbeddingCache:
+    """Return the process-wide cache for path, opened on first use."""
+    key = path.resolve()
+    if key not in _caches:
+        with _caches_lock:
+            if key not in _caches:
+                _caches[key] = EmbeddingCache(path, max_bytes=max_bytes)
+    return _caches[key]
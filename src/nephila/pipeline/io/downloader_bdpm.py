@@ -1,14 +1,29 @@
 """
 Download utilities for the Bronze layer.
 Handles BDPM files (.txt, ISO-8859-1) and the ANSM Thésaurus (PDF).
+
+All downloads go through one pooled, HTTP/2-capable httpx client per process.
+BDPM files are fetched concurrently (bounded by max_concurrency) and streamed
+to disk in large chunks; each download reports its throughput. Downloads are
+conditional on the bronze manifest and resume interrupted transfers.
 """
 
+import json
+import os
 import re
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from hashlib import sha256
 from pathlib import Path
 
 import httpx
 from dagster import get_dagster_logger
 
+from nephila.pipeline.io.manifest_bronze import BronzeManifest, ManifestEntry
+
 # Files served at /download/file/{filename}
 BDPM_FILES = [
     "CIS_bdpm.txt",
@@ -25,44 +40,222 @@ BDPM_FILES_DIRECT = [
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; Nephila/1.0; HealthTech Research)"}
 
+CHUNK_SIZE = 1 << 20  # 1 MiB
+MAX_CONCURRENCY = 4
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    url: str
+    path: Path
+    size_bytes: int  # size of the file on disk
+    transferred_bytes: int  # body bytes received by this download
+    seconds: float
+    entry: ManifestEntry
+    unchanged: bool = False  # upstream content identical to the previous download
+    resumed_from: int = 0  # byte offset an interrupted transfer was resumed from
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.transferred_bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def build_http_client(
+    timeout: float = 120, max_connections: int = 10, http2: bool = True
+) -> httpx.Client:
+    """Return a pooled httpx client; HTTP/2 is negotiated when the server supports it."""
+    return httpx.Client(
+        headers=HEADERS,
+        follow_redirects=True,
+        timeout=timeout,
+        http2=http2,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=10),
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Return the lazily-created, process-wide pooled client (thread-safe)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_http_client()
+    return _client
+
+
+def download_file(
+    url: str,
+    dest: Path,
+    client: httpx.Client | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    previous: ManifestEntry | None = None,
+) -> DownloadResult:
+    """
+    Stream url to dest through a .part file, renamed once the body is complete.
 
-def download_file(url: str, dest: Path, timeout: int = 120) -> Path:
+    With a previous manifest entry for dest, the request is conditional
+    (If-None-Match / If-Modified-Since) and a 304 leaves dest untouched. A .part
+    file left by an interrupted transfer is resumed with Range + If-Range. When
+    the downloaded body hashes to the previous SHA-256, dest is not rewritten.
+    Both are keyed on dest, not on the URL: Open Medic links carry a new token
+    on every download, and the server's validators already tell whether the
+    cached body is still current.
+    """
     log = get_dagster_logger()
+    client = client or get_http_client()
     dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    part_meta = dest.with_name(dest.name + ".part.json")
+
+    headers: dict[str, str] = {}
+    if previous and _matches_size(dest, previous.size_bytes):
+        if previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
 
-    with httpx.stream("GET", url, headers=HEADERS, follow_redirects=True, timeout=timeout) as r:
+    offset = 0
+    validator = _resume_validator(part, part_meta)
+    if validator:
+        offset = part.stat().st_size
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+
+    start = time.perf_counter()
+    transferred = 0
+    with client.stream("GET", url, headers=headers) as r:
+        if r.status_code == 304 and previous is not None:
+            _discard_part(part, part_meta)
+            log.info(f"[bronze] {dest.name} — unchanged upstream (304)")
+            return DownloadResult(
+                url=url,
+                path=dest,
+                size_bytes=previous.size_bytes,
+                transferred_bytes=0,
+                seconds=time.perf_counter() - start,
+                entry=previous,
+                unchanged=True,
+            )
+        if r.status_code == 416:
+            # The .part already holds at least the whole body: start over
+            r.close()
+            _discard_part(part, part_meta)
+            return download_file(url, dest, client, chunk_size, previous)
         r.raise_for_status()
-        with open(dest, "wb") as f:
-            for chunk in r.iter_bytes(chunk_size=8192):
+
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        digest = sha256()
+        if r.status_code == 206:
+            if not r.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                _discard_part(part, part_meta)
+                raise ValueError(f"Unexpected Content-Range resuming {url} at byte {offset}")
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(chunk_size), b""):
+                    digest.update(block)
+        else:
+            offset = 0  # validator changed or Range ignored: full body
+            _write_part_meta(part_meta, url, etag, last_modified)
+
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in r.iter_bytes(chunk_size=chunk_size):
                 f.write(chunk)
+                digest.update(chunk)
+                transferred += len(chunk)
 
-    size_kb = dest.stat().st_size / 1024
-    log.info(f"[bronze] {dest.name} — {size_kb:.1f} KB")
-    return dest
+    entry = ManifestEntry(
+        url=url,
+        etag=etag,
+        last_modified=last_modified,
+        size_bytes=part.stat().st_size,
+        sha256=digest.hexdigest(),
+    )
+    unchanged = (
+        previous is not None
+        and previous.sha256 == entry.sha256
+        and _matches_size(dest, entry.size_bytes)
+    )
+    if unchanged:
+        part.unlink()
+    else:
+        os.replace(part, dest)
+    part_meta.unlink(missing_ok=True)
+
+    result = DownloadResult(
+        url=url,
+        path=dest,
+        size_bytes=entry.size_bytes,
+        transferred_bytes=transferred,
+        seconds=time.perf_counter() - start,
+        entry=entry,
+        unchanged=unchanged,
+        resumed_from=offset,
+    )
+    resumed = f", resumed at {offset / 1024:.1f} KB" if offset else ""
+    status = ", unchanged content" if unchanged else ""
+    log.info(
+        f"[bronze] {dest.name} — {result.size_bytes / 1024:.1f} KB in {result.seconds:.1f}s "
+        f"({result.bytes_per_sec / 1024:.0f} KB/s{resumed}{status})"
+    )
+    return result
+
+
+def download_files(
+    jobs: Sequence[tuple[str, Path]],
+    client: httpx.Client | None = None,
+    max_concurrency: int = MAX_CONCURRENCY,
+    chunk_size: int = CHUNK_SIZE,
+    manifest: BronzeManifest | None = None,
+) -> list[DownloadResult]:
+    """
+    Download (url, dest) pairs concurrently over a shared client, in input order.
+    manifest, when given, supplies the previous entries and is updated in place.
+    """
+    client = client or get_http_client()
+    files = manifest.files if manifest is not None else {}
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = [
+            pool.submit(download_file, url, dest, client, chunk_size, files.get(dest.name))
+            for url, dest in jobs
+        ]
+        results = [future.result() for future in futures]
+    if manifest is not None:
+        manifest.files.update({r.path.name: r.entry for r in results})
+    return results
 
 
-def download_bdpm(base_url: str, dest_dir: Path) -> list[Path]:
-    """Download all BDPM files into dest_dir/bdpm/.
+def download_bdpm(
+    base_url: str,
+    dest_dir: Path,
+    client: httpx.Client | None = None,
+    max_concurrency: int = MAX_CONCURRENCY,
+    chunk_size: int = CHUNK_SIZE,
+    manifest: BronzeManifest | None = None,
+) -> list[DownloadResult]:
+    """Download all BDPM files into dest_dir/bdpm/, max_concurrency at a time.
 
     base_url should be the site root, e.g. https://base-donnees-publique.medicaments.gouv.fr
     """
-    paths: list[Path] = []
-    for filename in BDPM_FILES:
-        url = f"{base_url}/download/file/{filename}"
-        paths.append(download_file(url, dest_dir / "bdpm" / filename))
-    for filename in BDPM_FILES_DIRECT:
-        url = f"{base_url}/download/{filename}"
-        paths.append(download_file(url, dest_dir / "bdpm" / filename))
-    return paths
+    jobs = [
+        (f"{base_url}/download/file/{filename}", dest_dir / "bdpm" / filename)
+        for filename in BDPM_FILES
+    ]
+    jobs += [
+        (f"{base_url}/download/{filename}", dest_dir / "bdpm" / filename)
+        for filename in BDPM_FILES_DIRECT
+    ]
+    return download_files(jobs, client, max_concurrency, chunk_size, manifest)
 
 
-def find_ansm_pdf_url(page_url: str) -> str:
+def find_ansm_pdf_url(page_url: str, client: httpx.Client | None = None) -> str:
     """Scrape the ANSM page to extract the Thésaurus PDF download URL."""
     log = get_dagster_logger()
 
-    with httpx.Client(headers=HEADERS, follow_redirects=True, timeout=30) as client:
-        resp = client.get(page_url)
-        resp.raise_for_status()
+    resp = (client or get_http_client()).get(page_url, timeout=30)
+    resp.raise_for_status()
 
     # Look for PDF links containing "thesaurus" (case-insensitive)
     matches = re.findall(
@@ -84,3 +277,39 @@ def find_ansm_pdf_url(page_url: str) -> str:
 
     log.info(f"[bronze] ANSM Thésaurus found: {pdf_url}")
     return pdf_url
+
+
+def _matches_size(path: Path, size_bytes: int) -> bool:
+    return path.exists() and path.stat().st_size == size_bytes
+
+
+def _write_part_meta(
+    part_meta: Path, url: str, etag: str | None, last_modified: str | None
+) -> None:
+    """Record the validators of a body being written to .part, so it can be resumed."""
+    if etag or last_modified:
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        part_meta.write_text(json.dumps(meta), encoding="utf-8")
+    else:
+        part_meta.unlink(missing_ok=True)
+
+
+def _resume_validator(part: Path, part_meta: Path) -> str | None:
+    """If-Range value for resuming a .part file, or None when it cannot be resumed."""
+    if not (part.exists() and part.stat().st_size > 0 and part_meta.exists()):
+        return None
+    try:
+        meta = json.loads(part_meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    etag = meta.get("etag")
+    # If-Range only accepts strong ETags; fall back to Last-Modified
+    if etag and not etag.startswith("W/"):
+        return str(etag)
+    last_modified = meta.get("last_modified")
+    return str(last_modified) if last_modified else None
+
+
+def _discard_part(part: Path, part_meta: Path) -> None:
+    part.unlink(missing_ok=True)
+    part_meta.unlink(missing_ok=True)
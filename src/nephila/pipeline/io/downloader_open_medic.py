@@ -3,12 +3,20 @@
 import re
 from pathlib import Path
 
+import httpx
 from dagster import get_dagster_logger
 
-from nephila.pipeline.io.downloader_bdpm import HEADERS, download_file
+from nephila.pipeline.io.downloader_bdpm import DownloadResult, download_file, get_http_client
+from nephila.pipeline.io.manifest_bronze import ManifestEntry
 
 
-def download_open_medic_cip13(base_url: str, year: int, dest_dir: Path) -> Path:
+def download_open_medic_cip13(
+    base_url: str,
+    year: int,
+    dest_dir: Path,
+    client: httpx.Client | None = None,
+    previous: ManifestEntry | None = None,
+) -> DownloadResult:
     """
     Download the Open Medic CIP13 aggregate CSV.gz from ameli.fr.
 
@@ -16,20 +24,18 @@ def download_open_medic_cip13(base_url: str, year: int, dest_dir: Path) -> Path:
     1. GET {base_url}/download2.php?Dir_Rep={year}_CIP13
        → returns HTML listing with tokenised download links
     2. Parse the HTML to find NB_{year}_cip13.CSV.gz and extract its URL
-    3. Download the file
+    3. Download the file (conditional on previous, the last manifest entry)
 
     Output: dest_dir/open_medic/NB_{year}_cip13.CSV.gz
     """
-    import httpx
-
     log = get_dagster_logger()
+    client = client or get_http_client()
 
     listing_url = f"{base_url}/download2.php?Dir_Rep={year}_CIP13"
     log.info(f"[bronze] Fetching Open Medic file listing: {listing_url}")
 
-    with httpx.Client(headers=HEADERS, follow_redirects=True, timeout=30) as client:
-        resp = client.get(listing_url)
-        resp.raise_for_status()
+    resp = client.get(listing_url, timeout=30)
+    resp.raise_for_status()
 
     # Find the link to the aggregate CIP13 file (no demographic breakdown)
     target_filename = f"NB_{year}_cip13.CSV.gz"
@@ -53,4 +59,4 @@ def download_open_medic_cip13(base_url: str, year: int, dest_dir: Path) -> Path:
     log.info(f"[bronze] Open Medic CIP13 download URL: {download_url}")
 
     dest = dest_dir / "open_medic" / target_filename
-    return download_file(download_url, dest)
+    return download_file(download_url, dest, client, previous=previous)
@@ -1,14 +1,232 @@
 """
 Local embedding function for ChromaDB using sentence-transformers (HuggingFace).
 Model is downloaded and cached locally on first use — zero API cost, HDS-compatible.
+
+Backends (EMBEDDING_BACKEND):
+    torch      the PyTorch model, fp32 (default)
+    onnx       the model exported to ONNX, run by onnxruntime on CPU
+    onnx-int8  the ONNX export with dynamically quantized int8 weights
+ONNX exports are written once under ONNX_DIR and reused. Vectors differ slightly
+between backends (scripts/bench_embedding_backends.py reports cosine parity), so
+the backend is part of the model id under which embeddings are cached and stored.
+
+With a service address (EMBEDDING_SERVICE), texts are sent to the shared
+embedding service (service_embeddings) instead: no model is loaded in-process.
 """
 
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, Embeddings
+from chromadb.utils.embedding_functions import (
+    SentenceTransformerEmbeddingFunction,
+    register_embedding_function,
+)
+
+from nephila.pipeline.io.cache_embeddings import EmbeddingCache, cached_encoder
+from nephila.pipeline.io.producer_embeddings import EMBED_BATCH_SIZE, Encoder
+from nephila.pipeline.io.service_embeddings import EmbeddingServiceClient
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_DIR = Path("data/cache/onnx")
+ONNX_FILE = "onnx/model.onnx"
+# AVX2 kernels run on every x86-64 node we deploy to; avx512_vnni is faster where present
+QUANTIZATION = "avx2"
+QUANTIZED_FILE = f"onnx/model_qint8_{QUANTIZATION}.onnx"
 
 
-def get_embedding_function(model_name: str) -> SentenceTransformerEmbeddingFunction:
+def embedding_model_id(model_name: str, backend: str = "torch") -> str:
+    """Identifier of the vectors a model produces: the model name, suffixed for ONNX backends."""
+    return model_name if backend == "torch" else f"{model_name}#{backend}"
+
+
+def get_embedding_function(
+    model_name: str, backend: str = "torch", threads: int = 0, service: str = ""
+) -> SentenceTransformerEmbeddingFunction:
     """
     Return a ChromaDB-compatible embedding function backed by a local HuggingFace model.
     Default: intfloat/multilingual-e5-base (multilingual, optimized for retrieval).
+    threads > 0 caps the CPU threads of the forward pass (0: runtime default).
+    With a service address, embeddings come from the shared embedding service,
+    which runs model_name with its own backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+    if service:
+        return ServiceEmbeddingFunction(model_name, service)
+    if backend == "torch":
+        if threads > 0:
+            import torch
+
+            torch.set_num_threads(threads)
+        return SentenceTransformerEmbeddingFunction(model_name=model_name)
+    return OnnxEmbeddingFunction(model_name, quantized=backend == "onnx-int8", threads=threads)
+
+
+class OnnxEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """
+    SentenceTransformerEmbeddingFunction running an ONNX export of the model.
+    Keeps the parent's name and config schema, so ChromaDB sees the same embedding
+    function. Its kwargs record the ONNX file (fp32 or int8) and the session threads.
+
+    ChromaDB rebuilds the function from its config when a collection is created
+    (is_legacy) or read. build_from_config turns an ONNX config back into this class,
+    so the rebuild reuses the local export and the model already loaded, instead of
+    the parent loading a second copy from the Hub, where the int8 file does not exist.
+    The class is registered under the parent's name for those rebuilds.
     """
-    return SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        threads: int = 0,
+        onnx_dir: Path = ONNX_DIR,
+    ) -> None:
+        # The parent __init__ would load the PyTorch model: set its attributes instead
+        self.model_name = model_name
+        self.device = "cpu"
+        self.normalize_embeddings = False
+        self.kwargs = {
+            "backend": "onnx",
+            "model_kwargs": {
+                "file_name": QUANTIZED_FILE if quantized else ONNX_FILE,
+                "provider": "CPUExecutionProvider",
+            },
+            # SentenceTransformer cannot set ONNX threads: kept in the model config, unused
+            "config_kwargs": {"onnx_threads": threads},
+        }
+        key = f"{embedding_model_id(model_name, 'onnx-int8' if quantized else 'onnx')}|{threads}"
+        if key not in self.models:
+            self.models[key] = _load_onnx_model(model_name, quantized, threads, onnx_dir)
+        self._model = self.models[key]
+
+    @staticmethod
+    def build_from_config(config: dict[str, Any]) -> SentenceTransformerEmbeddingFunction:
+        kwargs = config.get("kwargs") or {}
+        if kwargs.get("backend") != "onnx":
+            return SentenceTransformerEmbeddingFunction.build_from_config(config)  # type: ignore[return-value]
+        return OnnxEmbeddingFunction(
+            config["model_name"],
+            quantized=(kwargs.get("model_kwargs") or {}).get("file_name") == QUANTIZED_FILE,
+            threads=int((kwargs.get("config_kwargs") or {}).get("onnx_threads", 0)),
+        )
+
+
+register_embedding_function(OnnxEmbeddingFunction)  # type: ignore[no-untyped-call]
+
+
+class ServiceEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """SentenceTransformerEmbeddingFunction whose vectors come from the embedding service."""
+
+    clients: dict[str, EmbeddingServiceClient] = {}  # per address: connections are reused
+
+    def __init__(self, model_name: str, address: str) -> None:
+        # No model in this process: the parent __init__ is not called
+        self.model_name = model_name
+        self.device = "cpu"
+        self.normalize_embeddings = False
+        self.kwargs = {}
+        self._client = self.clients.setdefault(address, EmbeddingServiceClient(address))
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(self._client.embed(list(input)))
+
+
+def _load_onnx_model(model_name: str, quantized: bool, threads: int, onnx_dir: Path) -> Any:
+    import onnxruntime as ort
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    local = onnx_dir / model_name.replace("/", "__")
+    if not (local / ONNX_FILE).exists():
+        # Uses the repository's ONNX file when published, otherwise exports via optimum
+        SentenceTransformer(model_name, device="cpu", backend="onnx").save_pretrained(str(local))
+    if quantized and not (local / QUANTIZED_FILE).exists():
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(str(local), device="cpu", backend="onnx"),
+            quantization_config=QUANTIZATION,
+            model_name_or_path=str(local),
+        )
+
+    options = ort.SessionOptions()
+    if threads > 0:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    return SentenceTransformer(
+        str(local),
+        device="cpu",
+        backend="onnx",
+        model_kwargs={
+            "file_name": QUANTIZED_FILE if quantized else ONNX_FILE,
+            "provider": "CPUExecutionProvider",
+            "session_options": options,
+        },
+    )
+
+
+def embed_query(
+    model_name: str,
+    text: str,
+    cache: EmbeddingCache | None = None,
+    backend: str = "torch",
+    threads: int = 0,
+    service: str = "",
+) -> Sequence[float]:
+    """
+    Embed one agent query, through the on-disk cache when given — repeated
+    questions skip the transformer. Pass the result as query_embeddings.
+    """
+    return embed_queries(model_name, [text], cache, backend, threads, service)[0]
+
+
+def embed_queries(
+    model_name: str,
+    texts: list[str],
+    cache: EmbeddingCache | None = None,
+    backend: str = "torch",
+    threads: int = 0,
+    service: str = "",
+) -> list[Sequence[float]]:
+    """Embed several agent queries; the ones missing from the cache in one forward pass."""
+    ef = get_embedding_function(model_name, backend, threads, service)
+    model_id = embedding_model_id(model_name, backend)
+    encoder: Encoder = cached_encoder(ef, cache, model_id) if cache is not None else ef
+    if not texts:
+        return []
+    return [[float(x) for x in row] for row in np.asarray(encoder(texts))]
+
+
+@contextmanager
+def open_encoder(
+    model_name: str,
+    batch_size: int = EMBED_BATCH_SIZE,
+    workers: int = 1,
+    backend: str = "torch",
+    threads: int = 0,
+) -> Iterator[Encoder]:
+    """
+    Yield an encoder for the gold producer, sharing the embedding function's model.
+
+    batch_size is the transformer batch size (sentence-transformers defaults to 32).
+    With workers > 1, batches are split across a sentence-transformers process pool,
+    stopped when the context exits.
+    """
+    ef = get_embedding_function(model_name, backend, threads)
+    model = ef._model  # cached per model and backend by the embedding function
+    options: dict[str, Any] = {
+        "batch_size": batch_size,
+        "normalize_embeddings": ef.normalize_embeddings,
+    }
+
+    if workers <= 1:
+        yield lambda texts: model.encode(texts, convert_to_numpy=True, **options)
+        return
+
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
+    try:
+        yield lambda texts: model.encode_multi_process(texts, pool, **options)
+    finally:
+        model.stop_multi_process_pool(pool)
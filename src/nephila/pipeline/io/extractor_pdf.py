@@ -0,0 +1,184 @@
+"""
+Page-text extraction for the ANSM Thésaurus PDF.
+Extracted text is cached on disk as gzip-compressed JSONL, keyed by the SHA-256
+of the PDF and the page number: an unchanged publication is never re-extracted.
+A cache that cannot be read back is treated as a miss and rewritten.
+
+Pages are streamed one at a time and each page releases its caches once its
+text is extracted, so peak memory does not grow with page count.
+
+Text extraction is pluggable: "pdfplumber" (character-level layout analysis,
+the reference) or "pdfium" (PDFium's native text layer, much faster on this
+plain text-column layout). Custom backends can be added with register_text_backend.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+import pdfplumber
+import pypdfium2 as pdfium
+from dagster import get_dagster_logger
+
+# A backend yields the text of each page of a PDF, in page order
+TextBackend = Callable[[Path], Iterator[str]]
+
+DEFAULT_BACKEND = "pdfplumber"
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(pdf_path: Path, cache_dir: Path, backend: str = DEFAULT_BACKEND) -> Path:
+    """Return the cache file path holding the page texts of pdf_path for a backend."""
+    return cache_dir / f"{hash_file(pdf_path)}.{backend}.jsonl.gz"
+
+
+def register_text_backend(name: str, backend: TextBackend) -> None:
+    """Register a text-extraction backend under name (overrides an existing one)."""
+    _BACKENDS[name] = backend
+
+
+def available_text_backends() -> list[str]:
+    """Return the names of the registered text-extraction backends."""
+    return sorted(_BACKENDS)
+
+
+def get_text_backend(name: str) -> TextBackend:
+    """Return the text-extraction backend registered under name."""
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown PDF text backend {name!r} — available: {available_text_backends()}"
+        ) from None
+
+
+def iter_page_texts(
+    pdf_path: Path, cache_dir: Path | None = None, backend: str = DEFAULT_BACKEND
+) -> Iterator[str]:
+    """
+    Yield the text of every page of pdf_path, in page order.
+    With cache_dir set, stream the cached extraction when present, otherwise
+    extract with the backend and write the cache as pages go by.
+    """
+    extract = get_text_backend(backend)
+    if cache_dir is None:
+        yield from extract(pdf_path)
+        return
+
+    log = get_dagster_logger()
+    cache_path = cache_path_for(pdf_path, cache_dir, backend)
+    cached_pages = 0
+    if cache_path.exists():
+        log.info(f"[bronze] PDF text cache hit — {cache_path.name}")
+        try:
+            for text in _iter_cache(cache_path):
+                yield text
+                cached_pages += 1
+            return
+        except (OSError, EOFError, ValueError, KeyError) as exc:
+            # Unreadable cache: re-extract, skipping the pages already yielded from it
+            log.warning(f"[bronze] PDF text cache unreadable, re-extracting — {exc}")
+            cache_path.unlink(missing_ok=True)
+
+    for page_no, text in enumerate(_iter_and_write_cache(cache_path, extract(pdf_path))):
+        if page_no >= cached_pages:
+            yield text
+    log.info(f"[bronze] PDF text cache written — {cache_path.name}")
+
+
+def extract_page_texts(
+    pdf_path: Path, cache_dir: Path | None = None, backend: str = DEFAULT_BACKEND
+) -> list[str]:
+    """Return the text of every page of pdf_path (see iter_page_texts)."""
+    return list(iter_page_texts(pdf_path, cache_dir, backend))
+
+
+def iter_lines(page_texts: Iterable[str]) -> Iterator[str]:
+    """Yield the stripped, non-empty lines of a stream of page texts."""
+    for text in page_texts:
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if line:
+                yield line
+
+
+def _iter_pdfplumber(pdf_path: Path) -> Iterator[str]:
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            # Drop parsed objects, layout and textmap caches — only the text is kept
+            page.close()
+
+
+_PDFIUM_HYPHENS = str.maketrans({"\x02": "-", "\ufffe": "-"})
+
+
+def _iter_pdfium(pdf_path: Path) -> Iterator[str]:
+    doc = pdfium.PdfDocument(pdf_path)
+    try:
+        for index in range(len(doc)):
+            page = doc[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+                # PDFium separates lines with CRLF and reports line-break hyphens as
+                # U+0002 / U+FFFE — align with pdfplumber's LF and plain "-"
+                yield text.replace("\r\n", "\n").translate(_PDFIUM_HYPHENS)
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        doc.close()
+
+
+_BACKENDS: dict[str, TextBackend] = {
+    "pdfplumber": _iter_pdfplumber,
+    "pdfium": _iter_pdfium,
+}
+
+
+def _iter_cache(cache_path: Path) -> Iterator[str]:
+    with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+        for expected_page, line in enumerate(f):
+            entry = json.loads(line)
+            if entry["page"] != expected_page:
+                raise ValueError(f"Corrupted PDF text cache (missing pages): {cache_path}")
+            yield entry["text"]
+
+
+def _iter_and_write_cache(cache_path: Path, page_texts: Iterable[str]) -> Iterator[str]:
+    """Pass page texts through while writing them to the cache.
+
+    The cache is written to a temporary file and renamed once every page has been
+    consumed — an interrupted run never leaves a partial cache file behind. The
+    temporary file is unique, so concurrent extractions of one PDF (ansm_to_raw and
+    ansm_classes_to_raw) each write their own and the last rename wins.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cache_path.parent, prefix=f".{cache_path.name}.", suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_path = Path(tmp.name)
+    complete = False
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for page_no, text in enumerate(page_texts):
+                f.write(json.dumps({"page": page_no, "text": text}, ensure_ascii=False) + "\n")
+                yield text
+        complete = True
+        os.replace(tmp_path, cache_path)
+    finally:
+        if not complete:
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,277 @@
+"""
+Embedded, in-process vector index exported from the published gold collections.
+
+Our collections hold tens of thousands of vectors: an exact search over all of
+them costs a few milliseconds of BLAS in-process — no HTTP round-trip, no JSON
+decoding, no server to run — and returns exact rather than HNSW-approximate
+neighbours. With VECTOR_BACKEND=local, gold exports every published version to
+disk and the agent tools query it here (scripts/bench_vector_backends.py).
+
+Layout under the index directory, one folder per alias:
+    {alias}/CURRENT                       name of the live version (atomic flip)
+    {alias}/{version}/vectors.f16         float16 matrix, loaded as float32
+    {alias}/{version}/records.jsonl       id, document, metadata per row
+    {alias}/{version}/index.json          model, projection, distance space, dim, count
+
+LocalCollection answers query() and count() like a chromadb Collection, so the
+tools use either backend through the same calls. where filters support equality,
+$eq, $in, $contains (list-valued metadata), $and and $or, through postings
+built at load time: a filtered search only scores the matching rows.
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from dagster import get_dagster_logger
+
+from nephila.pipeline.io.indexer_chroma import MODEL_KEY, PAGE_SIZE, SPACES
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY
+
+CURRENT_FILE = "CURRENT"
+VECTORS_FILE = "vectors.f16"
+RECORDS_FILE = "records.jsonl"
+INDEX_FILE = "index.json"
+
+
+class SearchCollection(Protocol):
+    """What the agent tools need from a collection, whichever the backend."""
+
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def metadata(self) -> Any: ...
+
+    def count(self) -> int: ...
+
+    def query(self, *args: Any, **kwargs: Any) -> Any: ...
+
+
+@dataclass(frozen=True)
+class _Record:
+    id: str
+    document: str
+    metadata: dict[str, Any]
+
+
+class LocalCollection:
+    """One exported version, searched exactly in-process."""
+
+    def __init__(self, path: Path) -> None:
+        info = json.loads((path / INDEX_FILE).read_text())
+        self.path = path
+        self.name: str = info["version"]
+        self.space: str = info["space"]
+        self.embedding_model: str = info["model"]
+        self.metadata: dict[str, Any] = {MODEL_KEY: info["model"], "hnsw:space": self.space}
+        if info.get("projection"):
+            self.metadata[PROJECTION_KEY] = info["projection"]
+        self._records: list[_Record] = []
+        postings: dict[tuple[str, Any], list[int]] = {}
+        with (path / RECORDS_FILE).open(encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                row = json.loads(line)
+                self._records.append(_Record(row["id"], row["document"], row["metadata"]))
+                for key, value in row["metadata"].items():
+                    for item in value if isinstance(value, list) else [value]:
+                        postings.setdefault((key, item), []).append(i)
+        # Rows holding each (field, value) — list values are indexed item by item
+        self._postings = {k: np.array(v, dtype=np.intp) for k, v in postings.items()}
+        count, dim = info["count"], info["dim"]
+        # numpy has no fast float16 matmul, and converting chunks per query costs
+        # ~7x the latency: the matrix is read once into RAM as float32, count x dim
+        # x 4 bytes per loaded version (44 MiB for 15,000 768-d vectors). The
+        # float16 file only keeps the index small on disk.
+        vectors = np.fromfile(path / VECTORS_FILE, dtype=np.float16, count=count * dim)
+        self._vectors = vectors.reshape(count, dim).astype(np.float32)
+        self._sq_norms = np.einsum("ij,ij->i", self._vectors, self._vectors)
+        if self.space == "cosine":
+            self._vectors /= np.sqrt(np.maximum(self._sq_norms, 1e-12))[:, None]
+
+    @property
+    def resident_bytes(self) -> int:
+        """RAM held by the float32 search matrix of this version."""
+        return int(self._vectors.nbytes + self._sq_norms.nbytes)
+
+    def count(self) -> int:
+        return len(self._records)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]] | np.ndarray,
+        n_results: int = 10,
+        where: Mapping[str, Any] | None = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        """Exact nearest neighbours, returned in the shape of a ChromaDB QueryResult."""
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        candidates = self._filter(where)
+        result: dict[str, Any] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for q in queries:
+            distances = self._distances(q, candidates)
+            k = min(n_results, len(distances))
+            top = np.argpartition(distances, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+            top = top[np.argsort(distances[top], kind="stable")]
+            rows = [self._records[i] for i in (candidates[top] if candidates is not None else top)]
+            result["ids"].append([r.id for r in rows])
+            result["documents"].append([r.document for r in rows])
+            result["metadatas"].append([r.metadata for r in rows])
+            result["distances"].append([float(d) for d in distances[top]])
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def _distances(self, q: np.ndarray, candidates: np.ndarray | None) -> np.ndarray:
+        vectors = self._vectors if candidates is None else self._vectors[candidates]
+        if self.space == "cosine":
+            q = q / max(float(np.linalg.norm(q)), 1e-12)
+            return np.asarray(1.0 - vectors @ q)
+        dots = vectors @ q
+        if self.space == "ip":
+            return np.asarray(1.0 - dots)
+        norms = self._sq_norms if candidates is None else self._sq_norms[candidates]
+        return np.asarray(norms - 2.0 * dots + float(q @ q))
+
+    def _filter(self, where: Mapping[str, Any] | None) -> np.ndarray | None:
+        """Sorted row numbers matching a ChromaDB where clause (None: no filter)."""
+        if not where:
+            return None
+        return self._match(where)
+
+    def _match(self, where: Mapping[str, Any]) -> np.ndarray:
+        parts: list[np.ndarray] = []
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                rows = [self._match(clause) for clause in condition]
+                combine = np.intersect1d if key == "$and" else np.union1d
+                parts.append(_reduce(combine, rows))
+            elif isinstance(condition, Mapping):
+                parts.extend(self._field(key, op, value) for op, value in condition.items())
+            else:
+                parts.append(self._field(key, "$eq", condition))
+        return _reduce(np.intersect1d, parts)
+
+    def _field(self, key: str, op: str, value: Any) -> np.ndarray:
+        # Postings hold list items too: "$eq" on a list field behaves as "$contains"
+        empty = np.empty(0, dtype=np.intp)
+        if op in ("$eq", "$contains"):
+            return self._postings.get((key, value), empty)
+        if op == "$in":
+            return _reduce(np.union1d, [self._postings.get((key, v), empty) for v in value])
+        raise ValueError(f"Unsupported where operator {op!r} in the local index")
+
+
+def _reduce(combine: Any, arrays: list[np.ndarray]) -> np.ndarray:
+    if not arrays:
+        return np.empty(0, dtype=np.intp)
+    result = arrays[0]
+    for other in arrays[1:]:
+        result = combine(result, other)
+    return np.asarray(result, dtype=np.intp)
+
+
+def export_collection(
+    collection: Collection,
+    index_dir: Path,
+    alias: str,
+    keep: int = 1,
+    page_size: int = PAGE_SIZE,
+) -> Path:
+    """
+    Write a published collection version under index_dir/alias, flip CURRENT to
+    it, then remove exported versions beyond the `keep` most recent older ones.
+    """
+    log = get_dagster_logger()
+    alias_dir = index_dir / alias
+    target = alias_dir / collection.name
+    tmp = alias_dir / f".{collection.name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    count, dim, offset = 0, 0, 0
+    with (
+        (tmp / VECTORS_FILE).open("wb") as vectors,
+        (tmp / RECORDS_FILE).open("w", encoding="utf-8") as records,
+    ):
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            ids = page["ids"]
+            if ids:
+                embeddings = np.asarray(page["embeddings"], dtype=np.float16)
+                dim = embeddings.shape[1]
+                vectors.write(embeddings.tobytes())
+                documents = page["documents"] or [""] * len(ids)
+                metadatas = page["metadatas"] or [{}] * len(ids)
+                for doc_id, document, metadata in zip(ids, documents, metadatas):
+                    row = {"id": doc_id, "document": document, "metadata": dict(metadata or {})}
+                    records.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += len(ids)
+            if len(ids) < page_size:
+                break
+            offset += page_size
+
+    metadata = collection.metadata or {}
+    # Set through the HNSW configuration, or the legacy "hnsw:space" metadata key
+    configured = (collection.configuration_json or {}).get("hnsw") or {}
+    space = str(configured.get("space") or metadata.get("hnsw:space", "l2"))
+    info = {
+        "alias": alias,
+        "version": collection.name,
+        "model": metadata.get(MODEL_KEY),
+        "projection": metadata.get(PROJECTION_KEY),
+        "space": space if space in SPACES else "l2",
+        "dim": dim,
+        "count": count,
+    }
+    (tmp / INDEX_FILE).write_text(json.dumps(info, indent=2))
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    _set_current(alias_dir, collection.name)
+    log.info(f"[gold] {alias} — exported {count} vectors to {target}")
+
+    older = sorted(p.name for p in alias_dir.iterdir() if p.is_dir() and p.name != target.name)
+    for name in older[: max(0, len(older) - keep)]:
+        if not name.startswith("."):
+            shutil.rmtree(alias_dir / name)
+    return target
+
+
+_collections: dict[Path, LocalCollection] = {}
+_collections_lock = threading.Lock()
+
+
+def open_local_collection(index_dir: Path, alias: str) -> LocalCollection:
+    """
+    The live exported version of alias, loaded once per process and version.
+    CURRENT is re-read on every call, so a new export is picked up right away.
+    """
+    alias_dir = index_dir / alias
+    current = alias_dir / CURRENT_FILE
+    if not current.exists():
+        raise FileNotFoundError(f"No local index for {alias!r} in {index_dir}")
+    path = (alias_dir / current.read_text().strip()).resolve()
+    if path not in _collections:
+        with _collections_lock:
+            if path not in _collections:
+                # Superseded versions of the alias are released
+                for stale in [p for p in _collections if p.parent == path.parent]:
+                    del _collections[stale]
+                _collections[path] = LocalCollection(path)
+    return _collections[path]
+
+
+def _set_current(alias_dir: Path, version: str) -> None:
+    tmp = alias_dir / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, alias_dir / CURRENT_FILE)
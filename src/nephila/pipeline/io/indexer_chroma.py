@@ -0,0 +1,336 @@
+"""
+Blue/green publishing of a ChromaDB collection from freshly built documents.
+
+Every document carries a content_hash in its metadata (computed by the gold dbt models).
+Documents arrive as a stream of batches, each written before the next is read.
+A refresh builds a new versioned collection next to the live one: documents
+whose hash is unchanged are copied with their stored embedding, only new or
+changed documents are embedded — by the producer in producer_embeddings, which
+streams precomputed vectors to upsert. The new version is validated (document count,
+sample queries) before the alias is flipped to it, and superseded versions are
+garbage-collected after a grace period — the live index is never modified.
+With a projection (projector_embeddings), embeddings are reduced before they are
+stored, and the projection id is part of what a reused embedding must match.
+Each version is created with the alias's HNSW settings (HnswSettings); stored
+embeddings do not depend on them, so changing them re-embeds nothing.
+"""
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta
+
+import numpy as np
+from chromadb.api import ClientAPI
+from chromadb.api.collection_configuration import CreateCollectionConfiguration
+from chromadb.api.models.Collection import Collection
+from chromadb.errors import NotFoundError
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from dagster import get_dagster_logger
+
+from nephila.pipeline.io.alias_chroma import (
+    gc_versions,
+    resolve_collection,
+    set_alias,
+    version_name,
+)
+from nephila.pipeline.io.builder_documents import HASH_KEY, DocumentBatch
+from nephila.pipeline.io.producer_embeddings import (
+    EMBED_BATCH_SIZE,
+    QUEUE_SIZE,
+    Encoder,
+    StageStats,
+    embed_and_upsert,
+)
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY, Projection
+
+BATCH_SIZE = 100
+PAGE_SIZE = 5000  # ids fetched per get() when reading existing hashes
+MODEL_KEY = "embedding_model"
+VALIDATION_SAMPLES = 3
+VALIDATION_TOP_K = 5
+SPACES = ("l2", "cosine", "ip")
+
+
+@dataclass(frozen=True)
+class HnswSettings:
+    """
+    HNSW index parameters of a collection version. Unset (None) parameters are left
+    to ChromaDB: the space then comes from the embedding function (cosine for
+    sentence-transformers), the others from ChromaDB's defaults.
+    """
+
+    space: str | None = None
+    ef_construction: int | None = None  # candidate list size while inserting (100)
+    max_neighbors: int | None = None  # M, links per node (16)
+    ef_search: int | None = None  # candidate list size while querying (100)
+
+    def __post_init__(self) -> None:
+        if self.space is not None and self.space not in SPACES:
+            raise ValueError(f"Unknown HNSW space {self.space!r}, expected one of {SPACES}")
+        numbers = (self.ef_construction, self.max_neighbors, self.ef_search)
+        if any(n is not None and n < 1 for n in numbers):
+            raise ValueError(f"HNSW parameters must be positive: {self}")
+
+    @classmethod
+    def from_mapping(cls, values: Mapping[str, object]) -> "HnswSettings":
+        """Build from a COLLECTION_HNSW entry, rejecting unknown keys."""
+        unknown = set(values) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown HNSW settings {sorted(unknown)}")
+        return cls(**values)  # type: ignore[arg-type]
+
+    def configuration(self) -> CreateCollectionConfiguration | None:
+        """The collection configuration holding the set parameters, None when none is set."""
+        hnsw = {key: value for key, value in asdict(self).items() if value is not None}
+        return {"hnsw": hnsw} if hnsw else None  # type: ignore[return-value]
+
+    def __str__(self) -> str:
+        parts = [
+            self.space or "default space",
+            f"M={self.max_neighbors or 'default'}",
+            f"ef_construction={self.ef_construction or 'default'}",
+            f"ef_search={self.ef_search or 'default'}",
+        ]
+        return " ".join(parts)
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    version: str  # physical collection now behind the alias
+    embedded: int
+    skipped: int  # unchanged documents, copied with their stored embedding
+    deleted: int  # documents of the previous version absent from the new one
+    embed_docs_per_sec: float = 0.0
+    upload_docs_per_sec: float = 0.0
+
+
+def existing_hashes(collection: Collection, page_size: int = PAGE_SIZE) -> dict[str, str | None]:
+    """Map every id in the collection to its stored content hash (None when absent)."""
+    hashes: dict[str, str | None] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        ids = page["ids"]
+        for doc_id, metadata in zip(ids, page["metadatas"] or [{}] * len(ids)):
+            value = (metadata or {}).get(HASH_KEY)
+            hashes[doc_id] = str(value) if value is not None else None
+        if len(ids) < page_size:
+            return hashes
+        offset += page_size
+
+
+def publish_collection(
+    client: ClientAPI,
+    alias: str,
+    ef: SentenceTransformerEmbeddingFunction,
+    embedding_model: str,
+    batches: Iterable[DocumentBatch],
+    grace: timedelta,
+    keep: int = 1,
+    batch_size: int = BATCH_SIZE,
+    encoder: Encoder | None = None,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    queue_size: int = QUEUE_SIZE,
+    projection: Projection | None = None,
+    hnsw: HnswSettings | None = None,
+) -> RefreshStats:
+    """
+    Build, validate and publish a new version of alias, then garbage-collect old ones.
+    A version failing validation is dropped and the alias is left untouched.
+    encoder defaults to the embedding function itself.
+    """
+    collection, stats, samples = build_collection_version(
+        client,
+        alias,
+        ef,
+        embedding_model,
+        batches,
+        batch_size=batch_size,
+        encoder=encoder,
+        embed_batch_size=embed_batch_size,
+        queue_size=queue_size,
+        projection=projection,
+        hnsw=hnsw,
+    )
+    query_encoder = projection.wrap(ef) if projection is not None else None
+    try:
+        validate_collection(collection, stats.embedded + stats.skipped, samples, query_encoder)
+    except ValueError:
+        client.delete_collection(collection.name)
+        raise
+    set_alias(client, alias, collection.name)
+    gc_versions(client, alias, grace=grace, keep=keep)
+    return stats
+
+
+def build_collection_version(
+    client: ClientAPI,
+    alias: str,
+    ef: SentenceTransformerEmbeddingFunction,
+    embedding_model: str,
+    batches: Iterable[DocumentBatch],
+    batch_size: int = BATCH_SIZE,
+    created_at: datetime | None = None,
+    encoder: Encoder | None = None,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    queue_size: int = QUEUE_SIZE,
+    projection: Projection | None = None,
+    hnsw: HnswSettings | None = None,
+) -> tuple[Collection, RefreshStats, list[tuple[str, str]]]:
+    """
+    Build a new version of alias from streamed document batches, reusing the live
+    version's embeddings by content hash. Each batch is written before the next
+    one is read. Returns the collection, its stats and (id, document) samples for
+    validate_collection. If the build fails, the new version is deleted.
+    """
+    log = get_dagster_logger()
+    projection_id = projection.id if projection is not None else None
+    live = _live_collection(client, alias, ef, embedding_model, projection_id)
+    existing = existing_hashes(live) if live is not None else {}
+
+    name = version_name(alias, created_at)
+    metadata: dict[str, str] = {MODEL_KEY: embedding_model}
+    if projection is not None:
+        metadata[PROJECTION_KEY] = projection.id
+        encoder = projection.wrap(encoder or ef)
+    collection = client.create_collection(
+        name=name,
+        configuration=hnsw.configuration() if hnsw is not None else None,
+        embedding_function=ef,  # type: ignore[arg-type]
+        metadata=metadata,
+    )
+
+    seen: set[str] = set()
+    embedded = skipped = 0
+    embed_docs = upload_docs = 0
+    embed_seconds = upload_seconds = 0.0
+    candidates: list[tuple[str, str]] = []  # first document of every batch
+    last: tuple[str, str] | None = None
+
+    try:
+        for ids, documents, metadatas in batches:
+            if not ids:
+                continue
+            seen.update(ids)
+            candidates.append((ids[0], documents[0]))
+            last = (ids[-1], documents[-1])
+
+            reused = [
+                i for i, doc_id in enumerate(ids) if existing.get(doc_id) == metadatas[i][HASH_KEY]
+            ]
+            changed = sorted(set(range(len(ids))) - set(reused))
+
+            # reused is empty when there is no live collection
+            for start in range(0, len(reused), batch_size):
+                part = reused[start : start + batch_size]
+                stored = live.get(ids=[ids[i] for i in part], include=["embeddings"])  # type: ignore[union-attr]
+                embedding_by_id = dict(zip(stored["ids"], stored["embeddings"]))  # type: ignore[arg-type]
+                collection.add(
+                    ids=[ids[i] for i in part],
+                    embeddings=[embedding_by_id[ids[i]] for i in part],
+                    documents=[documents[i] for i in part],
+                    metadatas=[metadatas[i] for i in part],
+                )
+
+            if changed:
+                embed, upload = embed_and_upsert(
+                    collection,
+                    [ids[i] for i in changed],
+                    [documents[i] for i in changed],
+                    [metadatas[i] for i in changed],
+                    encoder or ef,
+                    embed_batch_size=embed_batch_size,
+                    upload_batch_size=batch_size,
+                    queue_size=queue_size,
+                )
+                embed_docs += embed.docs
+                embed_seconds += embed.seconds
+                upload_docs += upload.docs
+                upload_seconds += upload.seconds
+            embedded += len(changed)
+            skipped += len(reused)
+    except Exception:
+        # A half-built version is never published: drop it with the error
+        client.delete_collection(name)
+        raise
+
+    samples = [candidates[i] for i in sorted({0, len(candidates) // 2})] if candidates else []
+    if last is not None:
+        samples.append(last)
+
+    stats = RefreshStats(
+        version=name,
+        embedded=embedded,
+        skipped=skipped,
+        deleted=len(existing.keys() - seen),
+        embed_docs_per_sec=StageStats(embed_docs, embed_seconds).docs_per_sec,
+        upload_docs_per_sec=StageStats(upload_docs, upload_seconds).docs_per_sec,
+    )
+    log.info(
+        f"[gold] {name} — {stats.embedded} embedded, {stats.skipped} reused, "
+        f"{stats.deleted} dropped"
+    )
+    return collection, stats, list(dict.fromkeys(samples))
+
+
+def validate_collection(
+    collection: Collection,
+    expected: int,
+    samples: Sequence[tuple[str, str]],
+    encoder: Encoder | None = None,
+    top_k: int = VALIDATION_TOP_K,
+) -> None:
+    """
+    Check a built version before it is published: it holds the expected number
+    of documents, and querying with the text of each (id, document) sample
+    returns it in the top k. Raises ValueError otherwise.
+    Sample texts are embedded by encoder when given (projected collections),
+    by the collection's embedding function otherwise.
+    """
+    if not expected:
+        raise ValueError(f"{collection.name}: refusing to publish an empty collection")
+    count = collection.count()
+    if count != expected:
+        raise ValueError(f"{collection.name}: {count} documents, expected {expected}")
+
+    samples = list(samples)[:VALIDATION_SAMPLES]
+    texts = [document for _, document in samples]
+    results = (
+        collection.query(query_texts=texts, n_results=min(top_k, expected), include=[])
+        if encoder is None
+        else collection.query(
+            query_embeddings=np.asarray(encoder(texts), dtype=np.float32),
+            n_results=min(top_k, expected),
+            include=[],
+        )
+    )
+    for (doc_id, _), found in zip(samples, results["ids"]):
+        if doc_id not in found:
+            raise ValueError(f"{collection.name}: sample query for {doc_id!r} did not find it")
+
+
+def _live_collection(
+    client: ClientAPI,
+    alias: str,
+    ef: SentenceTransformerEmbeddingFunction,
+    embedding_model: str,
+    projection_id: str | None = None,
+) -> Collection | None:
+    """
+    The version the alias points to, if it exists and was built with embedding_model
+    and the same projection.
+    """
+    try:
+        live = client.get_collection(
+            resolve_collection(client, alias),
+            embedding_function=ef,  # type: ignore[arg-type]
+        )
+    except (NotFoundError, ValueError):
+        return None
+    if (live.metadata or {}).get(MODEL_KEY) != embedding_model:
+        get_dagster_logger().info(f"[gold] {alias} — embedding model changed, re-embedding all")
+        return None
+    if (live.metadata or {}).get(PROJECTION_KEY) != projection_id:
+        get_dagster_logger().info(f"[gold] {alias} — projection changed, re-embedding all")
+        return None
+    return live
@@ -0,0 +1,50 @@
+"""
+Bronze download manifest — what was last fetched for each file of a source.
+
+One manifest per source (bdpm, ansm, open_medic) records the ETag, Last-Modified,
+size and SHA-256 of every downloaded file. The downloader uses it to send
+conditional requests and to skip rewriting files whose content did not change.
+"""
+
+from pathlib import Path
+
+from dagster import get_dagster_logger
+from pydantic import BaseModel, Field, ValidationError
+
+MANIFEST_VERSION = 1
+
+
+class ManifestEntry(BaseModel):
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    size_bytes: int
+    sha256: str
+
+
+class BronzeManifest(BaseModel):
+    version: int = MANIFEST_VERSION
+    files: dict[str, ManifestEntry] = Field(default_factory=dict)  # keyed by file name
+
+
+def manifest_path(bronze_dir: Path, source: str) -> Path:
+    return bronze_dir / "_manifest" / f"{source}.json"
+
+
+def load_manifest(path: Path) -> BronzeManifest:
+    """Load a manifest — empty when missing, unreadable or written by another format."""
+    if not path.exists():
+        return BronzeManifest()
+    try:
+        manifest = BronzeManifest.model_validate_json(path.read_text(encoding="utf-8"))
+    except (ValidationError, OSError):
+        get_dagster_logger().warning(f"[bronze] Ignoring unreadable download manifest: {path}")
+        return BronzeManifest()
+    return manifest if manifest.version == MANIFEST_VERSION else BronzeManifest()
+
+
+def save_manifest(manifest: BronzeManifest, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(manifest.model_dump_json(indent=2), encoding="utf-8")
+    tmp_path.replace(path)
@@ -0,0 +1,199 @@
+"""
+Sparse substance × substance interaction matrix, for prescription-wide screening.
+
+Exported from gold_ansm__interaction_closure, so the class expansion is already
+applied: every BDPM active substance gets an id (its index in the sorted list of
+normalized names) and the matrix holds the strongest constraint level of each
+pair as a severity code, 1 (A prendre en compte) to 4 (Contre-indication). Only
+the upper triangle is stored (row id < column id). The matrix is saved as one
+.npz file (INTERACTION_MATRIX_PATH) by the gold_interaction_matrix asset.
+
+screen() checks many substance sets at once: all within-set pairs are generated
+with NumPy, their severities read from the CSR matrix in one vectorized lookup,
+and the maximum severity per set reduced with np.maximum.at.
+"""
+
+import re
+import threading
+import unicodedata
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import Engine, text
+
+SEVERITY_LEVELS = (
+    "",
+    "A prendre en compte",
+    "Précaution d'emploi",
+    "Association déconseillée",
+    "Contre-indication",
+)
+SEVERITY = {level: code for code, level in enumerate(SEVERITY_LEVELS) if level}
+
+# What Postgres regexes match as \s: str.split() would also split on \x1c-\x1f
+_WHITESPACE = re.compile(r"[ \t\n\r\f\v]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    A substance name as keyed in the closure table, step for step the dbt
+    normalize_name macro: NFKD, non-ASCII characters dropped, lowercase, runs of
+    ASCII whitespace collapsed, trimmed. dbt/seeds/normalize_name_cases.csv holds
+    the cases both must agree on.
+    """
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _WHITESPACE.sub(" ", ascii_name.lower()).strip(" ")
+
+
+@dataclass(frozen=True)
+class Screening:
+    """Result of screening n substance sets; pair arrays have one entry per interacting pair."""
+
+    max_severity: np.ndarray  # (n,) int8 — 0 when the set has no interaction
+    set_index: np.ndarray  # set of each pair
+    substance_a: np.ndarray  # substance ids, substance_a < substance_b
+    substance_b: np.ndarray
+    severity: np.ndarray  # int8 severity codes
+
+    def levels(self) -> list[str]:
+        """Constraint level of each set, "" when it has no interaction."""
+        return [SEVERITY_LEVELS[code] for code in self.max_severity]
+
+
+class InteractionMatrix:
+    """Substance ids and the upper-triangular CSR matrix of pair severities."""
+
+    def __init__(self, substances: Sequence[str], severity: sparse.csr_array) -> None:
+        self.substances = np.asarray(substances, dtype=str)
+        self.severity = severity
+        self._ids = {name: i for i, name in enumerate(self.substances.tolist())}
+        self._raw_ids: dict[str, int] = {}  # names as given, before normalization
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[str, str, str]]) -> "InteractionMatrix":
+        """Build from (substance_a, substance_b, niveau_contrainte) rows, keeping the strongest."""
+        strongest: dict[tuple[str, str], int] = {}
+        for a, b, level in pairs:
+            if level not in SEVERITY:
+                raise ValueError(f"Unknown constraint level {level!r}")
+            key = (min(a, b), max(a, b))
+            strongest[key] = max(strongest.get(key, 0), SEVERITY[level])
+        substances = sorted({name for pair in strongest for name in pair})
+        ids = {name: i for i, name in enumerate(substances)}
+        rows = np.fromiter((ids[a] for a, _ in strongest), dtype=np.int32, count=len(strongest))
+        cols = np.fromiter((ids[b] for _, b in strongest), dtype=np.int32, count=len(strongest))
+        data = np.fromiter(strongest.values(), dtype=np.int8, count=len(strongest))
+        n = len(substances)
+        severity = sparse.csr_array((data, (rows, cols)), shape=(n, n))
+        severity.sort_indices()
+        return cls(substances, severity)
+
+    def __len__(self) -> int:
+        return len(self.substances)
+
+    @property
+    def pair_count(self) -> int:
+        return int(self.severity.nnz)
+
+    def ids(self, names: Iterable[str]) -> np.ndarray:
+        """Substance id of each name (normalized), -1 for names without any interaction."""
+        raw_ids = self._raw_ids
+        ids = []
+        for name in names:
+            i = raw_ids.get(name)
+            if i is None:
+                i = raw_ids[name] = self._ids.get(normalize_name(name), -1)
+            ids.append(i)
+        return np.asarray(ids, dtype=np.int64)
+
+    def screen(self, sets: Sequence[Iterable[str]]) -> Screening:
+        """All interacting pairs and the maximum severity of each substance set."""
+        sizes = []
+        names: list[str] = []
+        for substances in sets:
+            before = len(names)
+            names.extend(substances)
+            sizes.append(len(names) - before)
+        set_index = np.repeat(np.arange(len(sets), dtype=np.int64), sizes)
+        return self.screen_ids(set_index, self.ids(names), len(sets))
+
+    def screen_ids(self, set_index: np.ndarray, ids: np.ndarray, n_sets: int) -> Screening:
+        """screen() on flat (set, substance id) arrays; unknown ids (-1) and repeats are ignored."""
+        keep = ids >= 0
+        # One sort on a combined key orders by set then id and drops repeats
+        n = len(self.substances)
+        keys = np.sort(set_index[keep] * n + ids[keep])
+        keys = keys[np.diff(keys, prepend=-1) != 0]
+        set_index, ids = keys // n, keys % n
+
+        counts = np.bincount(set_index, minlength=n_sets)
+        starts = np.cumsum(counts) - counts
+        pair_sets, pair_a, pair_b = [], [], []
+        # Sets of the same size k form an (m, k) block: its pairs are the upper triangle
+        for k in np.unique(counts[counts >= 2]):
+            members = np.nonzero(counts == k)[0]
+            block = ids[starts[members][:, None] + np.arange(k)]
+            ti, tj = np.triu_indices(k, 1)
+            pair_sets.append(np.repeat(members, len(ti)))
+            pair_a.append(block[:, ti].ravel())
+            pair_b.append(block[:, tj].ravel())
+
+        max_severity = np.zeros(n_sets, dtype=np.int8)
+        if not pair_sets:
+            empty = np.empty(0, dtype=np.int64)
+            return Screening(max_severity, empty, empty, empty, np.empty(0, dtype=np.int8))
+        sets_, a, b = np.concatenate(pair_sets), np.concatenate(pair_a), np.concatenate(pair_b)
+        severity = np.asarray(self.severity[a, b], dtype=np.int8).ravel()
+        hit = severity > 0
+        np.maximum.at(max_severity, sets_[hit], severity[hit])
+        return Screening(max_severity, sets_[hit], a[hit], b[hit], severity[hit])
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.tmp.npz")
+        np.savez_compressed(
+            tmp,
+            substances=self.substances,
+            indptr=self.severity.indptr,
+            indices=self.severity.indices,
+            data=self.severity.data,
+        )
+        tmp.replace(path)
+
+
+def read_matrix(path: Path) -> InteractionMatrix:
+    with np.load(path) as data:
+        substances = data["substances"]
+        n = len(substances)
+        severity = sparse.csr_array((data["data"], data["indices"], data["indptr"]), shape=(n, n))
+    return InteractionMatrix(substances.tolist(), severity)
+
+
+_matrices: dict[Path, InteractionMatrix] = {}
+_matrices_lock = threading.Lock()
+
+
+def load_interaction_matrix(path: Path) -> InteractionMatrix:
+    """The matrix saved at path, read once per process."""
+    key = path.resolve()
+    if key not in _matrices:
+        with _matrices_lock:
+            if key not in _matrices:
+                _matrices[key] = read_matrix(path)
+    return _matrices[key]
+
+
+def export_interaction_matrix(engine: Engine, path: Path) -> InteractionMatrix:
+    """Stream gold.gold_ansm__interaction_closure into a matrix saved at path."""
+    sql = (
+        "SELECT substance_a, substance_b, niveau_contrainte "
+        "FROM gold.gold_ansm__interaction_closure"
+    )
+    with engine.connect() as conn:
+        rows = conn.execution_options(stream_results=True).execute(text(sql))
+        matrix = InteractionMatrix.from_pairs((str(a), str(b), str(level)) for a, b, level in rows)
+    matrix.save(path)
+    return matrix
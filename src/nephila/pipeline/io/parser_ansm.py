@@ -3,15 +3,18 @@ ANSM Thésaurus PDF parser.
 Extracts drug interaction records from the official ANSM PDF publication.
 The PDF uses a text-column layout (not structured tables): interactions are
 parsed from raw page text using line-by-line heuristics.
+Lines are streamed page by page into the parsers, so memory stays flat.
 """
 
 import re
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
-import pdfplumber
 from dagster import get_dagster_logger
 
+from nephila.pipeline.io.extractor_pdf import DEFAULT_BACKEND, iter_lines, iter_page_texts
+
 # Constraint level aliases — map normalized forms to canonical labels
 _CONSTRAINT_PATTERNS: list[tuple[re.Pattern[str], str]] = [
     (re.compile(r"\bcontre[-\s]indication\b", re.IGNORECASE), "Contre-indication"),
@@ -27,6 +30,10 @@ _CONSTRAINT_PATTERNS: list[tuple[re.Pattern[str], str]] = [
     (re.compile(r"\bAPEC\b"), "A prendre en compte"),
 ]
 
+# (page index, index among the page's non-empty lines)
+Position = tuple[int, int]
+DOCUMENT_START: Position = (0, 0)
+
 _SUBSTANCE_A_RE = re.compile(r"^[A-ZÀÁÂÄÇÉÈÊËÎÏÔÙÛÜ\s,\'\-/\(\)\.0-9]{3,80}$")
 _CLASS_MEMBERS_RE = re.compile(r"^\((.+,.+)\)$")
 _VOIR_AUSSI_RE = re.compile(r"^[Vv]oir\s+aussi\s*:\s*(.+)$")
@@ -54,70 +61,96 @@ def _is_substance_a(line: str) -> bool:
     return bool(_SUBSTANCE_A_RE.match(line))
 
 
-def parse_thesaurus_pdf(pdf_path: Path) -> list[dict[str, Any]]:
+def iter_positioned_lines(page_texts: Iterable[str]) -> Iterator[tuple[Position, str]]:
+    """Yield (position, line) for the non-empty lines of a stream of page texts."""
+    for page_no, text in enumerate(page_texts):
+        for line_no, line in enumerate(iter_lines([text])):
+            yield (page_no, line_no), line
+
+
+def iter_interactions(
+    lines: Iterable[tuple[Position, str]],
+) -> Iterator[tuple[Position, dict[str, Any]]]:
     """
-    Parse the ANSM Thésaurus PDF and return a list of interaction records.
-    Each record contains: substance_a, substance_b, niveau_contrainte,
-    nature_risque, conduite_a_tenir (always None — not extractable from this layout).
+    Run the interaction state machine over positioned lines.
+    Yields (section, record) where section is the position of the substance A
+    header the record belongs to — DOCUMENT_START for records before any header.
+
+    A substance A header fully resets the state, so any header is a safe point
+    to restart the machine from (see reparser_ansm).
     """
-    log = get_dagster_logger()
-    records: list[dict[str, Any]] = []
+    section: Position = DOCUMENT_START
     current_substance_a: str = "UNKNOWN"
     current_substance_b: str | None = None
     description_lines: list[str] = []
-    pages_processed = 0
 
-    def flush_interaction() -> None:
-        """Emit current substance_b + accumulated description as a record."""
+    def flush_interaction() -> dict[str, Any] | None:
+        """Build a record from current substance_b + accumulated description."""
         if not current_substance_b:
-            return
+            return None
         description = " ".join(description_lines)
         niveau = _detect_constraint(description)
-        if niveau:
-            # Strip the constraint level tokens from the nature_risque text
-            nature = description
-            for pattern, _ in _CONSTRAINT_PATTERNS:
-                nature = pattern.sub("", nature).strip(" -–•")
-            records.append(
-                {
-                    "substance_a": current_substance_a,
-                    "substance_b": current_substance_b,
-                    "niveau_contrainte": niveau,
-                    "nature_risque": nature or None,
-                    "conduite_a_tenir": None,
-                }
-            )
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for raw_line in text.splitlines():
-                line = raw_line.strip()
-                if not line:
-                    continue
-
-                if line.startswith("+"):
-                    # New substance B → flush previous interaction first
-                    flush_interaction()
-                    current_substance_b = line.lstrip("+").strip()
-                    description_lines = []
-
-                elif _is_substance_a(line):
-                    # New substance A section → flush previous interaction
-                    flush_interaction()
-                    current_substance_b = None
-                    description_lines = []
-                    current_substance_a = line
-
-                elif current_substance_b is not None:
-                    # Accumulate description / risk / constraint text
-                    description_lines.append(line)
-
-            # Flush at end of page (interaction may span pages — keep state)
-            pages_processed += 1
+        if not niveau:
+            return None
+        # Strip the constraint level tokens from the nature_risque text
+        nature = description
+        for pattern, _ in _CONSTRAINT_PATTERNS:
+            nature = pattern.sub("", nature).strip(" -–•")
+        return {
+            "substance_a": current_substance_a,
+            "substance_b": current_substance_b,
+            "niveau_contrainte": niveau,
+            "nature_risque": nature or None,
+            "conduite_a_tenir": None,
+        }
+
+    for pos, line in lines:
+        if line.startswith("+"):
+            # New substance B → flush previous interaction first
+            if record := flush_interaction():
+                yield section, record
+            current_substance_b = line.lstrip("+").strip()
+            description_lines = []
+
+        elif _is_substance_a(line):
+            # New substance A section → flush previous interaction
+            if record := flush_interaction():
+                yield section, record
+            current_substance_b = None
+            description_lines = []
+            current_substance_a = line
+            section = pos
+
+        elif current_substance_b is not None:
+            # Accumulate description / risk / constraint text
+            description_lines.append(line)
 
     # Final flush
-    flush_interaction()
+    if record := flush_interaction():
+        yield section, record
+
+
+def parse_thesaurus_pdf(
+    pdf_path: Path, cache_dir: Path | None = None, backend: str = DEFAULT_BACKEND
+) -> list[dict[str, Any]]:
+    """
+    Parse the ANSM Thésaurus PDF and return a list of interaction records.
+    Each record contains: substance_a, substance_b, niveau_contrainte,
+    nature_risque, conduite_a_tenir (always None — not extractable from this layout).
+    Page texts are extracted with the given backend, through cache_dir when set
+    (see extractor_pdf).
+    """
+    log = get_dagster_logger()
+    pages_processed = 0
+
+    def counted_pages() -> Iterator[str]:
+        nonlocal pages_processed
+        for text in iter_page_texts(pdf_path, cache_dir, backend):
+            # Interactions may span pages — state is kept across page boundaries
+            pages_processed += 1
+            yield text
+
+    records = [record for _, record in iter_interactions(iter_positioned_lines(counted_pages()))]
 
     log.info(
         f"[bronze] ANSM parser — {pages_processed} pages, {len(records)} interactions extracted"
@@ -125,7 +158,9 @@ def parse_thesaurus_pdf(pdf_path: Path) -> list[dict[str, Any]]:
     return records
 
 
-def parse_thesaurus_classes(pdf_path: Path) -> list[dict[str, str]]:
+def parse_thesaurus_classes(
+    pdf_path: Path, cache_dir: Path | None = None, backend: str = DEFAULT_BACKEND
+) -> list[dict[str, str]]:
     """
     Parse the ANSM Thésaurus PDF and extract substance→class mappings.
 
@@ -134,6 +169,9 @@ def parse_thesaurus_classes(pdf_path: Path) -> list[dict[str, str]]:
        an all-caps class header → one record per member.
     2. "Voir aussi" lines: ``Voir aussi : antiagrégants plaquettaires`` after a
        substance header → one record per referenced class (split on `` - ``).
+
+    Page texts are extracted with the given backend, through cache_dir when set
+    (see extractor_pdf).
     """
     log = get_dagster_logger()
     records: list[dict[str, str]] = []
@@ -159,50 +197,43 @@ def parse_thesaurus_classes(pdf_path: Path) -> list[dict[str, str]]:
                 )
         paren_buffer = None
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for raw_line in text.splitlines():
-                line = raw_line.strip()
-                if not line:
-                    continue
-
-                # Continue accumulating a multi-line parenthetical list
-                if paren_buffer is not None:
-                    paren_buffer += " " + line
-                    if ")" in line:
-                        _flush_paren_buffer()
-                    continue
-
-                # Start of a parenthetical list (may span multiple lines)
-                if line.startswith("(") and "," in line and current_header:
-                    if line.endswith(")"):
-                        # Single-line list — process immediately
-                        paren_buffer = line
-                        _flush_paren_buffer()
-                    else:
-                        # Multi-line list — start buffering
-                        paren_buffer = line
-                    continue
-
-                # Voir aussi line
-                m_voir = _VOIR_AUSSI_RE.match(line)
-                if m_voir and current_header:
-                    classes_text = m_voir.group(1).strip()
-                    classes = [c.strip() for c in classes_text.split(" - ") if c.strip()]
-                    for cls in classes:
-                        records.append(
-                            {
-                                "substance_dci": current_header.lower(),
-                                "classe_ansm": cls.upper(),
-                                "source": "voir_aussi",
-                            }
-                        )
-                    continue
-
-                # Track current header (all-caps substance/class)
-                if _is_substance_a(line) and not line.startswith("("):
-                    current_header = line
+    for line in iter_lines(iter_page_texts(pdf_path, cache_dir, backend)):
+        # Continue accumulating a multi-line parenthetical list
+        if paren_buffer is not None:
+            paren_buffer += " " + line
+            if ")" in line:
+                _flush_paren_buffer()
+            continue
+
+        # Start of a parenthetical list (may span multiple lines)
+        if line.startswith("(") and "," in line and current_header:
+            if line.endswith(")"):
+                # Single-line list — process immediately
+                paren_buffer = line
+                _flush_paren_buffer()
+            else:
+                # Multi-line list — start buffering
+                paren_buffer = line
+            continue
+
+        # Voir aussi line
+        m_voir = _VOIR_AUSSI_RE.match(line)
+        if m_voir and current_header:
+            classes_text = m_voir.group(1).strip()
+            classes = [c.strip() for c in classes_text.split(" - ") if c.strip()]
+            for cls in classes:
+                records.append(
+                    {
+                        "substance_dci": current_header.lower(),
+                        "classe_ansm": cls.upper(),
+                        "source": "voir_aussi",
+                    }
+                )
+            continue
+
+        # Track current header (all-caps substance/class)
+        if _is_substance_a(line) and not line.startswith("("):
+            current_header = line
 
     log.info(f"[bronze] ANSM class parser — {len(records)} substance-class mappings extracted")
     return records
@@ -0,0 +1,143 @@
+"""
+Decoupled embedding producer for gold uploads.
+
+The gold step computes embeddings itself instead of letting ChromaDB call the
+embedding function 100 documents at a time. Texts are sorted by length and
+encoded in large batches (similar lengths pad less in the transformer) by a
+producer thread; precomputed vectors flow through a bounded queue to the
+uploader, which calls upsert(embeddings=...). Encoding (which releases the GIL)
+and HTTP upload therefore overlap, and the queue bound caps memory held in
+vectors waiting to be sent.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any, cast
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from dagster import get_dagster_logger
+
+# Texts in, one vector per text out (a ChromaDB embedding function fits)
+Encoder = Callable[[list[str]], Any]
+
+EMBED_BATCH_SIZE = 256
+UPLOAD_BATCH_SIZE = 100
+QUEUE_SIZE = 4  # embedded upload batches buffered ahead of the uploader
+
+
+@dataclass(frozen=True)
+class StageStats:
+    docs: int
+    seconds: float  # time spent in the stage itself (not waiting on the other one)
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.docs / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class _Batch:
+    ids: list[str]
+    documents: list[str]
+    metadatas: list[dict[str, Any]]
+    embeddings: np.ndarray
+
+
+_DONE = object()
+
+
+def length_sorted_batches(documents: Sequence[str], batch_size: int) -> Iterator[list[int]]:
+    """Indices of documents, shortest first, in chunks of batch_size."""
+    order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start : start + batch_size]
+
+
+def embed_and_upsert(
+    collection: Collection,
+    ids: Sequence[str],
+    documents: Sequence[str],
+    metadatas: Sequence[dict[str, Any]],
+    encoder: Encoder,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    upload_batch_size: int = UPLOAD_BATCH_SIZE,
+    queue_size: int = QUEUE_SIZE,
+) -> tuple[StageStats, StageStats]:
+    """
+    Embed documents in length-sorted batches on a producer thread and upsert the
+    precomputed vectors from the calling thread. Returns (embed, upload) stats.
+    """
+    log = get_dagster_logger()
+    batches: queue.Queue[object] = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    embed_seconds = 0.0
+    error: list[BaseException] = []
+
+    def put(item: object) -> None:
+        # Gives up once the uploader has stopped, so a failed upload never blocks here
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        nonlocal embed_seconds
+        try:
+            for chunk in length_sorted_batches(documents, embed_batch_size):
+                if stop.is_set():
+                    return
+                start = time.perf_counter()
+                vectors = np.asarray(encoder([documents[i] for i in chunk]), dtype=np.float32)
+                embed_seconds += time.perf_counter() - start
+                for offset in range(0, len(chunk), upload_batch_size):
+                    part = chunk[offset : offset + upload_batch_size]
+                    put(
+                        _Batch(
+                            ids=[ids[i] for i in part],
+                            documents=[documents[i] for i in part],
+                            metadatas=[metadatas[i] for i in part],
+                            embeddings=vectors[offset : offset + upload_batch_size],
+                        )
+                    )
+        except BaseException as exc:  # surfaced by the uploader thread
+            error.append(exc)
+        finally:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name="embedding-producer", daemon=True)
+    producer.start()
+
+    uploaded = 0
+    upload_seconds = 0.0
+    try:
+        while (item := batches.get()) is not _DONE:
+            batch = cast(_Batch, item)
+            start = time.perf_counter()
+            collection.upsert(
+                ids=batch.ids,
+                embeddings=batch.embeddings,
+                documents=batch.documents,
+                metadatas=batch.metadatas,  # type: ignore[arg-type]
+            )
+            upload_seconds += time.perf_counter() - start
+            uploaded += len(batch.ids)
+            log.info(f"[gold] {collection.name} — upserted {uploaded}/{len(ids)} embedded")
+    finally:
+        stop.set()
+        producer.join()
+    if error:
+        raise error[0]
+
+    embed = StageStats(docs=len(ids), seconds=embed_seconds)
+    upload = StageStats(docs=uploaded, seconds=upload_seconds)
+    log.info(
+        f"[gold] {collection.name} — embed {embed.docs_per_sec:.1f} docs/s, "
+        f"upload {upload.docs_per_sec:.1f} docs/s"
+    )
+    return embed, upload
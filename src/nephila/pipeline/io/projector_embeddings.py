@@ -0,0 +1,120 @@
+"""
+Dimensionality reduction of embeddings before they are indexed (EMBEDDING_REDUCTION).
+
+ChromaDB keeps every vector of every collection version as float32 in its HNSW
+segment, so index size and RAM grow with the embedding dimension. A projection
+maps the model's vectors to EMBEDDING_REDUCED_DIM dimensions:
+    pca       centred projection on the top principal components, fitted on a
+              sample of the collection's own document embeddings
+    truncate  the first dimensions, Matryoshka-style — only meaningful for models
+              trained for it (multilingual-e5 is not: compare with the benchmark)
+Projected vectors are re-normalized to unit length, so L2 ranking stays cosine ranking.
+
+A collection built with a projection records its id in its metadata
+(PROJECTION_KEY); the PCA matrices are saved under PROJECTION_DIR, and the agent
+tools load the same projection for their query embeddings. A PCA projection is
+reused by later versions of the alias, so their stored embeddings stay valid.
+scripts/bench_embedding_reduction.py reports recall@k and memory per setting.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from nephila.pipeline.io.producer_embeddings import Encoder
+
+REDUCTIONS = ("none", "pca", "truncate")
+PROJECTION_KEY = "embedding_projection"
+
+
+@dataclass(frozen=True)
+class Projection:
+    id: str  # "truncate256", or "pca256-<hash of the fitted matrix>"
+    method: str
+    dim: int
+    mean: np.ndarray | None = field(default=None, repr=False, compare=False)
+    components: np.ndarray | None = field(default=None, repr=False, compare=False)
+
+    def apply(self, vectors: object) -> np.ndarray:
+        """Project a batch of embeddings (n, source_dim) to unit vectors (n, dim)."""
+        x = np.asarray(vectors, dtype=np.float32)
+        if self.components is not None and self.mean is not None:
+            x = (x - self.mean) @ self.components.T
+        else:
+            x = x[:, : self.dim]
+        return np.asarray(x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12))
+
+    def wrap(self, encoder: Encoder) -> Encoder:
+        """An encoder returning projected embeddings."""
+        return lambda texts: self.apply(encoder(texts))
+
+
+def truncation(dim: int) -> Projection:
+    return Projection(f"truncate{dim}", "truncate", dim)
+
+
+def fit_pca(vectors: object, dim: int) -> Projection:
+    """Fit a PCA projection on sample embeddings; needs at least dim samples."""
+    x = np.asarray(vectors, dtype=np.float32)
+    if not 0 < dim < x.shape[1]:
+        raise ValueError(f"PCA dimension {dim} must be between 1 and {x.shape[1] - 1}")
+    if len(x) < dim:
+        raise ValueError(f"PCA to {dim} dimensions needs at least {dim} samples, got {len(x)}")
+    mean = x.mean(axis=0)
+    _, _, vt = np.linalg.svd(x - mean, full_matrices=False)
+    components = np.ascontiguousarray(vt[:dim], dtype=np.float32)
+    digest = hashlib.sha256(mean.tobytes() + components.tobytes()).hexdigest()[:12]
+    return Projection(f"pca{dim}-{digest}", "pca", dim, mean, components)
+
+
+def make_projection(method: str, dim: int, sample: object | None = None) -> Projection | None:
+    """The projection for EMBEDDING_REDUCTION; PCA is fitted on sample embeddings."""
+    if method not in REDUCTIONS:
+        raise ValueError(f"Unknown embedding reduction {method!r}, expected one of {REDUCTIONS}")
+    if method == "none":
+        return None
+    if method == "truncate":
+        return truncation(dim)
+    if sample is None:
+        raise ValueError("PCA reduction needs sample embeddings to fit on")
+    return fit_pca(sample, dim)
+
+
+def save_projection(projection: Projection, directory: Path) -> None:
+    """Write a PCA projection to directory/{id}.npz (truncations need no file)."""
+    if projection.components is None or projection.mean is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{projection.id}.npz"
+    if not path.exists():
+        tmp = directory / f".{projection.id}.tmp.npz"
+        np.savez(tmp, mean=projection.mean, components=projection.components)
+        tmp.replace(path)
+
+
+_projections: dict[tuple[Path, str], Projection] = {}
+_projections_lock = threading.Lock()
+
+
+def load_projection(directory: Path, projection_id: str) -> Projection:
+    """The projection recorded in a collection's metadata, loaded once per process."""
+    key = (directory, projection_id)
+    if key not in _projections:
+        with _projections_lock:
+            if key not in _projections:
+                _projections[key] = _load(directory, projection_id)
+    return _projections[key]
+
+
+def _load(directory: Path, projection_id: str) -> Projection:
+    if projection_id.startswith("truncate"):
+        return truncation(int(projection_id.removeprefix("truncate")))
+    path = directory / f"{projection_id}.npz"
+    if not path.exists():
+        raise FileNotFoundError(f"Embedding projection {projection_id!r} not found in {directory}")
+    with np.load(path) as data:
+        mean, components = data["mean"], data["components"]
+    return Projection(projection_id, "pca", len(components), mean, components)
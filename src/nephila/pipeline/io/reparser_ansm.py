@@ -0,0 +1,272 @@
+"""
+Incremental re-parse of the ANSM Thésaurus between releases.
+
+The text of every page is hashed and compared with the snapshot of the previous
+release. The interaction state machine is re-run only over windows that start at
+the nearest substance A header before each changed page (a header resets all
+parser state) and stop at the first header after it. Records outside those
+windows are carried over from the snapshot, and the re-parsed windows yield an
+interaction delta: added, removed and changed pairs.
+"""
+
+import gzip
+import json
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from difflib import SequenceMatcher
+from hashlib import sha256
+from pathlib import Path
+from typing import Any
+
+from dagster import get_dagster_logger
+from pydantic import BaseModel, ValidationError
+
+from nephila.models.model_ansm import InteractionChange, InteractionDelta, InteractionRow
+from nephila.pipeline.io.extractor_pdf import (
+    DEFAULT_BACKEND,
+    hash_file,
+    iter_lines,
+    iter_page_texts,
+)
+from nephila.pipeline.io.parser_ansm import (
+    DOCUMENT_START,
+    Position,
+    _is_substance_a,
+    iter_interactions,
+)
+
+SNAPSHOT_VERSION = 1
+
+# A re-parse window: [start, end) — end None means "to the end of the document"
+Window = tuple[Position, Position | None]
+
+
+class SnapshotRecord(BaseModel):
+    section: Position  # position of the substance A header the record belongs to
+    record: dict[str, Any]
+
+
+class ThesaurusSnapshot(BaseModel):
+    """Parse state of one Thésaurus release, enough to re-parse the next one incrementally."""
+
+    version: int = SNAPSHOT_VERSION
+    pdf_sha256: str
+    backend: str
+    page_hashes: list[str]
+    headers: list[Position]  # substance A header positions, in document order
+    records: list[SnapshotRecord]
+
+
+class IncrementalParse(BaseModel):
+    records: list[dict[str, Any]]
+    delta: InteractionDelta
+    snapshot: ThesaurusSnapshot
+    pages_total: int
+    pages_reparsed: int
+
+
+def load_snapshot(path: Path) -> ThesaurusSnapshot | None:
+    """Load a snapshot, or None when missing or written by an older snapshot format."""
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = ThesaurusSnapshot.model_validate_json(f.read())
+    except (ValidationError, OSError, EOFError):
+        get_dagster_logger().warning(f"[bronze] Ignoring unreadable ANSM snapshot: {path}")
+        return None
+    return snapshot if snapshot.version == SNAPSHOT_VERSION else None
+
+
+def save_snapshot(snapshot: ThesaurusSnapshot, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(snapshot.model_dump_json())
+    tmp_path.replace(path)
+
+
+def write_delta(delta: InteractionDelta, changelog_dir: Path, pdf_sha256: str) -> Path:
+    """Write the interaction delta of a release as JSON, named after the PDF hash."""
+    changelog_dir.mkdir(parents=True, exist_ok=True)
+    path = changelog_dir / f"{pdf_sha256[:16]}.json"
+    path.write_text(json.dumps(delta.model_dump(), ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def reparse_thesaurus_pdf(
+    pdf_path: Path,
+    previous: ThesaurusSnapshot | None,
+    cache_dir: Path | None = None,
+    backend: str = DEFAULT_BACKEND,
+) -> IncrementalParse:
+    """
+    Parse pdf_path, re-running the state machine only around pages that changed
+    since the previous snapshot (full parse when previous is None).
+    """
+    log = get_dagster_logger()
+    pdf_sha256 = hash_file(pdf_path)
+
+    if previous and previous.pdf_sha256 == pdf_sha256 and previous.backend == backend:
+        log.info("[bronze] ANSM incremental parser — PDF unchanged, nothing to re-parse")
+        return IncrementalParse(
+            records=[r.record for r in previous.records],
+            delta=InteractionDelta(),
+            snapshot=previous,
+            pages_total=len(previous.page_hashes),
+            pages_reparsed=0,
+        )
+
+    pages = [list(iter_lines([text])) for text in iter_page_texts(pdf_path, cache_dir, backend)]
+    result = reparse_pages(pages, previous, pdf_sha256=pdf_sha256, backend=backend)
+    log.info(
+        f"[bronze] ANSM incremental parser — {result.pages_reparsed}/{result.pages_total} "
+        f"pages re-parsed, +{len(result.delta.added)} -{len(result.delta.removed)} "
+        f"~{len(result.delta.changed)} interactions"
+    )
+    return result
+
+
+def reparse_pages(
+    pages: list[list[str]],
+    previous: ThesaurusSnapshot | None,
+    pdf_sha256: str = "",
+    backend: str = DEFAULT_BACKEND,
+) -> IncrementalParse:
+    """Incremental parse over already-extracted page lines (see reparse_thesaurus_pdf)."""
+    page_hashes = [_hash_page(lines) for lines in pages]
+
+    page_map: dict[int, int] = {}  # unchanged pages: previous index → new index
+    changed: list[tuple[int, int]] = [(0, len(pages))]  # new page ranges [j1, j2)
+    if previous is not None and previous.backend == backend:
+        matcher = SequenceMatcher(None, previous.page_hashes, page_hashes, autojunk=False)
+        changed = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                page_map.update(zip(range(i1, i2), range(j1, j2)))
+            else:
+                changed.append((j1, j2))
+
+    headers = _locate_headers(pages, previous, page_map)
+    windows = _windows(changed, headers)
+
+    # Carry over previous records whose section is on an unchanged page, outside every window
+    kept: list[SnapshotRecord] = []
+    dropped: list[dict[str, Any]] = []
+    for old in previous.records if previous is not None else []:
+        page, line = old.section
+        if page in page_map:
+            section = (page_map[page], line)
+            if not any(_in_window(section, w) for w in windows):
+                kept.append(SnapshotRecord(section=section, record=old.record))
+                continue
+        dropped.append(old.record)
+
+    reparsed: list[SnapshotRecord] = []
+    pages_reparsed: set[int] = set()
+    for window in windows:
+        lines = _window_lines(pages, window)
+        for section, record in iter_interactions(_track_pages(lines, pages_reparsed)):
+            reparsed.append(SnapshotRecord(section=section, record=record))
+
+    # Sections never overlap between kept and re-parsed records: a stable sort restores
+    # document order without reordering records within a section
+    merged = sorted(kept + reparsed, key=lambda r: r.section)
+    snapshot = ThesaurusSnapshot(
+        pdf_sha256=pdf_sha256,
+        backend=backend,
+        page_hashes=page_hashes,
+        headers=headers,
+        records=merged,
+    )
+    return IncrementalParse(
+        records=[r.record for r in merged],
+        delta=_delta(previous, merged, dropped, [r.record for r in reparsed]),
+        snapshot=snapshot,
+        pages_total=len(pages),
+        pages_reparsed=len(pages_reparsed),
+    )
+
+
+def _hash_page(lines: list[str]) -> str:
+    return sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def _locate_headers(
+    pages: list[list[str]], previous: ThesaurusSnapshot | None, page_map: dict[int, int]
+) -> list[Position]:
+    """Substance A header positions — reused from the snapshot on unchanged pages."""
+    headers: list[Position] = []
+    if previous is not None:
+        headers = [(page_map[p], line) for p, line in previous.headers if p in page_map]
+    unchanged = set(page_map.values())
+    for page_no, lines in enumerate(pages):
+        if page_no not in unchanged:
+            headers += [(page_no, i) for i, line in enumerate(lines) if _is_substance_a(line)]
+    return sorted(headers)
+
+
+def _windows(changed: list[tuple[int, int]], headers: list[Position]) -> list[Window]:
+    """Expand changed page ranges to header-bounded windows, merging overlaps."""
+    windows: list[Window] = []
+    for j1, j2 in changed:
+        before = bisect_left(headers, (j1, 0)) - 1
+        after = bisect_left(headers, (j2, 0))
+        start = headers[before] if before >= 0 else DOCUMENT_START
+        end = headers[after] if after < len(headers) else None
+        if windows and (windows[-1][1] is None or start <= windows[-1][1]):
+            # Ranges come in document order, so end never moves backwards
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def _in_window(pos: Position, window: Window) -> bool:
+    start, end = window
+    return start <= pos and (end is None or pos < end)
+
+
+def _window_lines(pages: list[list[str]], window: Window) -> Iterator[tuple[Position, str]]:
+    start, end = window
+    last_page = len(pages) - 1 if end is None else end[0]
+    for page_no in range(start[0], last_page + 1):
+        for line_no, line in enumerate(pages[page_no]):
+            if _in_window((page_no, line_no), window):
+                yield (page_no, line_no), line
+
+
+def _track_pages(
+    lines: Iterable[tuple[Position, str]], seen: set[int]
+) -> Iterator[tuple[Position, str]]:
+    for pos, line in lines:
+        seen.add(pos[0])
+        yield pos, line
+
+
+def _pair(record: dict[str, Any]) -> tuple[str, str]:
+    return record["substance_a"], record["substance_b"]
+
+
+def _delta(
+    previous: ThesaurusSnapshot | None,
+    merged: list[SnapshotRecord],
+    dropped: list[dict[str, Any]],
+    reparsed: list[dict[str, Any]],
+) -> InteractionDelta:
+    """Diff the pairs touched by the re-parse against the full previous and new record sets."""
+    old_all = {_pair(r.record): r.record for r in previous.records} if previous else {}
+    new_all = {_pair(r.record): r.record for r in merged}
+
+    delta = InteractionDelta()
+    for pair in dict.fromkeys([_pair(r) for r in dropped + reparsed]):
+        before, after = old_all.get(pair), new_all.get(pair)
+        if before is None and after is not None:
+            delta.added.append(InteractionRow(**after))
+        elif after is None and before is not None:
+            delta.removed.append(InteractionRow(**before))
+        elif before is not None and after is not None and before != after:
+            delta.changed.append(
+                InteractionChange(before=InteractionRow(**before), after=InteractionRow(**after))
+            )
+    return delta
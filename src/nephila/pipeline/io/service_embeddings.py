@@ -0,0 +1,329 @@
+"""
+Shared embedding service: one model per host, micro-batching queries across agent workers.
+
+Every agent worker otherwise loads its own copy of the model and embeds each
+tool query on its own. The service holds the model once and listens on a Unix
+socket or a localhost TCP port (EMBEDDING_SERVICE). Requests arriving within a
+short window (EMBEDDING_SERVICE_WINDOW_MS), or while the previous batch is
+being encoded, are merged into a single forward pass and the vectors are
+handed back to each caller. Agent workers use it through
+get_embedding_function(..., service=address), which loads no model.
+
+Protocol: one JSON object per line — {"texts": [...]} in,
+{"embeddings": [[...], ...]} or {"error": "..."} out.
+
+Run with:
+    uv run python -m nephila.pipeline.io.service_embeddings
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from nephila.pipeline.io.producer_embeddings import Encoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "unix:data/run/embeddings.sock"
+WINDOW_MS = 2.0
+MAX_BATCH = 64  # texts per forward pass
+STREAM_LIMIT = 1 << 24  # longest request or response line, bytes
+STOP_GRACE_S = 1.0  # on stop, wait this long for busy connections before cancelling them
+
+
+def parse_address(address: str) -> tuple[str, Any]:
+    """'unix:/path/to.sock' → ('unix', path); '[tcp:]host:port' → ('tcp', (host, port))."""
+    if address.startswith("unix:"):
+        return "unix", address.removeprefix("unix:")
+    host, _, port = address.removeprefix("tcp:").rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    texts: int = 0
+    batches: int = 0
+    encode_seconds: float = 0.0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+
+@dataclass
+class _Request:
+    texts: list[str]
+    future: "asyncio.Future[np.ndarray]" = field(repr=False)
+
+
+class MicroBatcher:
+    """Merges concurrent embed() calls into batches for a single encoder thread."""
+
+    def __init__(self, encoder: Encoder, window_ms: float = WINDOW_MS, max_batch: int = MAX_BATCH):
+        self.encoder = encoder
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = BatchStats()
+        self._queue: asyncio.Queue[_Request] = asyncio.Queue()
+        # One thread: the model runs one batch at a time, requests queue up meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-service")
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        future: asyncio.Future[np.ndarray] = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(texts, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = loop.time() + self.window
+            while size < self.max_batch:
+                try:
+                    request = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), remaining)
+                    except TimeoutError:
+                        break
+                batch.append(request)
+                size += len(request.texts)
+            await self._encode(batch)
+
+    async def _encode(self, batch: list[_Request]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        start = time.perf_counter()
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: np.asarray(self.encoder(texts), dtype=np.float32)
+            )
+        except Exception as exc:
+            if len(batch) > 1:
+                # One bad request must not fail the others merged with it: retry each alone
+                for request in batch:
+                    await self._encode([request])
+                return
+            if not batch[0].future.done():
+                batch[0].future.set_exception(exc)
+            return
+        self.stats.encode_seconds += time.perf_counter() - start
+        self.stats.requests += len(batch)
+        self.stats.texts += len(texts)
+        self.stats.batches += 1
+        offset = 0
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(vectors[offset : offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EmbeddingService:
+    """The micro-batching server, run on its own event-loop thread (start / stop)."""
+
+    def __init__(
+        self,
+        address: str,
+        encoder: Encoder,
+        window_ms: float = WINDOW_MS,
+        max_batch: int = MAX_BATCH,
+    ) -> None:
+        self.address = address
+        self._encoder = encoder
+        self._window_ms = window_ms
+        self._max_batch = max_batch
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._ready = threading.Event()
+        self._stopped: asyncio.Event | None = None
+        self._error: BaseException | None = None
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+        self.batcher: MicroBatcher | None = None
+
+    def start(self) -> "EmbeddingService":
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        logger.info(f"Embedding service listening on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+
+    def serve_forever(self) -> None:
+        self.start()
+        self._thread.join()
+
+    def __enter__(self) -> "EmbeddingService":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        try:
+            self._loop.run_until_complete(self._serve())
+        except BaseException as exc:  # surfaced by start()
+            self._error = exc
+            self._ready.set()
+        finally:
+            self._loop.close()
+
+    async def _serve(self) -> None:
+        self._stopped = asyncio.Event()
+        self.batcher = MicroBatcher(self._encoder, self._window_ms, self._max_batch)
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            Path(target).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self._handle, target, limit=STREAM_LIMIT)
+        else:
+            server = await asyncio.start_server(self._handle, *target, limit=STREAM_LIMIT)
+        batching = asyncio.create_task(self.batcher.run())
+        self._ready.set()
+        async with server:
+            await self._stopped.wait()
+            # Server.wait_closed also waits for open connections (Python 3.12+)
+            server.close()
+            await self._close_connections()
+        batching.cancel()
+        self.batcher.close()
+        if kind == "unix":
+            Path(target).unlink(missing_ok=True)
+
+    async def _close_connections(self) -> None:
+        """
+        Close every client socket and wait for the handlers to end. Idle handlers
+        end at their next read; those still busy after STOP_GRACE_S are cancelled.
+        """
+        connections = list(self._connections.items())
+        if not connections:
+            return
+        for _, writer in connections:
+            writer.close()
+        _, busy = await asyncio.wait([task for task, _ in connections], timeout=STOP_GRACE_S)
+        for task in busy:
+            task.cancel()
+        await asyncio.gather(*busy, return_exceptions=True)
+        for _, writer in connections:
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        assert self.batcher is not None
+        task = asyncio.current_task()
+        assert task is not None
+        if self._stopped is None or self._stopped.is_set():
+            writer.close()  # accepted while stopping
+            await writer.wait_closed()
+            return
+        self._connections[task] = writer
+        try:
+            while line := await reader.readline():
+                try:
+                    texts = [str(t) for t in json.loads(line)["texts"]]
+                    vectors = await self.batcher.embed(texts)
+                    reply: dict[str, Any] = {"embeddings": vectors.tolist()}
+                except Exception as exc:
+                    reply = {"error": f"{type(exc).__name__}: {exc}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+
+class EmbeddingServiceClient:
+    """Blocking client, one connection per thread (reconnects after an error)."""
+
+    def __init__(self, address: str, timeout: float = 30.0) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        try:
+            reply = self._request(texts)
+        except OSError:
+            self._close()
+            reply = self._request(texts)  # the service may have restarted
+        if "error" in reply:
+            raise RuntimeError(f"Embedding service {self.address}: {reply['error']}")
+        return np.asarray(reply["embeddings"], dtype=np.float32)
+
+    def _request(self, texts: list[str]) -> dict[str, Any]:
+        stream = self._stream()
+        stream.write(json.dumps({"texts": texts}).encode() + b"\n")
+        stream.flush()
+        line = stream.readline()
+        if not line:
+            raise ConnectionError("embedding service closed the connection")
+        return dict(json.loads(line))
+
+    def _stream(self) -> Any:
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            kind, target = parse_address(self.address)
+            if kind == "unix":
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(target)
+            else:
+                sock = socket.create_connection(target, timeout=self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            stream = sock.makefile("rwb")
+            self._local.stream, self._local.sock = stream, sock
+        return stream
+
+    def _close(self) -> None:
+        for name in ("stream", "sock"):
+            resource = getattr(self._local, name, None)
+            if resource is not None:
+                resource.close()
+                setattr(self._local, name, None)
+
+
+def main() -> None:
+    from nephila.pipeline.config_pipeline import PipelineSettings
+    from nephila.pipeline.io.embedder_local import get_embedding_function
+
+    logging.basicConfig(level=logging.INFO)
+    settings = PipelineSettings()
+    ef = get_embedding_function(
+        settings.embedding_model, settings.embedding_backend, settings.embedding_threads
+    )
+    model = ef._model
+    EmbeddingService(
+        settings.embedding_service or DEFAULT_ADDRESS,
+        lambda texts: model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=ef.normalize_embeddings
+        ),
+        window_ms=settings.embedding_service_window_ms,
+        max_batch=settings.embedding_service_max_batch,
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Content-derived data versions, so unchanged inputs skip downstream work.
+
+Bronze and raw assets publish a DataVersion derived from the bytes they hold
+(the file SHA-256 from the bronze manifest). Dagster records, on every
+materialization, the data versions of the upstream assets it was computed from.
+A downstream asset whose recorded upstream versions all equal the current ones
+re-publishes its previous data version instead of recomputing, and the no-op
+propagates down to gold. The asset's code version must be unchanged too: dbt
+models carry the checksum of their SQL, and Python assets whose output depends
+on settings fold those settings into theirs (settings_code_version).
+"""
+
+import json
+from collections.abc import Iterable
+from hashlib import sha256
+from typing import Any
+
+from dagster import (
+    AssetExecutionContext,
+    AssetKey,
+    DagsterInstance,
+    DataVersion,
+    MaterializeResult,
+)
+from pydantic import ValidationError
+
+from nephila.pipeline.config_pipeline import PipelineSettings
+
+DATA_VERSION_TAG = "dagster/data_version"  # materialization tag holding the data version
+
+
+def content_version(*parts: str) -> DataVersion:
+    """A DataVersion for content identified by one or more hashes (order-sensitive)."""
+    if len(parts) == 1:
+        return DataVersion(parts[0])
+    return DataVersion(sha256("\n".join(parts).encode("utf-8")).hexdigest())
+
+
+def settings_code_version(base: str, settings: dict[str, Any]) -> str:
+    """A code version that also changes whenever one of the given setting values does."""
+    if not settings:
+        return base
+    blob = json.dumps(settings, sort_keys=True, default=str)
+    return f"{base}-{sha256(blob.encode('utf-8')).hexdigest()[:12]}"
+
+
+def settings_values(names: Iterable[str]) -> dict[str, Any]:
+    """Current values of the named settings, {} when the environment is incomplete."""
+    try:
+        settings = PipelineSettings()
+    except ValidationError:
+        return {}
+    return {name: getattr(settings, name) for name in names}
+
+
+def latest_data_version(instance: DagsterInstance, asset_key: AssetKey) -> DataVersion | None:
+    """Data version of the latest materialization of asset_key, or None if never materialized."""
+    event = instance.get_latest_materialization_event(asset_key)
+    materialization = event.asset_materialization if event is not None else None
+    if materialization is None:
+        return None
+    value = (materialization.tags or {}).get(DATA_VERSION_TAG)
+    return DataVersion(value) if value is not None else None
+
+
+def upstream_unchanged(
+    context: AssetExecutionContext, asset_keys: Iterable[AssetKey] | None = None
+) -> bool:
+    """
+    True when every asset in asset_keys (default: all selected) was last materialized
+    by its current code version, from the current data versions of all its upstream assets.
+    """
+    keys = list(asset_keys if asset_keys is not None else context.selected_asset_keys)
+    code_versions = context.assets_def.code_versions_by_key
+    for key in keys:
+        provenance = context.get_asset_provenance(key)
+        if provenance is None or latest_data_version(context.instance, key) is None:
+            return False
+        current = code_versions.get(key)
+        if current is not None and provenance.code_version != current:
+            return False
+        for dep in context.assets_def.asset_deps[key]:
+            recorded = provenance.input_data_versions.get(dep)
+            if recorded is None or recorded != latest_data_version(context.instance, dep):
+                return False
+    return bool(keys)
+
+
+def unchanged_results(
+    context: AssetExecutionContext, asset_keys: Iterable[AssetKey] | None = None
+) -> list[MaterializeResult[Any]]:
+    """Re-publish the previous data version of each asset, marked as skipped."""
+    keys = list(asset_keys if asset_keys is not None else context.selected_asset_keys)
+    context.log.info(f"[versioning] Upstream unchanged — skipping {len(keys)} asset(s)")
+    return [
+        MaterializeResult(
+            asset_key=key,
+            data_version=latest_data_version(context.instance, key),
+            metadata={"skipped": True},
+        )
+        for key in keys
+    ]
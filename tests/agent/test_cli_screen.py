@@ -0,0 +1,138 @@
+"""Batch screening CLI — CIS resolution, per-prescription results, chunked parts and resume."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nephila.agent import cli_screen
+from nephila.agent.cli_screen import CisIndex, screen_chunk, screen_file
+from nephila.pipeline.io.matrix_interactions import InteractionMatrix
+
+PAIRS = [
+    ("amiodarone", "simvastatine", "Contre-indication"),
+    ("amiodarone", "warfarine sodique", "Précaution d'emploi"),
+    ("ibuprofene", "warfarine sodique", "Association déconseillée"),
+]
+
+SUBSTANCES = {
+    60000001: ["AMIODARONE"],
+    60000002: ["SIMVASTATINE"],
+    60000003: ["WARFARINE SODIQUE"],
+    60000004: ["IBUPROFÈNE", "CODÉINE"],  # codéine: no interaction, left out of the index
+    60000005: ["PARACÉTAMOL"],
+}
+
+PRESCRIPTIONS = [
+    ("p1", "60000001;60000002;60000003"),
+    ("p2", "60000004, 60000003"),
+    ("p3", "60000005"),
+    ("p4", "60000001 99999999"),
+    ("p5", ""),
+]
+
+
+@pytest.fixture
+def matrix():
+    return InteractionMatrix.from_pairs(PAIRS)
+
+
+@pytest.fixture
+def matrix_path(tmp_path, matrix):
+    path = tmp_path / "interaction_matrix.npz"
+    matrix.save(path)
+    return path
+
+
+@pytest.fixture
+def prescriptions(tmp_path):
+    path = tmp_path / "prescriptions.csv"
+    pd.DataFrame(PRESCRIPTIONS, columns=["prescription_id", "cis"]).to_csv(path, index=False)
+    return path
+
+
+def read_parts(output):
+    return pd.concat(
+        [pd.read_csv(p, dtype=str, keep_default_na=False) for p in sorted(output.glob("part-*"))],
+        ignore_index=True,
+    )
+
+
+def test_cis_index_keeps_only_interacting_substances(matrix):
+    index = CisIndex.build(SUBSTANCES, matrix)
+    assert index.cis.tolist() == sorted(SUBSTANCES)
+    set_index, ids, found = index.resolve(
+        np.array([0, 0, 1]), np.array([60000004, 60000005, 12345678])
+    )
+    assert found.tolist() == [True, True, False]
+    assert set_index.tolist() == [0]
+    assert matrix.substances[ids].tolist() == ["ibuprofene"]
+
+
+def test_screen_chunk_reports_levels_and_pairs(matrix):
+    index = CisIndex.build(SUBSTANCES, matrix)
+    ids, cis = zip(*PRESCRIPTIONS)
+    frame = screen_chunk(matrix, index, list(ids), list(cis))
+
+    assert frame.columns.tolist() == cli_screen.OUTPUT_COLUMNS
+    assert frame["niveau_contrainte"].tolist() == [
+        "Contre-indication",
+        "Association déconseillée",
+        "",
+        "",
+        "",
+    ]
+    assert frame["interaction_count"].tolist() == [2, 1, 0, 0, 0]
+    # Strongest first
+    assert frame["interactions"][0] == (
+        "amiodarone + simvastatine (Contre-indication) | "
+        "amiodarone + warfarine sodique (Précaution d'emploi)"
+    )
+    assert frame["cis_count"].tolist() == [3, 2, 1, 2, 0]
+    assert frame["unknown_cis"].tolist() == ["", "", "", "99999999", ""]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_screen_file_writes_one_part_per_chunk(tmp_path, prescriptions, matrix_path, workers):
+    output = tmp_path / "results"
+    run = screen_file(prescriptions, output, matrix_path, SUBSTANCES, workers=workers, chunk_size=2)
+
+    assert (run.rows, run.chunks, run.resumed_chunks) == (5, 3, 0)
+    assert sorted(p.name for p in output.glob("part-*")) == [
+        "part-00000.csv",
+        "part-00001.csv",
+        "part-00002.csv",
+    ]
+    results = read_parts(output)
+    assert results["prescription_id"].tolist() == ["p1", "p2", "p3", "p4", "p5"]
+    manifest = json.loads((output / cli_screen.MANIFEST).read_text())
+    assert manifest["chunks"] == {"0": 2, "1": 2, "2": 1}
+
+
+def test_interrupted_run_resumes_at_the_missing_chunks(tmp_path, prescriptions, matrix_path):
+    output = tmp_path / "results"
+    screen_file(prescriptions, output, matrix_path, SUBSTANCES, chunk_size=2)
+    # Interrupted before chunk 1 was recorded: its part may or may not have been written
+    manifest = json.loads((output / cli_screen.MANIFEST).read_text())
+    del manifest["chunks"]["1"]
+    (output / cli_screen.MANIFEST).write_text(json.dumps(manifest))
+    (output / "part-00002.csv").unlink()  # recorded but lost: screened again too
+
+    run = screen_file(prescriptions, output, matrix_path, SUBSTANCES, chunk_size=2)
+
+    assert (run.rows, run.chunks) == (3, 2)
+    assert (run.resumed_rows, run.resumed_chunks) == (2, 1)
+    assert read_parts(output)["prescription_id"].tolist() == ["p1", "p2", "p3", "p4", "p5"]
+
+
+def test_changed_options_do_not_resume(tmp_path, prescriptions, matrix_path):
+    output = tmp_path / "results"
+    screen_file(prescriptions, output, matrix_path, SUBSTANCES, chunk_size=2)
+
+    with pytest.raises(ValueError, match="--fresh"):
+        screen_file(prescriptions, output, matrix_path, SUBSTANCES, chunk_size=3)
+
+    run = screen_file(prescriptions, output, matrix_path, SUBSTANCES, chunk_size=3, fresh=True)
+    assert (run.chunks, run.resumed_chunks) == (2, 0)
+    assert len(list(output.glob("part-*"))) == 2
@@ -6,7 +6,7 @@ import pytest
 
 from nephila.agent import queries
 from nephila.models.model_ansm import InteractionRow
-from nephila.models.model_queries import GeneriqueResult, RcpRow
+from nephila.models.model_queries import DrugCard, GeneriqueResult, RcpRow
 
 
 class TestGetEngine:
@@ -65,6 +65,48 @@ class TestResolveAnsmClassesIntegration:
         assert names == ["fluconazole"]
 
 
+class TestLookupInteraction:
+    def _engine(self, row):
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.execute.return_value.fetchone.return_value = row
+        mock_engine = MagicMock()
+        mock_engine.connect.return_value = mock_conn
+        return mock_engine
+
+    def test_closure_key_matches_the_dbt_normalize_name_macro(self):
+        assert queries.closure_key("  Ibuprofène  ") == "ibuprofene"
+        assert (
+            queries.closure_key("AMIODARONE  (CHLORHYDRATE D')") == "amiodarone (chlorhydrate d')"
+        )
+
+    def test_pair_is_looked_up_in_key_order(self):
+        engine = self._engine(("ANTIVITAMINES K", "AINS", "Association déconseillée", None, None))
+        with patch.object(queries, "_get_engine", return_value=engine):
+            row = queries.lookup_interaction("Warfarine sodique", "IBUPROFÈNE")
+        params = engine.connect.return_value.execute.call_args.args[1]
+        assert params == {"a": "ibuprofene", "b": "warfarine sodique"}
+        assert row == InteractionRow(
+            substance_a="ANTIVITAMINES K",
+            substance_b="AINS",
+            niveau_contrainte="Association déconseillée",
+        )
+
+    def test_same_substance_is_not_looked_up(self):
+        engine = self._engine(None)
+        with patch.object(queries, "_get_engine", return_value=engine):
+            assert queries.lookup_interaction("Warfarine", "WARFARINE") is None
+        engine.connect.assert_not_called()
+
+    def test_missing_table_returns_none(self):
+        """Before the first gold run the table does not exist: fall back, do not fail."""
+        engine = MagicMock()
+        engine.connect.side_effect = Exception("relation does not exist")
+        with patch.object(queries, "_get_engine", return_value=engine):
+            assert queries.lookup_interaction("warfarine", "ibuprofène") is None
+
+
 @pytest.mark.integration
 class TestFindInteractionsIntegration:
     def test_returns_interaction_rows(self):
@@ -103,3 +145,70 @@ class TestGetRcpInfoIntegration:
         rows = queries.get_rcp_info(60001154)
         # May or may not have rows depending on data, but should not error
         assert all(isinstance(r, RcpRow) for r in rows)
+
+
+class TestGetDrugCard:
+    def _engine(self, row):
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.execute.return_value.fetchone.return_value = row
+        mock_engine = MagicMock()
+        mock_engine.connect.return_value = mock_conn
+        return mock_engine
+
+    def test_card_is_validated(self):
+        """The JSONB card is parsed into a DrugCard, missing sections default to empty."""
+        card = {
+            "cis": 60234100,
+            "denomination": "DOLIPRANE 1000 mg, comprimé",
+            "substances": [{"denomination": "PARACÉTAMOL", "dosage": "1000 mg"}],
+            "infos_importantes": [{"date_debut": "2024-01-15", "texte": "Risque de surdosage"}],
+        }
+        with patch.object(queries, "_get_engine", return_value=self._engine((card,))):
+            result = queries.get_drug_card(60234100)
+        assert isinstance(result, DrugCard)
+        assert result.substances[0].dosage == "1000 mg"
+        assert str(result.infos_importantes[0].date_debut) == "2024-01-15"
+        assert result.presentations == []
+
+    def test_unknown_cis_returns_none(self):
+        with patch.object(queries, "_get_engine", return_value=self._engine(None)):
+            assert queries.get_drug_card(99999999) is None
+
+    def test_substance_without_denomination_is_kept(self):
+        card = {"cis": 60234100, "denomination": "X", "substances": [{"dosage": "5 mg"}]}
+        with patch.object(queries, "_get_engine", return_value=self._engine((card,))):
+            result = queries.get_drug_card(60234100)
+        assert result is not None
+        assert result.substances[0].denomination is None
+
+    def test_invalid_card_returns_none(self):
+        with patch.object(queries, "_get_engine", return_value=self._engine(({"cis": "x"},))):
+            assert queries.get_drug_card(60234100) is None
+
+
+@pytest.mark.integration
+class TestGetDrugCardIntegration:
+    def test_returns_card(self):
+        queries._engine = None
+        card = queries.get_drug_card(60001154)
+        assert card is not None
+        assert card.cis == 60001154
+
+
+class TestGetSubstancesByCis:
+    def test_groups_substances_by_cis(self):
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.execute.return_value.fetchall.return_value = [
+            (60000001, "AMIODARONE"),
+            (60000004, "CODÉINE"),
+            (60000004, "IBUPROFÈNE"),
+        ]
+        mock_engine = MagicMock()
+        mock_engine.connect.return_value = mock_conn
+        with patch.object(queries, "_get_engine", return_value=mock_engine):
+            substances = queries.get_substances_by_cis()
+        assert substances == {60000001: ["AMIODARONE"], 60000004: ["CODÉINE", "IBUPROFÈNE"]}
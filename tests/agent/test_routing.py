@@ -21,7 +21,7 @@ class TestRouting:
                 {
                     "id": "1",
                     "name": "search_drug",
-                    "args": {"query": "aspirine"},
+                    "args": {"queries": ["aspirine"]},
                     "type": "tool_call",
                 }
             ],
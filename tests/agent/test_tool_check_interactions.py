@@ -1,9 +1,21 @@
-"""Unit tests for _normalize and _substance_matches_query helpers."""
+"""Unit tests for the check_interactions helpers and its concurrent SQL / vector stages."""
 
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from nephila.agent.tools import tool_check_interactions
 from nephila.agent.tools.tool_check_interactions import (
     _normalize,
     _substance_matches_query,
+    _substance_tokens,
+    _token_filter,
 )
+from nephila.models.model_ansm import InteractionRow
+from nephila.pipeline.io.index_local import LocalCollection
 
 
 class TestNormalize:
@@ -63,3 +75,259 @@ class TestSubstanceMatchesQuery:
     def test_matches_second_query_when_first_fails(self):
         """Matching either query_a or query_b is sufficient."""
         assert _substance_matches_query("WARFARINE", "amiodarone", "warfarine") is True
+
+    def test_matches_a_resolved_class_name(self):
+        """Class names passed after the query names are matched too."""
+        assert _substance_matches_query("ANTIVITAMINES K", "warfarine", "x", "ANTIVITAMINES K")
+
+
+class TestSubstanceTokens:
+    def test_same_tokens_as_the_gold_macro(self):
+        """Lowercase, unaccented, split on non-alphanumerics, short tokens dropped."""
+        assert _substance_tokens(["ANTI-INFLAMMATOIRES NON STÉROÏDIENS", "ANTIVITAMINES K"]) == [
+            "anti",
+            "antivitamines",
+            "inflammatoires",
+            "non",
+            "steroidiens",
+        ]
+
+    def test_tokens_are_deduplicated_across_names(self):
+        assert _substance_tokens(["warfarine", "WARFARINE (voie orale)"]) == [
+            "orale",
+            "voie",
+            "warfarine",
+        ]
+
+
+class TestTokenFilter:
+    def test_single_token_is_a_plain_contains(self):
+        assert _token_filter(["warfarine"]) == {"tokens": {"$contains": "warfarine"}}
+
+    def test_several_tokens_are_ored(self):
+        assert _token_filter(["amiodarone", "warfarine"]) == {
+            "$or": [
+                {"tokens": {"$contains": "amiodarone"}},
+                {"tokens": {"$contains": "warfarine"}},
+            ]
+        }
+
+    def test_no_token_means_no_filter(self):
+        assert _token_filter([]) is None
+
+
+ROW = InteractionRow(
+    substance_a="AMIODARONE",
+    substance_b="SIMVASTATINE",
+    niveau_contrainte="Contre-indication",
+    nature_risque="Risque de rhabdomyolyse",
+)
+VECTOR_HIT = (
+    frozenset(["AMIODARONE", "STATINES"]),
+    "[Précaution d'emploi] AMIODARONE + STATINES\nRisque majoré",
+)
+
+
+@pytest.fixture
+def stages():
+    """Patched class resolution and settings; each test sets the two stages."""
+    settings = SimpleNamespace(interaction_sql_timeout_s=0.5, interaction_vector_timeout_s=0.5)
+    with (
+        patch.object(tool_check_interactions, "PipelineSettings", return_value=settings),
+        patch.object(tool_check_interactions, "resolve_ansm_classes", side_effect=lambda s: [s]),
+        patch.object(tool_check_interactions, "lookup_interaction", return_value=None),
+    ):
+        yield settings
+
+
+def _check(a: str = "amiodarone", b: str = "simvastatine") -> str:
+    return tool_check_interactions.check_interactions.invoke({"substance_a": a, "substance_b": b})
+
+
+class TestVectorStagePrefilter:
+    def _where(self, collection) -> object:
+        collection.query.return_value = {"documents": [[]], "metadatas": [[]]}
+        classes = tool_check_interactions._executor.submit(lambda: (["STATINES"], []))
+        with (
+            patch.object(tool_check_interactions, "get_search_collection", return_value=collection),
+            patch.object(tool_check_interactions, "embed_search_query", return_value=[0.0]),
+        ):
+            tool_check_interactions._vector_stage("amiodarone", "simvastatine", classes)
+        return collection.query.call_args.kwargs["where"]
+
+    def test_local_index_gets_the_token_prefilter(self):
+        where = self._where(MagicMock(spec=LocalCollection))
+        assert where == _token_filter(["amiodarone", "simvastatine", "statines"])
+
+    def test_chroma_collection_is_searched_without_where(self):
+        """ChromaDB scans metadata for $contains: the lexical check filters alone."""
+        assert self._where(MagicMock()) is None
+
+
+class TestConcurrentStages:
+    def test_closure_hit_is_merged_with_the_sql_stage(self, stages):
+        """ILIKE may match entries the closure's whole-token rule misses: both are returned."""
+        class_row = InteractionRow(
+            substance_a="AMIODARONE",
+            substance_b="INHIBITEURS DE L'HMG-COA REDUCTASE",
+            niveau_contrainte="Précaution d'emploi",
+        )
+        with (
+            patch.object(tool_check_interactions, "lookup_interaction", return_value=ROW),
+            patch.object(
+                tool_check_interactions, "find_interactions", return_value=[ROW, class_row]
+            ),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[VECTOR_HIT]),
+        ):
+            result = _check()
+        assert result.startswith(
+            "[Contre-indication] AMIODARONE + SIMVASTATINE\n"
+            "Interaction: AMIODARONE + SIMVASTATINE. Niveau de contrainte: Contre-indication. "
+            "Nature du risque: Risque de rhabdomyolyse\n\n"
+        )
+        assert [line for line in result.splitlines() if line.startswith("[")] == [
+            "[Contre-indication] AMIODARONE + SIMVASTATINE",
+            "[Précaution d'emploi] AMIODARONE + INHIBITEURS DE L'HMG-COA REDUCTASE",
+        ]
+        assert "recherche vectorielle non utilisée" in result
+
+    def test_blocking_closure_lookup_stays_within_the_sql_budget(self, stages):
+        stages.interaction_sql_timeout_s = 0.05
+        release = threading.Event()
+        with (
+            patch.object(
+                tool_check_interactions,
+                "lookup_interaction",
+                side_effect=lambda *_: release.wait(5) and ROW,
+            ),
+            patch.object(tool_check_interactions, "find_interactions", return_value=[ROW]),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[]),
+        ):
+            started = time.monotonic()
+            result = _check()
+            elapsed = time.monotonic() - started
+            release.set()
+        assert elapsed < 1
+        assert result.startswith("[Contre-indication] AMIODARONE + SIMVASTATINE")
+        assert "Note : recherche précalculée interrompue (délai dépassé)." in result
+
+    def test_closure_hit_survives_a_failing_sql_stage(self, stages):
+        with (
+            patch.object(tool_check_interactions, "lookup_interaction", return_value=ROW),
+            patch.object(
+                tool_check_interactions, "find_interactions", side_effect=ConnectionError("pg")
+            ),
+        ):
+            result = _check()
+        assert result.startswith("[Contre-indication] AMIODARONE + SIMVASTATINE")
+        assert "Note : recherche SQL indisponible (erreur)." in result
+
+    def test_sql_hits_skip_the_vector_stage(self, stages):
+        release = threading.Event()
+        with (
+            patch.object(tool_check_interactions, "find_interactions", return_value=[ROW]),
+            patch.object(
+                tool_check_interactions,
+                "_vector_stage",
+                side_effect=lambda *_: release.wait(5) and [VECTOR_HIT],
+            ),
+        ):
+            result = _check()
+            release.set()
+        assert result.startswith("[Contre-indication] AMIODARONE + SIMVASTATINE")
+        assert "STATINES\n" not in result
+        assert "recherche vectorielle non utilisée" in result
+
+    def test_no_sql_hit_returns_the_vector_hits(self, stages):
+        with (
+            patch.object(tool_check_interactions, "find_interactions", return_value=[]),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[VECTOR_HIT]),
+        ):
+            result = _check()
+        assert result == VECTOR_HIT[1]
+
+    def test_slow_sql_stage_times_out_and_vector_hits_are_used(self, stages):
+        stages.interaction_sql_timeout_s = 0.05
+        release = threading.Event()
+        with (
+            patch.object(
+                tool_check_interactions,
+                "find_interactions",
+                side_effect=lambda *_: release.wait(5) and [ROW],
+            ),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[VECTOR_HIT]),
+        ):
+            result = _check()
+            release.set()
+        assert result.startswith(VECTOR_HIT[1])
+        assert "Note : recherche SQL interrompue (délai dépassé)." in result
+
+    def test_no_hit_from_both_stages_is_insufficient_data(self, stages):
+        with (
+            patch.object(tool_check_interactions, "find_interactions", return_value=[]),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[]),
+        ):
+            result = _check()
+        assert "données ANSM insuffisantes pour conclure" in result
+        assert "Note" not in result
+
+    def test_failing_vector_stage_without_hit_is_an_incomplete_check(self, stages):
+        with (
+            patch.object(tool_check_interactions, "find_interactions", return_value=[]),
+            patch.object(
+                tool_check_interactions, "_vector_stage", side_effect=ConnectionError("chroma")
+            ),
+        ):
+            result = _check()
+        assert result.startswith("Vérification incomplète")
+        assert "insuffisantes" not in result
+        assert result.endswith("Note : recherche vectorielle indisponible (erreur).")
+
+    def test_timed_out_sql_stage_without_hit_is_an_incomplete_check(self, stages):
+        stages.interaction_sql_timeout_s = 0.05
+        release = threading.Event()
+        with (
+            patch.object(
+                tool_check_interactions,
+                "find_interactions",
+                side_effect=lambda *_: release.wait(5) and [],
+            ),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[]),
+        ):
+            result = _check()
+            release.set()
+        assert result.startswith("Vérification incomplète")
+        assert "Note : recherche SQL interrompue (délai dépassé)." in result
+
+    def test_class_resolution_counts_against_the_budgets(self, stages):
+        stages.interaction_sql_timeout_s = stages.interaction_vector_timeout_s = 0.05
+        release = threading.Event()
+        with (
+            patch.object(
+                tool_check_interactions,
+                "resolve_ansm_classes",
+                side_effect=lambda s: release.wait(5) and [s],
+            ),
+            patch.object(tool_check_interactions, "find_interactions", return_value=[ROW]),
+            patch.object(tool_check_interactions, "embed_search_query", return_value=[0.0]),
+            patch.object(tool_check_interactions, "get_search_collection"),
+        ):
+            started = time.monotonic()
+            result = _check()
+            elapsed = time.monotonic() - started
+            release.set()
+        assert elapsed < 1
+        assert result.startswith("Vérification incomplète")
+        assert "Note : recherche SQL interrompue (délai dépassé)." in result
+        assert "Note : recherche vectorielle interrompue (délai dépassé)." in result
+
+    def test_notes_are_not_parsed_as_interactions(self, stages):
+        """The guardrail reads '[level] A + B' lines: notes must not start with a bracket."""
+        with (
+            patch.object(tool_check_interactions, "find_interactions", return_value=[ROW]),
+            patch.object(tool_check_interactions, "_vector_stage", return_value=[]),
+        ):
+            result = _check()
+        assert [line for line in result.splitlines() if line.startswith("[")] == [
+            "[Contre-indication] AMIODARONE + SIMVASTATINE"
+        ]
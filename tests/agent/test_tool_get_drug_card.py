@@ -0,0 +1,97 @@
+"""Unit tests for get_drug_card — CIS validation and card formatting, no DB required."""
+
+from unittest.mock import patch
+
+from nephila.agent.tools import tool_get_drug_card
+from nephila.agent.tools.tool_get_drug_card import MAX_GROUP_MEMBERS, format_card, get_drug_card
+from nephila.models.model_queries import DrugCard
+
+CARD = DrugCard.model_validate(
+    {
+        "cis": 60234100,
+        "denomination": "DOLIPRANE 1000 mg, comprimé",
+        "forme_pharma": "comprimé",
+        "voies_admin": "orale",
+        "etat_commercialisation": "Commercialisée",
+        "substances": [
+            {"denomination": "PARACÉTAMOL", "dosage": "1000 mg", "reference_dosage": "un comprimé"}
+        ],
+        "presentations": [
+            {
+                "cip13": "3400935955838",
+                "libelle": "plaquette(s) de 8 comprimé(s)",
+                "taux_remboursement": "65%",
+                "prix": "1,16",
+            }
+        ],
+        "groupes_generiques": [
+            {
+                "id_groupe": "1234",
+                "libelle": "PARACETAMOL 1000 mg",
+                "type_generique": "0",
+                "membres": [
+                    {"cis": 60234100, "denomination": "DOLIPRANE", "type_generique": "0"},
+                    {
+                        "cis": 60000002,
+                        "denomination": "PARACETAMOL BIOGARAN",
+                        "type_generique": "1",
+                    },
+                ],
+            }
+        ],
+        "conditions_delivrance": ["Liste II"],
+        "infos_importantes": [{"date_debut": "2024-01-15", "texte": "Risque de surdosage"}],
+    }
+)
+
+
+class TestGetDrugCardCisValidation:
+    def test_non_digit_cis_returns_error(self):
+        result = get_drug_card.invoke({"cis": "doliprane"})
+        assert "Invalid CIS code" in result
+        assert "search_drug" in result
+
+    def test_unknown_cis(self):
+        with patch.object(tool_get_drug_card, "fetch_drug_card", return_value=None):
+            result = get_drug_card.invoke({"cis": " 99999999 "})
+        assert result.startswith("No drug card found for CIS 99999999")
+
+    def test_one_keyed_read(self):
+        with patch.object(tool_get_drug_card, "fetch_drug_card", return_value=CARD) as fetch:
+            result = get_drug_card.invoke({"cis": " 60234100 "})
+        fetch.assert_called_once_with(60234100)
+        assert result == format_card(CARD)
+
+
+class TestFormatCard:
+    def test_sections(self):
+        assert format_card(CARD).splitlines() == [
+            "CIS 60234100: DOLIPRANE 1000 mg, comprimé — comprimé, orale",
+            "Statut: Commercialisée",
+            "Substances actives: PARACÉTAMOL 1000 mg (un comprimé)",
+            "Conditions de délivrance: Liste II",
+            "Présentations:",
+            "  CIP13 3400935955838: plaquette(s) de 8 comprimé(s) — 1,16 € — remboursé 65%",
+            "Groupe générique 1234 (PARACETAMOL 1000 mg): Princeps",
+            "  CIS 60000002 (Générique): PARACETAMOL BIOGARAN — N/A",
+            "RCP / Important information:",
+            "  (from 2024-01-15) Risque de surdosage",
+        ]
+
+    def test_no_line_looks_like_an_interaction(self):
+        """The guardrail reads '[level] A + B' lines: the card must not produce any."""
+        assert not any(line.lstrip().startswith("[") for line in format_card(CARD).splitlines())
+
+    def test_long_generic_groups_are_capped(self):
+        members = [
+            {"cis": 60000000 + i, "denomination": f"GENERIQUE {i}", "type_generique": "1"}
+            for i in range(MAX_GROUP_MEMBERS + 5)
+        ]
+        card = DrugCard(
+            cis=1,
+            denomination="PRINCEPS",
+            groupes_generiques=[{"id_groupe": "9", "type_generique": "0", "membres": members}],
+        )
+        lines = format_card(card).splitlines()
+        assert lines[-1] == "  … 5 more"
+        assert len([line for line in lines if line.startswith("  CIS")]) == MAX_GROUP_MEMBERS
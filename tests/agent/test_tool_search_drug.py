@@ -0,0 +1,70 @@
+"""Unit tests for search_drug — several queries, one embedding batch and one collection query."""
+
+from unittest.mock import MagicMock, patch
+
+from nephila.agent.tools import tool_search_drug
+from nephila.agent.tools.tool_search_drug import MAX_QUERIES, search_drug
+
+
+def _collection(documents, metadatas):
+    collection = MagicMock()
+    collection.query.return_value = {"documents": documents, "metadatas": metadatas}
+    return collection
+
+
+def _search(collection, queries):
+    with (
+        patch.object(tool_search_drug, "get_search_collection", return_value=collection),
+        patch.object(
+            tool_search_drug,
+            "embed_search_queries",
+            side_effect=lambda texts, _: [[float(len(t))] for t in texts],
+        ) as embed,
+    ):
+        return search_drug.invoke({"queries": queries}), embed
+
+
+class TestSearchDrug:
+    def test_queries_are_embedded_and_searched_together(self):
+        collection = _collection(
+            [["WARFARINE 5 mg"], ["DOLIPRANE 1000 mg"]],
+            [[{"cis": "61111111"}], [{"cis": "60013674"}]],
+        )
+        result, embed = _search(collection, ["warfarine", "paracétamol"])
+
+        embed.assert_called_once_with(["warfarine", "paracétamol"], collection)
+        collection.query.assert_called_once()
+        assert collection.query.call_args.kwargs["query_embeddings"] == [[9.0], [11.0]]
+        assert result == (
+            "## warfarine\n\nCIS 61111111: WARFARINE 5 mg\n\n"
+            "## paracétamol\n\nCIS 60013674: DOLIPRANE 1000 mg"
+        )
+
+    def test_single_query_keeps_the_ungrouped_output(self):
+        collection = _collection([["DOLIPRANE 1000 mg"]], [[{"cis": "60013674"}]])
+        result, _ = _search(collection, ["paracétamol"])
+        assert result == "CIS 60013674: DOLIPRANE 1000 mg"
+
+    def test_duplicate_and_blank_queries_are_dropped(self):
+        collection = _collection([[]], [[]])
+        result, embed = _search(collection, [" aspirine ", "aspirine", "  "])
+        embed.assert_called_once_with(["aspirine"], collection)
+        assert result == "No drugs found for query: 'aspirine'"
+
+    def test_empty_query_list_does_not_search(self):
+        collection = _collection([], [])
+        result, embed = _search(collection, ["  "])
+        assert "at least one drug name" in result
+        embed.assert_not_called()
+        collection.query.assert_not_called()
+
+    def test_queries_past_the_limit_are_listed_as_not_searched(self):
+        queries = [f"drug{i}" for i in range(MAX_QUERIES + 2)]
+        collection = _collection([[]] * MAX_QUERIES, [[]] * MAX_QUERIES)
+        result, embed = _search(collection, queries)
+
+        embed.assert_called_once_with(queries[:MAX_QUERIES], collection)
+        assert result.endswith(
+            f"Note: only the first {MAX_QUERIES} queries were searched. "
+            "Not searched: 'drug10', 'drug11'. Search them in another call."
+        )
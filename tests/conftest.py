@@ -1,3 +1,63 @@
 """Shared pytest configuration and fixtures."""
 # Markers are registered in pyproject.toml [tool.pytest.ini_options].
 # Add shared fixtures here as the test suite grows.
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+
+def _escape_pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_text_pdf(pages: list[list[str]]) -> bytes:
+    """Build a minimal valid PDF with one text line per entry (Helvetica, WinAnsi)."""
+    n = len(pages)
+    font_id = 3 + 2 * n
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode(),
+    ]
+    for i, lines in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        ops += [f"({_escape_pdf_text(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+            ).encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets: list[int] = []
+    for obj_id, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{obj_id} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{off:010d} 00000 n \n".encode() for off in offsets)
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+@pytest.fixture
+def make_pdf(tmp_path: Path) -> Callable[..., Path]:
+    """Factory fixture: write a small text PDF (list of pages, each a list of lines)."""
+
+    def _make(pages: list[list[str]], name: str = "thesaurus.pdf") -> Path:
+        path = tmp_path / name
+        path.write_bytes(build_text_pdf(pages))
+        return path
+
+    return _make
@@ -0,0 +1,83 @@
+"""Collection aliases — resolution, rollback and grace-period garbage collection."""
+
+from datetime import UTC, datetime, timedelta
+
+import chromadb
+import pytest
+
+from nephila.pipeline.io.alias_chroma import (
+    gc_versions,
+    list_versions,
+    resolve_collection,
+    rollback_alias,
+    set_alias,
+    version_name,
+)
+
+ALIAS = "idx_test_v1"
+T0 = datetime(2026, 10, 1, 8, 0, tzinfo=UTC)
+
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+
+
+def _create_versions(client, hours: list[int]) -> list[str]:
+    names = [version_name(ALIAS, T0 + timedelta(hours=h)) for h in hours]
+    for name in names:
+        client.create_collection(name, embedding_function=None)
+    return names
+
+
+class TestResolve:
+    def test_unset_alias_resolves_to_itself(self, client):
+        assert resolve_collection(client, ALIAS) == ALIAS
+
+    def test_set_alias_is_persisted_per_alias(self, client):
+        set_alias(client, ALIAS, "target_a")
+        set_alias(client, "idx_other_v1", "target_b")
+        assert resolve_collection(client, ALIAS) == "target_a"
+        assert resolve_collection(client, "idx_other_v1") == "target_b"
+
+    def test_legacy_unversioned_collection_is_the_oldest_version(self, client):
+        client.create_collection(ALIAS, embedding_function=None)
+        names = _create_versions(client, [0, 1])
+        assert list_versions(client, ALIAS) == [ALIAS, *names]
+
+
+class TestRollback:
+    def test_rollback_steps_back_one_version(self, client):
+        v0, v1, v2 = _create_versions(client, [0, 1, 2])
+        set_alias(client, ALIAS, v2)
+        assert rollback_alias(client, ALIAS) == v1
+        assert rollback_alias(client, ALIAS) == v0
+        with pytest.raises(ValueError, match="No older version"):
+            rollback_alias(client, ALIAS)
+
+
+class TestGarbageCollection:
+    def test_superseded_versions_are_kept_during_grace(self, client):
+        v0, v1, v2 = _create_versions(client, [0, 1, 2])
+        set_alias(client, ALIAS, v2)
+        deleted = gc_versions(
+            client, ALIAS, timedelta(hours=24), keep=0, now=T0 + timedelta(hours=3)
+        )
+        assert deleted == []
+        assert list_versions(client, ALIAS) == [v0, v1, v2]
+
+    def test_old_versions_are_collected_but_rollback_target_kept(self, client):
+        v0, v1, v2 = _create_versions(client, [0, 1, 2])
+        set_alias(client, ALIAS, v2)
+        deleted = gc_versions(
+            client, ALIAS, timedelta(hours=24), keep=1, now=T0 + timedelta(days=3)
+        )
+        assert deleted == [v0]
+        assert list_versions(client, ALIAS) == [v1, v2]
+
+    def test_versions_newer_than_current_are_never_collected(self, client):
+        v0, v1, v2 = _create_versions(client, [0, 1, 2])
+        set_alias(client, ALIAS, v1)  # after a rollback
+        deleted = gc_versions(client, ALIAS, timedelta(hours=1), keep=0, now=T0 + timedelta(days=3))
+        assert deleted == [v0]
+        assert list_versions(client, ALIAS) == [v1, v2]
@@ -0,0 +1,56 @@
+"""Document builders — finished gold rows streamed from a cursor in fixed-size batches."""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+from nephila.pipeline.io.builder_documents import build_interaction_documents
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def attach_gold(dbapi_connection, _):
+        dbapi_connection.execute(f"ATTACH DATABASE '{tmp_path / 'gold.db'}' AS gold")
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE gold.gold_ansm__interaction_document "
+                "(doc_id TEXT, doc_text TEXT, doc_metadata TEXT, content_hash TEXT)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO gold.gold_ansm__interaction_document VALUES (:id, :doc, :meta, :h)"),
+            [
+                {
+                    "id": f"id{i}",
+                    "doc": f"Interaction: SUBSTANCE {i} + WARFARINE",
+                    "meta": json.dumps({"substance_a": f"SUBSTANCE {i}"}),
+                    "h": f"hash{i}",
+                }
+                for i in range(5)
+            ],
+        )
+    return engine
+
+
+def test_documents_are_yielded_in_fixed_size_batches(engine):
+    batches = list(build_interaction_documents(engine, batch_size=2))
+
+    assert [ids for ids, _, _ in batches] == [["id0", "id1"], ["id2", "id3"], ["id4"]]
+    _, documents, metadatas = batches[0]
+    assert documents[0] == "Interaction: SUBSTANCE 0 + WARFARINE"
+    assert metadatas[0] == {"substance_a": "SUBSTANCE 0", "content_hash": "hash0"}
+
+
+def test_builder_is_lazy(engine):
+    batches = build_interaction_documents(engine, batch_size=2)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM gold.gold_ansm__interaction_document"))
+    # The query runs when the first batch is requested, not when the builder is created
+    assert list(batches) == []
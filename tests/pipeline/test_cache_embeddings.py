@@ -0,0 +1,109 @@
+"""On-disk embedding cache — float16 storage, per-model keys, LRU eviction, hit rates."""
+
+import time
+
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.cache_embeddings import EmbeddingCache, cached_encoder
+
+
+class CountingEncoder:
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        self.texts.extend(texts)
+        return np.array([[len(t) / 10, (sum(map(ord, t)) % 97) / 97, 0.5] for t in texts])
+
+
+def test_round_trip_is_float16_and_keyed_by_model(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite")
+    cache.put_many("model-a", ["alpha", "beta"], np.array([[0.1, 0.2], [0.3, 0.4]]))
+
+    alpha, beta, gamma = cache.get_many("model-a", ["alpha", "beta", "gamma"])
+    assert gamma is None
+    assert alpha.dtype == np.float32
+    np.testing.assert_array_equal(alpha, np.array([0.1, 0.2], dtype=np.float16))
+    np.testing.assert_allclose(beta, [0.3, 0.4], atol=1e-3)
+    assert cache.get_many("model-b", ["alpha"]) == [None]
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 2, 2)
+    assert stats.size_bytes == 2 * 2 * 2  # two float16 values per vector
+    assert stats.hit_rate == 0.5
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "emb.sqlite"
+    first = EmbeddingCache(path)
+    first.put_many("m", ["alpha"], np.array([[1.0, 2.0]]))
+    first.close()
+
+    (vector,) = EmbeddingCache(path).get_many("m", ["alpha"])
+    np.testing.assert_array_equal(vector, [1.0, 2.0])
+
+
+def test_cached_encoder_only_encodes_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite")
+    encoder = CountingEncoder()
+    encode = cached_encoder(encoder, cache, "m")
+
+    first = encode(["alpha", "beta"])
+    second = encode(["beta", "gamma", "alpha"])
+
+    assert encoder.texts == ["alpha", "beta", "gamma"]
+    np.testing.assert_array_equal(second[0], first[1])
+    np.testing.assert_array_equal(second[2], first[0])
+    # Fresh vectors are rounded like cached ones: the result never depends on cache state
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first, first.astype(np.float16))
+    assert cache.stats().hit_rate == pytest.approx(2 / 5)
+
+
+def test_evicts_least_recently_used_beyond_max_bytes(tmp_path):
+    vector_bytes = 4 * 2
+    # Room for three vectors, also after trimming to EVICT_TO of max_bytes
+    max_bytes = 3 * vector_bytes + 3
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_bytes=max_bytes)
+    for text in ["a", "b", "c"]:
+        cache.put_many("m", [text], np.ones((1, 4)))
+        time.sleep(0.01)
+    cache.get_many("m", ["a"])  # "a" becomes the most recently used
+    time.sleep(0.01)
+
+    cache.put_many("m", ["d"], np.ones((1, 4)))
+
+    hits = cache.get_many("m", ["a", "b", "c", "d"])
+    assert [v is not None for v in hits] == [True, False, True, True]
+    assert cache.stats().size_bytes <= 3 * vector_bytes
+
+
+def _scanned_size(cache):
+    (size,) = cache._conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+    ).fetchone()
+    return size
+
+
+def test_size_counter_tracks_inserts_replacements_and_evictions(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_bytes=100)
+    cache.put_many("m", ["a", "b"], np.ones((2, 8)))
+    cache.put_many("m", ["a"], np.ones((1, 16)))  # replaced by a longer vector
+    assert cache.stats().size_bytes == _scanned_size(cache) == 16 * 2 + 8 * 2
+
+    cache.put_many("m", ["c", "d"], np.ones((2, 16)))  # past max_bytes: evicts
+    assert cache.stats().size_bytes == _scanned_size(cache) <= 100
+
+
+def test_size_counter_is_initialized_on_files_without_it(tmp_path):
+    path = tmp_path / "emb.sqlite"
+    cache = EmbeddingCache(path)
+    cache.put_many("m", ["a", "b"], np.ones((2, 4)))
+    cache._conn.executescript("DROP TABLE cache_size")
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened.stats().size_bytes == 2 * 4 * 2
+    reopened.put_many("m", ["c"], np.ones((1, 4)))
+    assert reopened.stats().size_bytes == _scanned_size(reopened) == 3 * 4 * 2
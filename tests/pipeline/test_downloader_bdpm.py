@@ -0,0 +1,292 @@
+"""Bronze downloader tests against a local HTTP stand-in for the BDPM / ANSM servers."""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from nephila.pipeline.io.downloader_bdpm import (
+    BDPM_FILES,
+    BDPM_FILES_DIRECT,
+    build_http_client,
+    download_bdpm,
+    download_file,
+    find_ansm_pdf_url,
+)
+from nephila.pipeline.io.manifest_bronze import (
+    BronzeManifest,
+    ManifestEntry,
+    load_manifest,
+    save_manifest,
+)
+
+LAST_MODIFIED = "Mon, 06 Oct 2025 08:00:00 GMT"
+
+
+class StandInServer:
+    """
+    Threaded HTTP server serving in-memory bodies, tracking peak concurrency.
+
+    Bodies carry a strong ETag and a Last-Modified date (unless validators=False),
+    honour If-None-Match and Range/If-Range, and can drop the connection after
+    cut_after bytes to simulate an interrupted transfer.
+    """
+
+    def __init__(self, routes: dict[str, bytes], delay: float = 0.0, validators: bool = True):
+        self.routes = routes
+        self.delay = delay
+        self.validators = validators
+        self.cut_after: dict[str, int] = {}
+        self.active = 0
+        self.peak = 0
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                with server._lock:
+                    server.requests.append((self.path, dict(self.headers)))
+                    server.active += 1
+                    server.peak = max(server.peak, server.active)
+                try:
+                    time.sleep(server.delay)
+                    self._respond(server.routes.get(self.path.split("?")[0]))
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def _respond(self, body):
+                if body is None:
+                    return self._empty(404)
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+                if server.validators and self.headers.get("If-None-Match") == etag:
+                    return self._empty(304, validators)
+
+                status, start = 200, 0
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if range_header and server.validators and if_range in (etag, LAST_MODIFIED):
+                    start = int(range_header.removeprefix("bytes=").rstrip("-"))
+                    if start >= len(body):
+                        return self._empty(416)
+                    status = 206
+
+                payload = body[start:]
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                if server.validators:
+                    for name, value in validators.items():
+                        self.send_header(name, value)
+                self.end_headers()
+                cut = server.cut_after.pop(self.path.split("?")[0], None)
+                if cut is not None:
+                    self.wfile.write(payload[:cut])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(payload)
+
+            def _empty(self, status, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def headers_for(self, path: str) -> list[dict[str, str]]:
+        return [headers for p, headers in self.requests if p.split("?")[0] == path]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _bdpm_routes() -> dict[str, bytes]:
+    routes = {f"/download/file/{name}": f"{name}\t".encode() * 50_000 for name in BDPM_FILES}
+    routes.update({f"/download/{name}": f"{name}\t".encode() * 1000 for name in BDPM_FILES_DIRECT})
+    return routes
+
+
+@pytest.fixture
+def client():
+    with build_http_client(timeout=10) as c:
+        yield c
+
+
+@pytest.fixture
+def bdpm_server():
+    server = StandInServer(_bdpm_routes(), delay=0.2)
+    yield server
+    server.close()
+
+
+class TestDownloadBdpm:
+    def test_downloads_every_file_with_content(self, bdpm_server, client, tmp_path):
+        results = download_bdpm(bdpm_server.url, tmp_path, client=client)
+
+        names = [r.path.name for r in results]
+        assert names == BDPM_FILES + BDPM_FILES_DIRECT
+        routes = _bdpm_routes()
+        for r in results:
+            assert r.path.read_bytes() == routes[r.url.removeprefix(bdpm_server.url)]
+            assert r.size_bytes == r.path.stat().st_size
+            assert r.bytes_per_sec > 0
+        assert not list((tmp_path / "bdpm").glob("*.part"))
+
+    def test_concurrency_limit_is_respected(self, bdpm_server, client, tmp_path):
+        download_bdpm(bdpm_server.url, tmp_path, client=client, max_concurrency=3)
+        assert bdpm_server.peak == 3
+
+    def test_sequential_when_limit_is_one(self, bdpm_server, client, tmp_path):
+        download_bdpm(bdpm_server.url, tmp_path, client=client, max_concurrency=1)
+        assert bdpm_server.peak == 1
+
+    def test_http_error_raises_and_keeps_previous_file(self, bdpm_server, client, tmp_path):
+        dest = tmp_path / "bdpm" / "missing.txt"
+        dest.parent.mkdir()
+        dest.write_bytes(b"previous")
+        with pytest.raises(httpx.HTTPStatusError):
+            download_file(f"{bdpm_server.url}/download/missing.txt", dest, client)
+        assert dest.read_bytes() == b"previous"
+
+
+class TestFindAnsmPdfUrl:
+    def test_relative_thesaurus_link(self, client):
+        page = b'<a href="/uploads/2024/thesaurus-interactions.pdf">PDF</a>'
+        server = StandInServer({"/thesaurus": page})
+        try:
+            url = find_ansm_pdf_url(f"{server.url}/thesaurus", client)
+        finally:
+            server.close()
+        assert url == "https://ansm.sante.fr/uploads/2024/thesaurus-interactions.pdf"
+
+
+class TestConditionalDownloads:
+    def test_second_run_is_conditional_and_unchanged(self, bdpm_server, client, tmp_path):
+        manifest = BronzeManifest()
+        first = download_bdpm(bdpm_server.url, tmp_path, client=client, manifest=manifest)
+        assert not any(r.unchanged for r in first)
+        mtimes = {r.path: r.path.stat().st_mtime_ns for r in first}
+
+        second = download_bdpm(bdpm_server.url, tmp_path, client=client, manifest=manifest)
+
+        assert all(r.unchanged and r.transferred_bytes == 0 for r in second)
+        assert {r.path: r.path.stat().st_mtime_ns for r in second} == mtimes
+        path = "/download/file/CIS_bdpm.txt"
+        assert (
+            bdpm_server.headers_for(path)[-1]["If-None-Match"]
+            == manifest.files["CIS_bdpm.txt"].etag
+        )
+
+    def test_only_changed_file_is_rewritten(self, bdpm_server, client, tmp_path):
+        manifest = BronzeManifest()
+        download_bdpm(bdpm_server.url, tmp_path, client=client, manifest=manifest)
+        old_sha = manifest.files["CIS_CPD_bdpm.txt"].sha256
+        bdpm_server.routes["/download/file/CIS_CPD_bdpm.txt"] = b"nouvelle version"
+
+        results = download_bdpm(bdpm_server.url, tmp_path, client=client, manifest=manifest)
+
+        assert [r.path.name for r in results if not r.unchanged] == ["CIS_CPD_bdpm.txt"]
+        assert (tmp_path / "bdpm" / "CIS_CPD_bdpm.txt").read_bytes() == b"nouvelle version"
+        assert manifest.files["CIS_CPD_bdpm.txt"].sha256 != old_sha
+
+    def test_same_hash_without_validators_skips_write(self, client, tmp_path):
+        server = StandInServer({"/file.txt": b"x" * 10_000}, validators=False)
+        dest = tmp_path / "file.txt"
+        try:
+            first = download_file(f"{server.url}/file.txt", dest, client)
+            mtime = dest.stat().st_mtime_ns
+            second = download_file(f"{server.url}/file.txt", dest, client, previous=first.entry)
+        finally:
+            server.close()
+        assert second.unchanged and second.transferred_bytes == 10_000
+        assert dest.stat().st_mtime_ns == mtime
+        assert not dest.with_name("file.txt.part").exists()
+
+    def test_interrupted_transfer_resumes_with_range(self, client, tmp_path):
+        body = bytes(range(256)) * 4_000
+        server = StandInServer({"/big.bin": body})
+        server.cut_after["/big.bin"] = 300_000
+        dest = tmp_path / "big.bin"
+        try:
+            with pytest.raises(httpx.TransportError):
+                download_file(f"{server.url}/big.bin", dest, client, chunk_size=4096)
+            partial = dest.with_name("big.bin.part").stat().st_size
+            assert 0 < partial <= 300_000
+
+            result = download_file(f"{server.url}/big.bin", dest, client, chunk_size=4096)
+        finally:
+            server.close()
+        assert result.resumed_from == partial
+        assert result.transferred_bytes == len(body) - partial
+        assert dest.read_bytes() == body
+        assert result.entry.sha256 == hashlib.sha256(body).hexdigest()
+        assert not list(tmp_path.glob("*.part*"))
+
+    def test_tokenized_url_is_conditional_and_resumes(self, client, tmp_path):
+        # Open Medic links carry a new token in the query string on every download
+        body = bytes(range(256)) * 4_000
+        server = StandInServer({"/open_medic.zip": body})
+        server.cut_after["/open_medic.zip"] = 300_000
+        dest = tmp_path / "open_medic.zip"
+        try:
+            with pytest.raises(httpx.TransportError):
+                download_file(f"{server.url}/open_medic.zip?token=a", dest, client, chunk_size=4096)
+            resumed = download_file(
+                f"{server.url}/open_medic.zip?token=b", dest, client, chunk_size=4096
+            )
+            again = download_file(
+                f"{server.url}/open_medic.zip?token=c", dest, client, previous=resumed.entry
+            )
+        finally:
+            server.close()
+        assert resumed.resumed_from > 0
+        assert dest.read_bytes() == body
+        assert again.unchanged and again.transferred_bytes == 0
+        assert "If-None-Match" in server.headers_for("/open_medic.zip")[-1]
+
+    def test_resume_restarts_when_upstream_changed(self, client, tmp_path):
+        server = StandInServer({"/big.bin": b"a" * 500_000})
+        server.cut_after["/big.bin"] = 200_000
+        dest = tmp_path / "big.bin"
+        try:
+            with pytest.raises(httpx.TransportError):
+                download_file(f"{server.url}/big.bin", dest, client, chunk_size=4096)
+            server.routes["/big.bin"] = b"b" * 400_000
+            result = download_file(f"{server.url}/big.bin", dest, client, chunk_size=4096)
+        finally:
+            server.close()
+        assert result.resumed_from == 0
+        assert dest.read_bytes() == b"b" * 400_000
+
+
+class TestManifest:
+    def test_roundtrip(self, tmp_path):
+        manifest = BronzeManifest()
+        manifest.files["a.txt"] = ManifestEntry(url="http://x/a.txt", size_bytes=1, sha256="ab")
+        path = tmp_path / "_manifest" / "bdpm.json"
+        save_manifest(manifest, path)
+        assert load_manifest(path) == manifest
+
+    def test_missing_or_corrupt_is_empty(self, tmp_path):
+        assert load_manifest(tmp_path / "missing.json").files == {}
+        corrupt = tmp_path / "corrupt.json"
+        corrupt.write_text("{not json")
+        assert load_manifest(corrupt).files == {}
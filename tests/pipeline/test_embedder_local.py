@@ -0,0 +1,126 @@
+"""Embedding backends — ONNX function stands in for the PyTorch one, ids keep vectors apart."""
+
+import chromadb
+import numpy as np
+import pytest
+
+from nephila.pipeline.io import embedder_local
+from nephila.pipeline.io.cache_embeddings import EmbeddingCache
+from nephila.pipeline.io.embedder_local import (
+    OnnxEmbeddingFunction,
+    embed_queries,
+    embedding_model_id,
+    get_embedding_function,
+)
+
+
+class FakeModel:
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.batches: list[list[str]] = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False):
+        self.batches.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls: list[tuple] = []
+
+    def fake_load(model_name, quantized, threads, onnx_dir):
+        calls.append((model_name, quantized, threads))
+        return FakeModel(f"{model_name}-{quantized}")
+
+    monkeypatch.setattr(embedder_local, "_load_onnx_model", fake_load)
+    monkeypatch.setattr(OnnxEmbeddingFunction, "models", {})
+    return calls
+
+
+def test_model_id_distinguishes_onnx_backends():
+    assert embedding_model_id("e5", "torch") == "e5"
+    assert embedding_model_id("e5", "onnx") == "e5#onnx"
+    assert embedding_model_id("e5", "onnx-int8") == "e5#onnx-int8"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        get_embedding_function("e5", backend="tensorrt")
+
+
+def test_onnx_function_looks_like_the_sentence_transformer_one(loads):
+    ef = get_embedding_function("e5", backend="onnx-int8", threads=2)
+
+    assert isinstance(ef, OnnxEmbeddingFunction)
+    assert ef.name() == "sentence_transformer"
+    assert ef.get_config()["model_name"] == "e5"
+    assert [list(v) for v in ef(["abc"])] == [[3.0, 1.0]]
+    assert loads == [("e5", True, 2)]
+
+
+def test_onnx_config_records_the_quantized_file_and_threads(loads):
+    config = get_embedding_function("e5", backend="onnx-int8", threads=2).get_config()
+    fp32 = get_embedding_function("e5", backend="onnx").get_config()
+
+    assert config["kwargs"]["model_kwargs"]["file_name"] == embedder_local.QUANTIZED_FILE
+    assert config["kwargs"]["config_kwargs"] == {"onnx_threads": 2}
+    assert fp32["kwargs"]["model_kwargs"]["file_name"] == embedder_local.ONNX_FILE
+    OnnxEmbeddingFunction.validate_config(config)  # ChromaDB's schema for the parent
+
+
+def test_chromadb_rebuild_reuses_the_loaded_onnx_model(loads, monkeypatch):
+    import sentence_transformers
+
+    def hub_load(*args, **kwargs):
+        raise AssertionError("the rebuild loaded a second model")
+
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", hub_load)
+    ef = get_embedding_function("e5", backend="onnx-int8", threads=2)
+
+    assert ef.is_legacy() is False
+    rebuilt = ef.build_from_config(ef.get_config())
+    assert isinstance(rebuilt, OnnxEmbeddingFunction)
+    assert rebuilt._model is ef._model
+    collection = chromadb.EphemeralClient().create_collection("rebuild_test", embedding_function=ef)
+    assert collection.configuration["hnsw"]["space"] == "cosine"
+    assert loads == [("e5", True, 2)]
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_vectors_match_pytorch(backend, tmp_path):
+    """Downloads the model and exports it: cosine parity with the PyTorch vectors."""
+    pytest.importorskip("optimum.onnxruntime")
+    model = "intfloat/multilingual-e5-small"
+    texts = [
+        "query: interaction amiodarone simvastatine",
+        "passage: DOLIPRANE 1000 mg, comprimé. Substances actives: PARACÉTAMOL 1000 mg",
+        "passage: Association déconseillée: risque hémorragique avec les antivitamines K",
+    ]
+    reference = np.asarray(get_embedding_function(model)(texts))
+    onnx = OnnxEmbeddingFunction(model, quantized=backend == "onnx-int8", onnx_dir=tmp_path)
+    vectors = np.asarray(onnx(texts))
+
+    cosine = (reference * vectors).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+    )
+    assert cosine.min() > (0.999 if backend == "onnx" else 0.97)
+
+
+def test_onnx_models_are_loaded_once_per_variant(loads):
+    get_embedding_function("e5", backend="onnx")
+    get_embedding_function("e5", backend="onnx")
+    get_embedding_function("e5", backend="onnx-int8")
+
+    assert loads == [("e5", False, 0), ("e5", True, 0)]
+
+
+def test_queries_missing_from_the_cache_are_embedded_in_one_batch(loads, tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    embed_queries("e5", ["ab"], cache, backend="onnx")
+    model = OnnxEmbeddingFunction.models["e5#onnx|0"]
+
+    vectors = embed_queries("e5", ["ab", "abcd", "abc"], cache, backend="onnx")
+
+    assert vectors == [[2.0, 1.0], [4.0, 1.0], [3.0, 1.0]]
+    assert model.batches == [["ab"], ["abcd", "abc"]]
@@ -0,0 +1,157 @@
+"""Unit tests for the cached PDF page-text extractor."""
+
+import gzip
+import json
+
+import pytest
+
+from nephila.pipeline.io import extractor_pdf
+from nephila.pipeline.io.extractor_pdf import (
+    cache_path_for,
+    extract_page_texts,
+    get_text_backend,
+    iter_lines,
+    iter_page_texts,
+    register_text_backend,
+)
+from nephila.pipeline.io.parser_ansm import parse_thesaurus_classes, parse_thesaurus_pdf
+
+PAGES = [
+    ["AMIODARONE", "+ SIMVASTATINE", "Contre-indication", "Risque de rhabdomyolyse"],
+    ["ANTICOAGULANTS ORAUX", "(warfarine, acenocoumarol)", "+ ASPIRINE", "Précaution d'emploi"],
+]
+
+
+class TestExtractPageTexts:
+    def test_without_cache_extracts_every_page(self, make_pdf):
+        texts = extract_page_texts(make_pdf(PAGES))
+        assert len(texts) == 2
+        assert "AMIODARONE" in texts[0]
+        assert "ANTICOAGULANTS ORAUX" in texts[1]
+
+    def test_cold_run_writes_cache_keyed_by_hash_and_page(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        texts = extract_page_texts(pdf, cache_dir)
+
+        cache_path = cache_path_for(pdf, cache_dir)
+        assert cache_path.exists()
+        with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        assert [e["page"] for e in entries] == [0, 1]
+        assert [e["text"] for e in entries] == texts
+
+    def test_warm_run_skips_pdfplumber(self, make_pdf, tmp_path, monkeypatch):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        cold = extract_page_texts(pdf, cache_dir)
+
+        def _fail(_path):
+            raise AssertionError("pdfplumber must not be called on a cache hit")
+
+        monkeypatch.setitem(extractor_pdf._BACKENDS, "pdfplumber", _fail)
+        assert extract_page_texts(pdf, cache_dir) == cold
+
+    def test_changed_pdf_misses_cache(self, make_pdf, tmp_path):
+        cache_dir = tmp_path / "cache"
+        extract_page_texts(make_pdf(PAGES, name="v1.pdf"), cache_dir)
+        texts = extract_page_texts(make_pdf(PAGES[:1], name="v2.pdf"), cache_dir)
+        assert len(texts) == 1
+        assert len(list(cache_dir.glob("*.jsonl.gz"))) == 2
+
+    def test_corrupted_cache_is_re_extracted(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        expected = extract_page_texts(pdf)
+        cache_dir = tmp_path / "cache"
+        cache_path = cache_path_for(pdf, cache_dir)
+        cache_dir.mkdir()
+        # Page 0 is readable, then a page is missing: page 0 must not be yielded twice
+        with gzip.open(cache_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"page": 0, "text": expected[0]}) + "\n")
+            f.write(json.dumps({"page": 2, "text": "x"}) + "\n")
+
+        assert extract_page_texts(pdf, cache_dir) == expected
+        with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+            assert [json.loads(line)["page"] for line in f] == [0, 1]
+
+    def test_unreadable_cache_is_re_extracted(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        cache_path_for(pdf, cache_dir).write_bytes(b"not gzip")
+        assert extract_page_texts(pdf, cache_dir) == extract_page_texts(pdf)
+        assert extract_page_texts(pdf, cache_dir) == extract_page_texts(pdf)
+
+    def test_concurrent_extractions_use_their_own_temp_file(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        first, second = iter_page_texts(pdf, cache_dir), iter_page_texts(pdf, cache_dir)
+        texts = [next(first), next(second)]
+        assert list(first) == list(second) == extract_page_texts(pdf)[1:]
+        assert texts[0] == texts[1]
+        assert [p.name for p in cache_dir.iterdir()] == [cache_path_for(pdf, cache_dir).name]
+
+    def test_interrupted_stream_leaves_no_cache(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        stream = iter_page_texts(pdf, cache_dir)
+        next(stream)
+        stream.close()
+        assert list(cache_dir.iterdir()) == []
+
+
+class TestTextBackends:
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="Unknown PDF text backend"):
+            get_text_backend("tesseract")
+
+    def test_pdfium_matches_pdfplumber_text(self, make_pdf):
+        pdf = make_pdf(PAGES)
+        plumber = extract_page_texts(pdf, backend="pdfplumber")
+        pdfium = extract_page_texts(pdf, backend="pdfium")
+        assert list(iter_lines(pdfium)) == list(iter_lines(plumber))
+
+    def test_cache_is_keyed_per_backend(self, make_pdf, tmp_path):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        extract_page_texts(pdf, cache_dir, backend="pdfplumber")
+        extract_page_texts(pdf, cache_dir, backend="pdfium")
+        assert cache_path_for(pdf, cache_dir, "pdfplumber").exists()
+        assert cache_path_for(pdf, cache_dir, "pdfium").exists()
+
+    def test_registered_backend_is_used(self, make_pdf, monkeypatch):
+        monkeypatch.setattr(extractor_pdf, "_BACKENDS", dict(extractor_pdf._BACKENDS))
+        register_text_backend("fixed", lambda _path: iter(["AMIODARONE\n+ LITHIUM\nCI"]))
+        records = parse_thesaurus_pdf(make_pdf(PAGES), backend="fixed")
+        assert [(r["substance_a"], r["substance_b"]) for r in records] == [
+            ("AMIODARONE", "LITHIUM")
+        ]
+
+
+class TestIterLines:
+    def test_strips_and_skips_blank_lines(self):
+        assert list(iter_lines(["  A \n\n B", "", "C\r\n"])) == ["A", "B", "C"]
+
+    def test_is_lazy(self):
+        def pages():
+            yield "A"
+            raise AssertionError("second page must not be pulled")
+
+        assert next(iter_lines(pages())) == "A"
+
+
+class TestParsersReadCache:
+    @pytest.mark.parametrize("backend", ["pdfplumber", "pdfium"])
+    def test_cached_parse_matches_uncached(self, make_pdf, tmp_path, backend):
+        pdf = make_pdf(PAGES)
+        cache_dir = tmp_path / "cache"
+        assert parse_thesaurus_pdf(pdf, cache_dir, backend) == parse_thesaurus_pdf(pdf)
+        assert parse_thesaurus_classes(pdf, cache_dir, backend) == parse_thesaurus_classes(pdf)
+
+    def test_interactions_extracted(self, make_pdf):
+        records = parse_thesaurus_pdf(make_pdf(PAGES))
+        pairs = {(r["substance_a"], r["substance_b"], r["niveau_contrainte"]) for r in records}
+        assert pairs == {
+            ("AMIODARONE", "SIMVASTATINE", "Contre-indication"),
+            ("ANTICOAGULANTS ORAUX", "ASPIRINE", "Précaution d'emploi"),
+        }
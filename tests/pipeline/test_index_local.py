@@ -0,0 +1,134 @@
+"""Local embedded index — exported versions answer queries like the Chroma collection."""
+
+import chromadb
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.index_local import export_collection, open_local_collection
+
+ALIAS = "idx_test_v1"
+
+
+def _collection(client, name, vectors, space="l2", **metadata):
+    collection = client.create_collection(
+        name,
+        embedding_function=None,
+        metadata={"hnsw:space": space, "embedding_model": "model-a", **metadata},
+    )
+    collection.add(
+        ids=[f"id{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"document {i}" for i in range(len(vectors))],
+        metadatas=[{"rank": i, "parity": i % 2} for i in range(len(vectors))],
+    )
+    return collection
+
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(7).normal(size=(200, 16)).astype(np.float32)
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_same_neighbours_as_chroma(client, tmp_path, vectors, space):
+    collection = _collection(client, f"{ALIAS}__v1", vectors, space)
+    export_collection(collection, tmp_path / "index", ALIAS, page_size=64)
+    local = open_local_collection(tmp_path / "index", ALIAS)
+
+    queries = vectors[:5] + 0.05
+    expected = collection.query(query_embeddings=queries, n_results=5, include=["distances"])
+    found = local.query(query_embeddings=queries, n_results=5, include=["distances"])
+
+    assert local.count() == 200
+    # float32 matrix and squared norms
+    assert local.resident_bytes == 200 * 16 * 4 + 200 * 4
+    assert found["ids"] == expected["ids"]
+    # float16 storage: distances agree to ~1e-3
+    np.testing.assert_allclose(found["distances"], expected["distances"], rtol=1e-2, atol=1e-2)
+    assert found["documents"] is None
+
+
+def test_documents_metadatas_and_where_filter(client, tmp_path, vectors):
+    export_collection(_collection(client, f"{ALIAS}__v1", vectors), tmp_path / "index", ALIAS)
+    local = open_local_collection(tmp_path / "index", ALIAS)
+
+    result = local.query(query_embeddings=[vectors[3]], n_results=3, where={"parity": 0})
+
+    assert result["ids"][0][0] != "id3"
+    assert all(m["parity"] == 0 for m in result["metadatas"][0])
+    top = local.query(query_embeddings=[vectors[3]], n_results=1)
+    assert top["ids"] == [["id3"]] and top["documents"] == [["document 3"]]
+    assert top["metadatas"] == [[{"rank": 3, "parity": 1}]]
+
+
+def test_contains_in_and_or_filters(client, tmp_path, vectors):
+    collection = client.create_collection(f"{ALIAS}__v1", embedding_function=None)
+    collection.add(
+        ids=["a", "b", "c"],
+        embeddings=vectors[:3],
+        metadatas=[
+            {"tokens": ["amiodarone", "simvastatine"], "level": 1},
+            {"tokens": ["warfarine", "fluconazole"], "level": 2},
+            {"tokens": ["amiodarone", "warfarine"], "level": 2},
+        ],
+    )
+    export_collection(collection, tmp_path / "index", ALIAS)
+    local = open_local_collection(tmp_path / "index", ALIAS)
+
+    def ids(where):
+        expected = collection.query(query_embeddings=[vectors[0]], n_results=3, where=where)
+        found = local.query(query_embeddings=[vectors[0]], n_results=3, where=where)
+        assert found["ids"] == expected["ids"]
+        return sorted(found["ids"][0])
+
+    assert ids({"tokens": {"$contains": "warfarine"}}) == ["b", "c"]
+    assert ids(
+        {"$or": [{"tokens": {"$contains": "simvastatine"}}, {"tokens": {"$contains": "x"}}]}
+    ) == ["a"]
+    assert ids({"$and": [{"tokens": {"$contains": "amiodarone"}}, {"level": 2}]}) == ["c"]
+    assert ids({"level": {"$in": [1, 3]}}) == ["a"]
+    assert ids({"tokens": {"$contains": "lithium"}}) == []
+    with pytest.raises(ValueError, match="Unsupported"):
+        local.query(query_embeddings=[vectors[0]], where={"level": {"$gt": 1}})
+
+
+def test_projection_is_exported_in_metadata(client, tmp_path, vectors):
+    collection = _collection(client, f"{ALIAS}__v1", vectors, embedding_projection="truncate16")
+    export_collection(collection, tmp_path / "index", ALIAS)
+
+    local = open_local_collection(tmp_path / "index", ALIAS)
+
+    assert local.metadata["embedding_projection"] == "truncate16"
+    assert local.metadata["embedding_model"] == "model-a"
+
+
+def test_space_is_read_from_the_hnsw_configuration(client, tmp_path, vectors):
+    collection = client.create_collection(
+        f"{ALIAS}__v1", embedding_function=None, configuration={"hnsw": {"space": "ip"}}
+    )
+    collection.add(ids=["a", "b"], embeddings=vectors[:2])
+    export_collection(collection, tmp_path / "index", ALIAS)
+
+    assert open_local_collection(tmp_path / "index", ALIAS).space == "ip"
+
+
+def test_new_export_flips_current_and_prunes_old_versions(client, tmp_path, vectors):
+    index_dir = tmp_path / "index"
+    for version in ("v1", "v2", "v3"):
+        size = {"v1": 10, "v2": 20, "v3": 30}[version]
+        collection = _collection(client, f"{ALIAS}__{version}", vectors[:size])
+        export_collection(collection, index_dir, ALIAS, keep=1)
+        assert open_local_collection(index_dir, ALIAS).count() == size
+
+    versions = sorted(p.name for p in (index_dir / ALIAS).iterdir() if p.is_dir())
+    assert versions == [f"{ALIAS}__v2", f"{ALIAS}__v3"]
+
+
+def test_missing_index_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError, match=ALIAS):
+        open_local_collection(tmp_path, ALIAS)
@@ -0,0 +1,249 @@
+"""Blue/green gold publishing — new versions reuse unchanged embeddings, then flip the alias."""
+
+import hashlib
+from datetime import timedelta
+
+import chromadb
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from nephila.pipeline.io.alias_chroma import (
+    get_aliased_collection,
+    list_versions,
+    resolve_collection,
+    rollback_alias,
+)
+from nephila.pipeline.io.indexer_chroma import (
+    HnswSettings,
+    build_collection_version,
+    existing_hashes,
+    publish_collection,
+    validate_collection,
+)
+from nephila.pipeline.io.projector_embeddings import PROJECTION_KEY, truncation
+
+ALIAS = "idx_test_v1"
+GRACE = timedelta(hours=24)
+
+
+class CountingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic 4-d embeddings; records every text it is asked to embed."""
+
+    def __init__(self) -> None:
+        self.embedded: list[str] = []
+
+    def __call__(self, input: Documents) -> Embeddings:
+        self.embedded.extend(input)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0, 0.5] for text in input]
+
+    @staticmethod
+    def name() -> str:
+        return "counting"
+
+    def get_config(self) -> dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "CountingEmbeddingFunction":
+        return CountingEmbeddingFunction()
+
+
+def content_hash(text: str) -> str:
+    # Stands in for the hash computed by the gold dbt models
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def make_docs(texts: dict[str, str]):
+    ids = list(texts)
+    documents = [texts[i] for i in ids]
+    metadatas = [{"cis": int(i), "content_hash": content_hash(texts[i])} for i in ids]
+    return ids, documents, metadatas
+
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+
+
+@pytest.fixture
+def ef():
+    return CountingEmbeddingFunction()
+
+
+def _publish(client, ef, texts, model="model-a"):
+    return publish_collection(client, ALIAS, ef, model, [make_docs(texts)], grace=GRACE)
+
+
+class TestPublishCollection:
+    def test_first_publish_embeds_everything_and_sets_alias(self, client, ef):
+        stats = _publish(client, ef, {"1": "Doliprane", "2": "Kardegic"})
+        assert (stats.embedded, stats.skipped, stats.deleted) == (2, 0, 0)
+        assert resolve_collection(client, ALIAS) == stats.version
+        assert get_aliased_collection(client, ALIAS, ef).count() == 2
+
+    def test_unchanged_documents_reuse_stored_embeddings(self, client, ef):
+        first = _publish(client, ef, {"1": "Doliprane", "2": "Kardegic"})
+
+        second = _publish(client, ef, {"1": "Doliprane", "2": "Kardegic"})
+
+        assert (second.embedded, second.skipped, second.deleted) == (0, 2, 0)
+        assert second.version != first.version
+        old = client.get_collection(first.version).get(ids=["1"], include=["embeddings"])
+        new = get_aliased_collection(client, ALIAS, ef).get(ids=["1"], include=["embeddings"])
+        assert list(old["embeddings"][0]) == list(new["embeddings"][0])
+
+    def test_changed_new_and_vanished_documents(self, client, ef):
+        _publish(client, ef, {"1": "Doliprane", "2": "Kardegic", "3": "Xanax"})
+
+        stats = _publish(client, ef, {"1": "Doliprane 1000", "2": "Kardegic", "4": "Lyrica"})
+
+        assert (stats.embedded, stats.skipped, stats.deleted) == (2, 1, 1)
+        live = get_aliased_collection(client, ALIAS, ef)
+        assert sorted(live.get()["ids"]) == ["1", "2", "4"]
+        assert live.get(ids=["1"])["documents"] == ["Doliprane 1000"]
+
+    def test_live_version_is_untouched_until_flip(self, client, ef):
+        first = _publish(client, ef, {"1": "Doliprane"})
+        building, _, _ = build_collection_version(
+            client, ALIAS, ef, "model-a", [make_docs({"2": "Xanax"})]
+        )
+        assert building.name != first.version
+        assert resolve_collection(client, ALIAS) == first.version
+        assert get_aliased_collection(client, ALIAS, ef).get()["ids"] == ["1"]
+
+    def test_failed_validation_keeps_alias_and_drops_version(self, client, ef):
+        first = _publish(client, ef, {"1": "Doliprane"})
+        with pytest.raises(ValueError, match="empty"):
+            _publish(client, ef, {})
+        assert resolve_collection(client, ALIAS) == first.version
+        assert list_versions(client, ALIAS) == [first.version]
+
+    def test_failed_build_keeps_alias_and_drops_version(self, client, ef):
+        first = _publish(client, ef, {"1": "Doliprane"})
+
+        def failing_batches():
+            yield make_docs({"1": "Doliprane"})
+            raise RuntimeError("upstream query failed")
+
+        with pytest.raises(RuntimeError, match="upstream query failed"):
+            publish_collection(client, ALIAS, ef, "model-a", failing_batches(), GRACE)
+        assert resolve_collection(client, ALIAS) == first.version
+        assert list_versions(client, ALIAS) == [first.version]
+
+    def test_model_change_re_embeds_everything(self, client, ef):
+        _publish(client, ef, {"1": "Doliprane"})
+        stats = _publish(client, ef, {"1": "Doliprane"}, model="model-b")
+        assert (stats.embedded, stats.skipped) == (1, 0)
+
+    def test_streamed_batches_are_written_one_at_a_time(self, client, ef):
+        _publish(client, ef, {"1": "Doliprane", "2": "Kardegic"})
+        written: list[int] = []
+
+        def batches():
+            for texts in ({"1": "Doliprane", "3": "Xanax"}, {"4": "Lyrica"}, {"5": "Spasfon"}):
+                # Documents already in the version being built when the next batch is read
+                written.append(client.get_collection(list_versions(client, ALIAS)[-1]).count())
+                yield make_docs(texts)
+
+        stats = publish_collection(client, ALIAS, ef, "model-a", batches(), grace=GRACE)
+
+        assert (stats.embedded, stats.skipped, stats.deleted) == (3, 1, 1)
+        assert written == [0, 2, 3]
+        assert get_aliased_collection(client, ALIAS, ef).count() == 4
+
+    def test_projection_reduces_stored_vectors_and_is_part_of_reuse(self, client, ef):
+        texts = {"1": "Doliprane", "2": "Kardegic"}
+        first = publish_collection(
+            client, ALIAS, ef, "model-a", [make_docs(texts)], grace=GRACE, projection=truncation(2)
+        )
+        live = client.get_collection(first.version)
+        assert live.metadata[PROJECTION_KEY] == "truncate2"
+        vectors = live.get(include=["embeddings"])["embeddings"]
+        assert vectors.shape == (2, 2)
+
+        same = publish_collection(
+            client, ALIAS, ef, "model-a", [make_docs(texts)], grace=GRACE, projection=truncation(2)
+        )
+        other = publish_collection(
+            client, ALIAS, ef, "model-a", [make_docs(texts)], grace=GRACE, projection=truncation(3)
+        )
+        assert (same.embedded, same.skipped) == (0, 2)
+        assert (other.embedded, other.skipped) == (2, 0)
+
+    def test_rollback_restores_previous_version(self, client, ef):
+        first = _publish(client, ef, {"1": "Doliprane"})
+        _publish(client, ef, {"1": "Doliprane", "2": "Kardegic"})
+
+        assert rollback_alias(client, ALIAS) == first.version
+        assert get_aliased_collection(client, ALIAS, ef).count() == 1
+
+
+class TestHnswSettings:
+    def test_versions_are_created_with_the_alias_settings(self, client, ef):
+        hnsw = HnswSettings(space="cosine", ef_construction=200, max_neighbors=32, ef_search=64)
+        publish_collection(client, ALIAS, ef, "model-a", [make_docs({"1": "A"})], GRACE, hnsw=hnsw)
+
+        configured = get_aliased_collection(client, ALIAS, ef).configuration_json["hnsw"]
+
+        assert (configured["space"], configured["max_neighbors"]) == ("cosine", 32)
+        assert (configured["ef_construction"], configured["ef_search"]) == (200, 64)
+
+    def test_settings_changes_reuse_stored_embeddings(self, client, ef):
+        _publish(client, ef, {"1": "Doliprane"})
+        stats = publish_collection(
+            client,
+            ALIAS,
+            ef,
+            "model-a",
+            [make_docs({"1": "Doliprane"})],
+            GRACE,
+            hnsw=HnswSettings(max_neighbors=8),
+        )
+        assert (stats.embedded, stats.skipped) == (0, 1)
+
+    def test_unset_settings_keep_chromadb_defaults(self, client, ef):
+        assert HnswSettings().configuration() is None
+        assert HnswSettings(max_neighbors=8).configuration() == {"hnsw": {"max_neighbors": 8}}
+        publish_collection(
+            client, ALIAS, ef, "model-a", [make_docs({"1": "A"})], GRACE, hnsw=HnswSettings()
+        )
+
+        configured = get_aliased_collection(client, ALIAS, ef).configuration_json["hnsw"]
+
+        # The space of the embedding function, as before HNSW settings existed
+        assert configured["space"] == ef.default_space()
+
+    def test_from_mapping_rejects_unknown_keys_and_spaces(self):
+        assert HnswSettings.from_mapping({"ef_search": 20}) == HnswSettings(ef_search=20)
+        with pytest.raises(ValueError, match="Unknown HNSW settings"):
+            HnswSettings.from_mapping({"M": 32})
+        with pytest.raises(ValueError, match="Unknown HNSW space"):
+            HnswSettings(space="manhattan")
+
+
+class TestValidateCollection:
+    def test_count_mismatch_is_rejected(self, client, ef):
+        collection, _, _ = build_collection_version(
+            client, ALIAS, ef, "model-a", [make_docs({"1": "A"})]
+        )
+        with pytest.raises(ValueError, match="expected 2"):
+            validate_collection(collection, 2, [("1", "A"), ("2", "B")])
+
+    def test_sample_query_must_find_its_document(self, client, ef):
+        collection, _, _ = build_collection_version(
+            client, ALIAS, ef, "model-a", [make_docs({"1": "A"})]
+        )
+        # Corrupt the stored vector of "1" so that querying its own text finds "2"
+        collection.update(ids=["1"], embeddings=[[900.0, 0.0, -1.0, 7.0]])
+        collection.add(ids=["2"], embeddings=[[1.0, 65.0, 1.0, 0.5]], documents=["B"])
+        with pytest.raises(ValueError, match="did not find"):
+            validate_collection(collection, 2, [("1", "A"), ("2", "B")], top_k=1)
+
+
+def test_existing_hashes_are_read_across_pages(client, ef):
+    texts = {str(i): f"Medicament {i}" for i in range(1, 11)}
+    stats = publish_collection(
+        client, ALIAS, ef, "model-a", [make_docs(texts)], grace=GRACE, batch_size=4
+    )
+    hashes = existing_hashes(client.get_collection(stats.version), page_size=3)
+    assert len(hashes) == 10 and all(hashes.values())
@@ -0,0 +1,125 @@
+"""Interaction matrix — severity codes, upper-triangular storage, vectorized set screening."""
+
+import csv
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.matrix_interactions import (
+    SEVERITY,
+    InteractionMatrix,
+    load_interaction_matrix,
+    normalize_name,
+    read_matrix,
+)
+
+PAIRS = [
+    ("amiodarone", "simvastatine", "Contre-indication"),
+    ("amiodarone", "warfarine sodique", "Précaution d'emploi"),
+    ("ibuprofene", "warfarine sodique", "Association déconseillée"),
+    ("warfarine sodique", "ibuprofene", "A prendre en compte"),  # mirror, weaker
+    ("ibuprofene", "lithium", "Précaution d'emploi"),
+]
+
+
+@pytest.fixture
+def matrix():
+    return InteractionMatrix.from_pairs(PAIRS)
+
+
+# Shared with the dbt normalize_name__cases test, which runs the macro on the same rows
+NORMALIZE_CASES = Path(__file__).parents[2] / "dbt" / "seeds" / "normalize_name_cases.csv"
+
+
+def _normalize_cases():
+    with NORMALIZE_CASES.open(encoding="utf-8", newline="") as f:
+        return [(row["name"], row["expected"]) for row in csv.DictReader(f)]
+
+
+@pytest.mark.parametrize(("name", "expected"), _normalize_cases())
+def test_normalize_name_matches_the_dbt_macro(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_pairs_are_stored_once_in_the_upper_triangle(matrix):
+    assert len(matrix) == 5
+    assert matrix.pair_count == 4
+    rows, cols = matrix.severity.nonzero()
+    assert (rows < cols).all()
+    a, b = matrix.ids(["warfarine sodique", "ibuprofene"])
+    assert matrix.severity[min(a, b), max(a, b)] == SEVERITY["Association déconseillée"]
+
+
+def test_unknown_constraint_level_is_rejected():
+    with pytest.raises(ValueError, match="Unknown constraint level"):
+        InteractionMatrix.from_pairs([("a", "b", "Déconseillé")])
+
+
+def test_screens_many_sets_at_once(matrix):
+    screening = matrix.screen(
+        [
+            ["Amiodarone", "Simvastatine", "Warfarine sodique"],
+            ["paracetamol", "IBUPROFÈNE"],
+            [],
+            ["lithium", "ibuprofene", "warfarine sodique", "ibuprofene"],
+        ]
+    )
+    assert screening.levels() == [
+        "Contre-indication",
+        "",
+        "",
+        "Association déconseillée",
+    ]
+    found = {
+        (int(s), str(matrix.substances[a]), str(matrix.substances[b]), int(v))
+        for s, a, b, v in zip(
+            screening.set_index, screening.substance_a, screening.substance_b, screening.severity
+        )
+    }
+    assert found == {
+        (0, "amiodarone", "simvastatine", 4),
+        (0, "amiodarone", "warfarine sodique", 2),
+        (3, "ibuprofene", "lithium", 2),
+        (3, "ibuprofene", "warfarine sodique", 3),
+    }
+
+
+def test_screening_without_pairs(matrix):
+    screening = matrix.screen([["amiodarone"], ["inconnu", "autre"]])
+    assert screening.max_severity.tolist() == [0, 0]
+    assert len(screening.set_index) == 0
+    assert matrix.screen([["inconnu"], []]).max_severity.tolist() == [0, 0]
+
+
+def test_matches_pairwise_lookup_on_random_sets():
+    rng = np.random.default_rng(0)
+    names = [f"s{i:03d}" for i in range(200)]
+    levels = list(SEVERITY)
+    pairs = {}
+    for _ in range(800):
+        a, b = sorted(rng.choice(200, size=2, replace=False))
+        pairs[(names[a], names[b])] = levels[rng.integers(4)]
+    matrix = InteractionMatrix.from_pairs((a, b, lvl) for (a, b), lvl in pairs.items())
+    sets = [list(rng.choice(names, size=rng.integers(0, 20))) for _ in range(300)]
+
+    expected = []
+    for substances in sets:
+        unique = sorted(set(substances))
+        codes = [
+            SEVERITY[pairs[(a, b)]]
+            for i, a in enumerate(unique)
+            for b in unique[i + 1 :]
+            if (a, b) in pairs
+        ]
+        expected.append(max(codes, default=0))
+    assert matrix.screen(sets).max_severity.tolist() == expected
+
+
+def test_save_and_load_round_trip(matrix, tmp_path):
+    path = tmp_path / "gold" / "interaction_matrix.npz"
+    matrix.save(path)
+    loaded = read_matrix(path)
+    assert loaded.substances.tolist() == matrix.substances.tolist()
+    assert (loaded.severity != matrix.severity).nnz == 0
+    assert load_interaction_matrix(path) is load_interaction_matrix(path)
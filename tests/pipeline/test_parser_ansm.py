@@ -10,6 +10,7 @@ from nephila.pipeline.io.parser_ansm import (
     _detect_constraint,
     _is_substance_a,
     parse_thesaurus_classes,
+    parse_thesaurus_pdf,
 )
 
 
@@ -147,3 +148,17 @@ class TestParseThesaurusClasses:
         records = parse_thesaurus_classes(Path("data/bronze/ansm/thesaurus.pdf"))
         sources = {r["source"] for r in records}
         assert sources == {"parenthetical", "voir_aussi"}
+
+
+@pytest.mark.integration
+class TestTextBackendParity:
+    """The pdfium backend must yield the same records as pdfplumber on the real PDF."""
+
+    PDF = Path("data/bronze/ansm/thesaurus.pdf")
+
+    def test_interaction_records_match(self):
+        assert parse_thesaurus_pdf(self.PDF, backend="pdfium") == parse_thesaurus_pdf(self.PDF)
+
+    def test_class_records_match(self):
+        pdfium = parse_thesaurus_classes(self.PDF, backend="pdfium")
+        assert pdfium == parse_thesaurus_classes(self.PDF)
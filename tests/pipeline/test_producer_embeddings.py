@@ -0,0 +1,136 @@
+"""Embedding producer — length-sorted batches, bounded queue, overlapping stages."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.producer_embeddings import embed_and_upsert, length_sorted_batches
+
+
+def _vector(text: str) -> list[float]:
+    return [float(len(text)), float(sum(map(ord, text)) % 101)]
+
+
+class RecordingEncoder:
+    def __init__(self, delay: float = 0.0, fail_on_call: int | None = None):
+        self.delay = delay
+        self.fail_on_call = fail_on_call
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]):
+        self.calls.append(texts)
+        if self.fail_on_call is not None and len(self.calls) == self.fail_on_call:
+            raise RuntimeError("encoder failed")
+        time.sleep(self.delay)
+        return np.array([_vector(t) for t in texts])
+
+
+class FakeCollection:
+    name = "idx_fake"
+
+    def __init__(self, delay: float = 0.0, fail_after: int | None = None):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.rows: dict[str, tuple[list[float], str, dict]] = {}
+        self.calls = 0
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ConnectionError("chroma unavailable")
+        time.sleep(self.delay)
+        for row in zip(ids, embeddings, documents, metadatas):
+            self.rows[row[0]] = (list(row[1]), row[2], row[3])
+
+
+def _docs(n: int):
+    documents = [f"doc {'x' * ((i * 7) % 23)} {i}" for i in range(n)]
+    ids = [str(i) for i in range(n)]
+    metadatas = [{"i": i} for i in range(n)]
+    return ids, documents, metadatas
+
+
+def test_length_sorted_batches_cover_every_index_shortest_first():
+    documents = ["ccc", "a", "bb", "dddd", ""]
+    batches = list(length_sorted_batches(documents, 2))
+    assert batches == [[4, 1], [2, 0], [3]]
+
+
+class TestEmbedAndUpsert:
+    def test_every_document_is_upserted_with_its_own_vector(self):
+        ids, documents, metadatas = _docs(250)
+        collection, encoder = FakeCollection(), RecordingEncoder()
+
+        embed, upload = embed_and_upsert(
+            collection,
+            ids,
+            documents,
+            metadatas,
+            encoder,
+            embed_batch_size=64,
+            upload_batch_size=20,
+        )
+
+        assert embed.docs == upload.docs == 250
+        assert [len(c) for c in encoder.calls] == [64, 64, 64, 58]
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            assert collection.rows[doc_id] == (_vector(document), document, metadata)
+
+    def test_encoder_sees_length_sorted_batches(self):
+        ids, documents, metadatas = _docs(100)
+        encoder = RecordingEncoder()
+        embed_and_upsert(FakeCollection(), ids, documents, metadatas, encoder, embed_batch_size=30)
+        lengths = [len(t) for call in encoder.calls for t in call]
+        assert lengths == sorted(lengths)
+
+    def test_embedding_and_upload_overlap(self):
+        ids, documents, metadatas = _docs(60)
+        collection = FakeCollection(delay=0.1)
+        encoder = RecordingEncoder(delay=0.1)
+
+        start = time.perf_counter()
+        embed_and_upsert(
+            collection,
+            ids,
+            documents,
+            metadatas,
+            encoder,
+            embed_batch_size=10,
+            upload_batch_size=10,
+        )
+        elapsed = time.perf_counter() - start
+
+        # 6 encode + 6 upload steps of 0.1s: 1.2s sequential, ~0.7s pipelined
+        assert elapsed < 1.0
+        assert encoder.calls and collection.calls == 6
+
+    def test_encoder_error_is_raised(self):
+        ids, documents, metadatas = _docs(50)
+        with pytest.raises(RuntimeError, match="encoder failed"):
+            embed_and_upsert(
+                FakeCollection(),
+                ids,
+                documents,
+                metadatas,
+                RecordingEncoder(fail_on_call=2),
+                embed_batch_size=10,
+            )
+
+    def test_upload_error_stops_the_producer(self):
+        ids, documents, metadatas = _docs(500)
+        encoder = RecordingEncoder()
+        with pytest.raises(ConnectionError):
+            embed_and_upsert(
+                FakeCollection(fail_after=1),
+                ids,
+                documents,
+                metadatas,
+                encoder,
+                embed_batch_size=10,
+                upload_batch_size=10,
+                queue_size=2,
+            )
+        assert len(encoder.calls) < 10
+        assert not [t for t in threading.enumerate() if t.name == "embedding-producer"]
@@ -0,0 +1,65 @@
+"""Embedding projections — reduced vectors keep neighbours, and load back identically."""
+
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.projector_embeddings import (
+    fit_pca,
+    load_projection,
+    make_projection,
+    save_projection,
+    truncation,
+)
+
+
+@pytest.fixture
+def low_rank():
+    # 300 unit vectors in 64 dimensions spanning an 8-d subspace
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(300, 8)) @ rng.normal(size=(8, 64))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _top(vectors, queries, k=5):
+    return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+
+def test_pca_keeps_nearest_neighbours(low_rank):
+    projection = fit_pca(low_rank, 8)
+    reduced = projection.apply(low_rank)
+
+    assert reduced.shape == (300, 8)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+    # A centred projection changes cosines slightly; most neighbours are kept
+    overlap = np.mean(
+        [len(set(a) & set(b)) / 5 for a, b in zip(_top(low_rank, low_rank), _top(reduced, reduced))]
+    )
+    assert overlap > 0.8
+
+
+def test_truncation_keeps_leading_dimensions():
+    projected = truncation(2).apply([[3.0, 4.0, 100.0]])
+    assert projected[0].tolist() == pytest.approx([0.6, 0.8])
+
+
+def test_pca_is_saved_and_loaded_by_id(low_rank, tmp_path):
+    projection = fit_pca(low_rank, 4)
+    save_projection(projection, tmp_path)
+
+    loaded = load_projection(tmp_path, projection.id)
+
+    assert loaded.id.startswith("pca4-")
+    assert np.allclose(loaded.apply(low_rank[:3]), projection.apply(low_rank[:3]))
+    assert load_projection(tmp_path, "truncate16").dim == 16
+    with pytest.raises(FileNotFoundError):
+        load_projection(tmp_path, "pca4-000000000000")
+
+
+def test_make_projection_checks_its_settings(low_rank):
+    assert make_projection("none", 8) is None
+    with pytest.raises(ValueError, match="Unknown embedding reduction"):
+        make_projection("umap", 8)
+    with pytest.raises(ValueError, match="sample"):
+        make_projection("pca", 8)
+    with pytest.raises(ValueError, match="at least 32 samples"):
+        make_projection("pca", 32, low_rank[:10])
@@ -0,0 +1,144 @@
+"""Unit tests for the incremental Thésaurus re-parse — output must equal a full parse."""
+
+import random
+
+import pytest
+
+from nephila.pipeline.io.parser_ansm import iter_interactions, iter_positioned_lines
+from nephila.pipeline.io.reparser_ansm import (
+    load_snapshot,
+    reparse_pages,
+    reparse_thesaurus_pdf,
+    save_snapshot,
+    write_delta,
+)
+
+# Full-word levels only: all-caps aliases (CI, ASDEC…) would read as substance A headers
+LEVELS = [
+    "Contre-indication",
+    "Association déconseillée",
+    "Précaution d'emploi",
+    "A prendre en compte",
+]
+SUBSTANCES_A = ["AMIODARONE", "ANTICOAGULANTS ORAUX", "LITHIUM", "MILLEPERTUIS", "VERAPAMIL"]
+
+
+def _release(n_pages: int = 12, seed: int = 0) -> list[list[str]]:
+    """A synthetic Thésaurus: substance A sections whose interactions span page breaks."""
+    rng = random.Random(seed)
+    lines: list[str] = ["THESAURUS DES INTERACTIONS", "1"]
+    for i in range(n_pages * 2):
+        lines.append(f"{SUBSTANCES_A[i % len(SUBSTANCES_A)]} {i}")
+        for j in range(rng.randint(1, 3)):
+            lines += [f"+ SUBSTANCE {i}-{j}", rng.choice(LEVELS), f"Risque {i}-{j}"]
+    size = len(lines) // n_pages + 1
+    return [lines[k : k + size] for k in range(0, len(lines), size)]
+
+
+def _full_parse(pages: list[list[str]]) -> list[dict]:
+    texts = ["\n".join(lines) for lines in pages]
+    return [record for _, record in iter_interactions(iter_positioned_lines(texts))]
+
+
+def _pairs(rows) -> set[tuple[str, str]]:
+    return {(r.substance_a, r.substance_b) for r in rows}
+
+
+class TestReparsePages:
+    def test_first_run_is_full_parse_and_all_added(self):
+        pages = _release()
+        result = reparse_pages(pages, previous=None)
+        assert result.records == _full_parse(pages)
+        assert result.pages_reparsed == len(pages)
+        assert len(result.delta.added) == len(
+            {(r["substance_a"], r["substance_b"]) for r in result.records}
+        )
+
+    def test_identical_pages_reparse_nothing(self):
+        pages = _release()
+        first = reparse_pages(pages, previous=None)
+        second = reparse_pages(pages, previous=first.snapshot)
+        assert second.records == first.records
+        assert second.pages_reparsed == 0
+        assert second.delta.is_empty
+
+    def test_changed_level_is_reported_and_localized(self):
+        old = _release()
+        new = [list(page) for page in old]
+        idx = next(i for i, line in enumerate(new[6]) if line in LEVELS)
+        new[6][idx] = LEVELS[(LEVELS.index(new[6][idx]) + 1) % len(LEVELS)]
+
+        previous = reparse_pages(old, previous=None).snapshot
+        result = reparse_pages(new, previous=previous)
+
+        assert result.records == _full_parse(new)
+        assert result.pages_reparsed < len(new) // 2
+        assert not result.delta.added and not result.delta.removed
+        assert len(result.delta.changed) == 1
+        change = result.delta.changed[0]
+        assert change.before.substance_b == change.after.substance_b
+        assert change.before.niveau_contrainte != change.after.niveau_contrainte
+
+    def test_added_and_removed_pairs(self):
+        old = _release()
+        new = [list(page) for page in old]
+        plus = next(i for i, line in enumerate(new[4]) if line.startswith("+"))
+        removed_b = new[4][plus].lstrip("+ ")
+        new[4][plus] = "+ NOUVELLE SUBSTANCE"
+
+        result = reparse_pages(new, previous=reparse_pages(old, previous=None).snapshot)
+
+        assert result.records == _full_parse(new)
+        assert {b for _, b in _pairs(result.delta.added)} == {"NOUVELLE SUBSTANCE"}
+        assert {b for _, b in _pairs(result.delta.removed)} == {removed_b}
+
+    @pytest.mark.parametrize("seed", range(25))
+    def test_random_edits_match_full_parse(self, seed):
+        rng = random.Random(seed)
+        old = _release(seed=seed)
+        new = [list(page) for page in old]
+        for _ in range(rng.randint(1, 3)):
+            edit = rng.choice(["insert_page", "delete_page", "edit_line", "new_header"])
+            page = rng.randrange(len(new))
+            if edit == "insert_page":
+                new.insert(page, ["+ INSEREE", "Contre-indication", "Risque insere"])
+            elif edit == "delete_page" and len(new) > 1:
+                del new[page]
+            elif edit == "edit_line" and new[page]:
+                new[page][rng.randrange(len(new[page]))] = "Précaution d'emploi"
+            else:
+                new[page].insert(rng.randint(0, len(new[page])), f"NOUVEAU CHAPITRE {seed}")
+
+        first = reparse_pages(old, previous=None)
+        result = reparse_pages(new, previous=first.snapshot)
+        assert result.records == _full_parse(new)
+
+        # A further no-op release carries everything over
+        again = reparse_pages(new, previous=result.snapshot)
+        assert again.records == result.records
+        assert again.pages_reparsed == 0
+
+
+class TestReparsePdf:
+    def test_unchanged_pdf_short_circuits(self, make_pdf, tmp_path):
+        pdf = make_pdf(_release(n_pages=3))
+        first = reparse_thesaurus_pdf(pdf, previous=None)
+        again = reparse_thesaurus_pdf(pdf, previous=first.snapshot)
+        assert again.records == first.records
+        assert again.pages_reparsed == 0
+        assert again.delta.is_empty
+
+    def test_snapshot_and_delta_roundtrip(self, make_pdf, tmp_path):
+        result = reparse_thesaurus_pdf(make_pdf(_release(n_pages=3)), previous=None)
+        path = tmp_path / "snapshot.json.gz"
+        save_snapshot(result.snapshot, path)
+        assert load_snapshot(path) == result.snapshot
+
+        changelog = write_delta(result.delta, tmp_path / "changelog", result.snapshot.pdf_sha256)
+        assert changelog.exists()
+
+    def test_missing_or_corrupt_snapshot_loads_as_none(self, tmp_path):
+        assert load_snapshot(tmp_path / "missing.json.gz") is None
+        corrupt = tmp_path / "corrupt.json.gz"
+        corrupt.write_bytes(b"not gzip")
+        assert load_snapshot(corrupt) is None
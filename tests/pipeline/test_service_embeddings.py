@@ -0,0 +1,117 @@
+"""Embedding service — concurrent callers are batched together and get their own vectors back."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from nephila.pipeline.io.embedder_local import ServiceEmbeddingFunction, get_embedding_function
+from nephila.pipeline.io.service_embeddings import (
+    EmbeddingService,
+    EmbeddingServiceClient,
+    parse_address,
+)
+
+
+class SlowEncoder:
+    """Encodes a text as [len, first char code]; each forward pass takes a little time."""
+
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        if any(t == "boom" for t in texts):
+            raise ValueError("cannot embed boom")
+        threading.Event().wait(0.02)
+        with self.lock:
+            self.batches.append(len(texts))
+        return np.array([[float(len(t)), float(ord(t[0]))] for t in texts])
+
+
+@pytest.fixture
+def service(tmp_path):
+    encoder = SlowEncoder()
+    with EmbeddingService(f"unix:{tmp_path / 'emb.sock'}", encoder, window_ms=5) as svc:
+        yield svc, encoder
+
+
+def test_parse_address():
+    assert parse_address("unix:/run/emb.sock") == ("unix", "/run/emb.sock")
+    assert parse_address("tcp:127.0.0.1:8200") == ("tcp", ("127.0.0.1", 8200))
+    assert parse_address("localhost:8200") == ("tcp", ("localhost", 8200))
+    assert parse_address(":8200") == ("tcp", ("127.0.0.1", 8200))
+
+
+def test_concurrent_requests_share_forward_passes(service):
+    svc, encoder = service
+    client = EmbeddingServiceClient(svc.address)
+    texts = [chr(ord("a") + i % 26) * (i + 1) for i in range(40)]
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda t: client.embed([t]), texts))
+
+    for text, vectors in zip(texts, results, strict=True):
+        assert vectors.tolist() == [[float(len(text)), float(ord(text[0]))]]
+    assert sum(encoder.batches) == 40
+    assert len(encoder.batches) < 40
+    assert svc.batcher.stats.mean_batch_size > 1
+
+
+def test_multi_text_requests_are_split_back(service):
+    svc, _ = service
+    vectors = EmbeddingServiceClient(svc.address).embed(["ab", "xyz"])
+
+    assert vectors.tolist() == [[2.0, 97.0], [3.0, 120.0]]
+
+
+def test_encoder_errors_reach_the_caller_and_the_service_keeps_serving(service):
+    svc, _ = service
+    client = EmbeddingServiceClient(svc.address)
+
+    with pytest.raises(RuntimeError, match="cannot embed boom"):
+        client.embed(["boom"])
+    assert client.embed(["ok"]).tolist() == [[2.0, 111.0]]
+
+
+def test_service_embedding_function_loads_no_model(service):
+    svc, _ = service
+    ef = get_embedding_function("e5", service=svc.address)
+
+    assert isinstance(ef, ServiceEmbeddingFunction)
+    assert ef.name() == "sentence_transformer"
+    assert [list(v) for v in ef(["abc"])] == [[3.0, 97.0]]
+
+
+def test_a_failing_request_does_not_fail_the_others_in_its_batch(tmp_path):
+    encoder = SlowEncoder()
+    with EmbeddingService(f"unix:{tmp_path / 'emb.sock'}", encoder, window_ms=200) as svc:
+        client = EmbeddingServiceClient(svc.address)
+
+        def embed(text):
+            try:
+                return client.embed([text]).tolist()
+            except RuntimeError as exc:
+                return str(exc)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(embed, ["ab", "boom", "xyz"]))
+
+    assert results[0] == [[2.0, 97.0]]
+    assert "cannot embed boom" in results[1]
+    assert results[2] == [[3.0, 120.0]]
+    assert svc.batcher.stats.requests == 2
+
+
+def test_stop_closes_open_client_connections(tmp_path):
+    svc = EmbeddingService(f"unix:{tmp_path / 'emb.sock'}", SlowEncoder()).start()
+    client = EmbeddingServiceClient(svc.address)
+    assert client.embed(["ok"]).tolist() == [[2.0, 111.0]]  # the connection stays open
+
+    stopper = threading.Thread(target=svc.stop)
+    stopper.start()
+    stopper.join(timeout=5)
+
+    assert not stopper.is_alive()
+    assert client._stream().readline() == b""  # closed by the service
@@ -0,0 +1,169 @@
+"""Data-version propagation — downstream assets skip when upstream content is unchanged."""
+
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from dagster import (
+    AssetExecutionContext,
+    AssetKey,
+    AssetSpec,
+    DagsterInstance,
+    MaterializeResult,
+    asset,
+    materialize,
+    multi_asset,
+)
+
+from nephila.pipeline.versioning_pipeline import (
+    content_version,
+    latest_data_version,
+    settings_code_version,
+    settings_values,
+    unchanged_results,
+    upstream_unchanged,
+)
+
+SOURCE = {"content": "v1"}
+CALLS: list[str] = []
+
+
+@asset
+def bronze_file() -> MaterializeResult:
+    return MaterializeResult(data_version=content_version(SOURCE["content"]))
+
+
+@multi_asset(specs=[AssetSpec("raw_a", deps=[bronze_file]), AssetSpec("raw_b", deps=[bronze_file])])
+def raw_tables(context: AssetExecutionContext) -> Iterator[MaterializeResult[Any]]:
+    if upstream_unchanged(context):
+        yield from unchanged_results(context)
+        return
+    CALLS.append("raw")
+    for key in context.selected_asset_keys:
+        yield MaterializeResult(asset_key=key, data_version=content_version(SOURCE["content"], "t"))
+
+
+@asset(deps=["raw_a", "raw_b"])
+def gold(context: AssetExecutionContext) -> MaterializeResult:
+    if upstream_unchanged(context):
+        return unchanged_results(context)[0]
+    CALLS.append("gold")
+    return MaterializeResult(data_version=content_version(SOURCE["content"], "gold"))
+
+
+ASSETS = [bronze_file, raw_tables, gold]
+
+
+def _versioned_gold(code_version: str):
+    """gold, at a given code version (an edited dbt model, changed settings)."""
+
+    @asset(name="gold", deps=["raw_a", "raw_b"], code_version=code_version)
+    def versioned(context: AssetExecutionContext) -> MaterializeResult:
+        if upstream_unchanged(context):
+            return unchanged_results(context)[0]
+        CALLS.append(f"gold@{code_version}")
+        return MaterializeResult(data_version=content_version(SOURCE["content"], code_version))
+
+    return versioned
+
+
+@pytest.fixture
+def instance():
+    SOURCE["content"] = "v1"
+    CALLS.clear()
+    with DagsterInstance.ephemeral() as instance:
+        yield instance
+
+
+def _skipped(result, key: str) -> bool:
+    materializations = result.asset_materializations_for_node(
+        "gold" if key == "gold" else "raw_tables"
+    )
+    by_key = {m.asset_key: m for m in materializations}
+    return bool(by_key[AssetKey(key)].metadata.get("skipped"))
+
+
+class TestUpstreamUnchanged:
+    def test_first_run_computes_everything(self, instance):
+        assert materialize(ASSETS, instance=instance).success
+        assert CALLS == ["raw", "gold"]
+
+    def test_identical_content_skips_downstream(self, instance):
+        materialize(ASSETS, instance=instance)
+        before = latest_data_version(instance, AssetKey("gold"))
+
+        result = materialize(ASSETS, instance=instance)
+
+        assert result.success
+        assert CALLS == ["raw", "gold"]
+        assert _skipped(result, "raw_a") and _skipped(result, "gold")
+        assert latest_data_version(instance, AssetKey("gold")) == before
+
+    def test_changed_content_recomputes(self, instance):
+        materialize(ASSETS, instance=instance)
+        SOURCE["content"] = "v2"
+        materialize(ASSETS, instance=instance)
+        assert CALLS == ["raw", "gold", "raw", "gold"]
+
+        # And the run after that is a no-op again
+        materialize(ASSETS, instance=instance)
+        assert CALLS == ["raw", "gold", "raw", "gold"]
+
+    def test_downstream_alone_reuses_upstream_history(self, instance):
+        materialize(ASSETS, instance=instance)
+        result = materialize(ASSETS, instance=instance, selection=["gold"])
+        assert result.success
+        assert CALLS == ["raw", "gold"]
+
+    def test_changed_code_version_recomputes(self, instance):
+        materialize([bronze_file, raw_tables, _versioned_gold("1")], instance=instance)
+        materialize([bronze_file, raw_tables, _versioned_gold("1")], instance=instance)
+        assert CALLS == ["raw", "gold@1"]
+
+        materialize([bronze_file, raw_tables, _versioned_gold("2")], instance=instance)
+        assert CALLS == ["raw", "gold@1", "gold@2"]
+
+        # And the run after that is a no-op again
+        materialize([bronze_file, raw_tables, _versioned_gold("2")], instance=instance)
+        assert CALLS == ["raw", "gold@1", "gold@2"]
+
+    def test_changed_pdf_text_backend_recomputes(self, instance, monkeypatch):
+        """The ANSM parsing assets fold PDF_TEXT_BACKEND into their code version."""
+        for name in (
+            "POSTGRES_HOST",
+            "POSTGRES_USER",
+            "POSTGRES_PASSWORD",
+            "POSTGRES_DB",
+            "CHROMA_HOST",
+            "OPENROUTER_API_KEY",
+            "OPENROUTER_BASE_URL",
+            "OPENROUTER_MODEL",
+        ):
+            monkeypatch.setenv(name, "x")
+        monkeypatch.setenv("POSTGRES_PORT", "5432")
+        monkeypatch.setenv("CHROMA_PORT", "8000")
+
+        def run(backend: str) -> None:
+            monkeypatch.setenv("PDF_TEXT_BACKEND", backend)
+            version = settings_code_version("1", settings_values(("pdf_text_backend",)))
+            materialize([bronze_file, raw_tables, _versioned_gold(version)], instance=instance)
+
+        run("pdfplumber")
+        run("pdfplumber")
+        assert len(CALLS) == 2
+
+        run("pdfium")
+        assert len(CALLS) == 3 and CALLS[1] != CALLS[2]
+
+
+def test_settings_code_version_changes_with_settings():
+    assert settings_code_version("1", {}) == "1"
+    a = settings_code_version("1", {"embedding_model": "e5", "collection_hnsw": {}})
+    assert a == settings_code_version("1", {"collection_hnsw": {}, "embedding_model": "e5"})
+    assert a != settings_code_version("1", {"embedding_model": "e5", "collection_hnsw": {"x": 1}})
+    assert a != settings_code_version("2", {"embedding_model": "e5", "collection_hnsw": {}})
+
+
+def test_content_version_is_order_sensitive():
+    assert content_version("a").value == "a"
+    assert content_version("a", "b") != content_version("b", "a")